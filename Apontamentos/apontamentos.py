@@ -1,214 +1,238 @@
 import os
-import requests
+import sys
+import argparse
 import mysql.connector
 import logging
 from mysql.connector import errorcode
-from dotenv import load_dotenv
-
-# === Configuração de ambiente e logs ===
-load_dotenv()
-
-logging.basicConfig(
-    filename='logs/apontamentos.log',
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s'
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tickets_sync.backfill import parse_window
+from tickets_sync.changes import HASH_COLUMN, row_hash
+from tickets_sync.client import get_client
+from tickets_sync.config import API_URL_APONTAMENTOS, setup_logging
+from tickets_sync.db import bulk_upsert
+from tickets_sync.decoding import PageDecoder
+from tickets_sync.dimensions import AGENTES, ORGANIZACOES
+from tickets_sync.mapping import Field, RecordSpec, as_date, as_datetime, as_minutes
+from tickets_sync.migrations import (
+    Migration, add_column, add_index, convert_to_temporal, create_table, migrate, split_dimensions,
+)
+from tickets_sync.pagination import iter_pages
+from tickets_sync.refresh import iter_ticket_records
+from tickets_sync.runner import sync_entity
+from tickets_sync.telemetry import NO_METRICS, write_run_report
+
+# === Mapeamento JSON -> colunas ===
+# Gera o CREATE TABLE, o INSERT e o extrator que devolve as tuplas na ordem das colunas
+SPEC = RecordSpec("apontamentos", [
+    Field("requestUUID", "VARCHAR(100)", primary_key=True),
+    Field("apontamentoKey", "INT"),
+    Field("ticketKey", "INT"),
+    Field("organizacaoDoTicketKey", "INT"),
+    Field("organizacaoDoTicketNome", "VARCHAR(255)"),
+    Field("usuarioKey", "INT"),
+    Field("usuarioNomeAbreviado", "VARCHAR(255)"),
+    Field("descricao", "TEXT"),
+    Field("dataDeCriacao", "DATETIME", convert=as_datetime),
+    Field("dataDeAlteracao", "DATETIME", convert=as_datetime),
+    Field("dataDoLancamentoFormatada", "VARCHAR(50)"),
+    Field("dataDoLancamento", "DATE", convert=as_date),
+    Field("horaDoLancamento", "VARCHAR(20)"),
+    Field("quantidade", "DECIMAL(10,2)"),
+    Field("quantidadeFormatada", "VARCHAR(20)"),
+    # Duração em minutos inteiros, para somas sem conversão de texto no banco
+    Field("minutos", "INT", ("quantidadeFormatada",), convert=as_minutes),
+    Field("valorPorQuantidade", "DECIMAL(10,2)"),
+    Field("bonificado", "BOOLEAN"),
+    Field("tipoDeApontamentoKey", "INT"),
+    Field("permiteEditarApontamentosDeOutrosUsuarios", "BOOLEAN"),
+    Field("valorTotal", "DECIMAL(10,2)"),
+    Field("valorCredito", "DECIMAL(10,2)"),
+    Field("ativo", "BOOLEAN"),
+    Field("moderado", "BOOLEAN"),
+    Field("kanbanStatusDescricaoAtuacao", "VARCHAR(255)"),
+    Field("excedeuTempoEstimado", "BOOLEAN"),
+    Field("semSaldoTempoEstimado", "BOOLEAN"),
+    # Alguns apontamentos podem nao ter 'links' ou 'href'
+    Field("link_href", "TEXT", ("links", 0, "href")),
+],
+    # Nomes da organização e do usuário ficam nas dimensões; `apontamentos` vira uma view sobre fato_apontamentos
+    fact_table="fato_apontamentos",
+    dimensions=[
+        ORGANIZACOES.link("organizacaoDoTicketKey", nome="organizacaoDoTicketNome"),
+        AGENTES.link("usuarioKey", nomeAbreviado="usuarioNomeAbreviado"),
+    ],
 )
 
-API_URL_APONTAMENTOS = os.getenv("API_URL_APONTAMENTOS")
-API_EMAIL = os.getenv("API_EMAIL")
-API_TOKEN = os.getenv("API_TOKEN")
-
-DB_CONFIG = {
-    'host': os.getenv("DB_HOST"),
-    'user': os.getenv("DB_USER"),
-    'password': os.getenv("DB_PASSWORD"),
-    'database': os.getenv("DB_NAME")
-}
-
-# === Criação da tabela ===
-CREATE_TABLE_SQL = """
-CREATE TABLE IF NOT EXISTS apontamentos (
-    requestUUID VARCHAR(100) PRIMARY KEY,
-    apontamentoKey INT,
-    ticketKey INT,
-    organizacaoDoTicketKey INT,
-    organizacaoDoTicketNome VARCHAR(255),
-    usuarioKey INT,
-    usuarioNomeAbreviado VARCHAR(255),
-    descricao TEXT,
-    dataDeCriacao VARCHAR(50),
-    dataDeAlteracao VARCHAR(50),
-    dataDoLancamentoFormatada VARCHAR(50),
-    dataDoLancamento VARCHAR(50),
-    horaDoLancamento VARCHAR(20),
-    quantidade DECIMAL(10,2),
-    quantidadeFormatada VARCHAR(20),
-    valorPorQuantidade DECIMAL(10,2),
-    bonificado BOOLEAN,
-    tipoDeApontamentoKey INT,
-    permiteEditarApontamentosDeOutrosUsuarios BOOLEAN,
-    valorTotal DECIMAL(10,2),
-    valorCredito DECIMAL(10,2),
-    ativo BOOLEAN,
-    moderado BOOLEAN,
-    kanbanStatusDescricaoAtuacao VARCHAR(255),
-    excedeuTempoEstimado BOOLEAN,
-    semSaldoTempoEstimado BOOLEAN,
-    link_href TEXT
-);
-"""
-
-INSERT_SQL = """
-REPLACE INTO apontamentos (
-    requestUUID, apontamentoKey, ticketKey, organizacaoDoTicketKey, organizacaoDoTicketNome,
-    usuarioKey, usuarioNomeAbreviado, descricao, dataDeCriacao, dataDeAlteracao,
-    dataDoLancamentoFormatada, dataDoLancamento, horaDoLancamento, quantidade,
-    quantidadeFormatada, valorPorQuantidade, bonificado, tipoDeApontamentoKey,
-    permiteEditarApontamentosDeOutrosUsuarios, valorTotal, valorCredito,
-    ativo, moderado, kanbanStatusDescricaoAtuacao, excedeuTempoEstimado,
-    semSaldoTempoEstimado, link_href
+INSERT_SQL = SPEC.insert_sql
+PRIMARY_KEY = SPEC.primary_key
+COLUMNS = SPEC.columns
+# Posição do ticket nas linhas extraídas, para atualizar apenas esses chamados na tabela unificada
+TICKET_INDEX = COLUMNS.index("ticketKey")
+# Coluna usada para particionar por mês a exportação Parquet (opcional, ver PARQUET_DIR)
+PARQUET_PARTITION = "dataDeCriacao"
+# Decodifica cada página direto nos registros do SPEC (ver JSON_DECODER)
+DECODER = PageDecoder(SPEC, envelope="content", envelope_required=False)
+
+# === Migrações de esquema ===
+# Minutos a partir de quantidadeFormatada ("HH:MM"), para as linhas gravadas antes da coluna `minutos`
+MINUTOS_BACKFILL_SQL = (
+    "CAST(SUBSTRING_INDEX(quantidadeFormatada, ':', 1) AS UNSIGNED) * 60 + "
+    "CAST(SUBSTRING_INDEX(quantidadeFormatada, ':', -1) AS UNSIGNED)"
 )
-VALUES (
-    %(requestUUID)s, %(apontamentoKey)s, %(ticketKey)s, %(organizacaoDoTicketKey)s, %(organizacaoDoTicketNome)s,
-    %(usuarioKey)s, %(usuarioNomeAbreviado)s, %(descricao)s, %(dataDeCriacao)s, %(dataDeAlteracao)s,
-    %(dataDoLancamentoFormatada)s, %(dataDoLancamento)s, %(horaDoLancamento)s, %(quantidade)s,
-    %(quantidadeFormatada)s, %(valorPorQuantidade)s, %(bonificado)s, %(tipoDeApontamentoKey)s,
-    %(permiteEditarApontamentosDeOutrosUsuarios)s, %(valorTotal)s, %(valorCredito)s,
-    %(ativo)s, %(moderado)s, %(kanbanStatusDescricaoAtuacao)s, %(excedeuTempoEstimado)s,
-    %(semSaldoTempoEstimado)s, %(link_href)s
-);
-"""
-
-
-def connect_db():
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
-    except mysql.connector.Error as err:
-        logging.error(f"Erro ao conectar ao banco: {err}")
-        raise
+
+MIGRATIONS = [
+    Migration(1, "cria a tabela apontamentos", create_table(SPEC)),
+    Migration(2, "coluna rowHash", add_column("apontamentos", HASH_COLUMN, "CHAR(32)")),
+    Migration(3, "datas em DATE/DATETIME",
+              convert_to_temporal("apontamentos", "dataDeCriacao", "DATETIME"),
+              convert_to_temporal("apontamentos", "dataDeAlteracao", "DATETIME"),
+              convert_to_temporal("apontamentos", "dataDoLancamento", "DATE")),
+    Migration(4, "duração em minutos inteiros",
+              add_column("apontamentos", "minutos", "INT", backfill=MINUTOS_BACKFILL_SQL)),
+    # ticketKey é a chave de junção com chamados em bases_unify.sql e chamados_unificados
+    Migration(5, "índices por ticket e data do lançamento",
+              add_index("apontamentos", "idx_apontamentos_ticketKey", ["ticketKey"]),
+              add_index("apontamentos", "idx_apontamentos_dataDoLancamento", ["dataDoLancamento"])),
+    Migration(6, "dimensões e tabela de fatos só com as chaves", split_dimensions(SPEC)),
+]
 
 def ensure_table_exists(conn):
     try:
-        cursor = conn.cursor()
-        cursor.execute(CREATE_TABLE_SQL)
-        conn.commit()
-        cursor.close()
+        migrate(conn, SPEC.table, MIGRATIONS)
         logging.info("Tabela verificada/criada com sucesso.")
     except mysql.connector.Error as err:
         logging.error(f"Erro ao criar tabela: {err}")
         raise
 
-def fetch_tickets(page=1, limit_pages=None):
-    all_tickets = []
-    current_page = page
-    resultados_por_pagina = '50'
-    data_inicial = '01/04/2025'
-    headers = {"Content-Type": "application/json"}
-    auth = (API_EMAIL, API_TOKEN)
-
-    while True:
-        params = {"pagina": current_page, "resultadosPorPagina": resultados_por_pagina, "dataInicial": data_inicial}
-        response = requests.get(API_URL_APONTAMENTOS, auth=auth, headers=headers, params=params)
-
-        if response.status_code != 200:
-            logging.error(f"Erro ao buscar página {current_page}: {response.status_code} - {response.text}")
-            break
-
-        try:
-            data = response.json()
-        except Exception as e:
-            logging.error(f"Erro ao decodificar JSON da página {current_page}: {e}")
-            break
-
-        # Detecta se o retorno é lista ou dicionário
-        if isinstance(data, list):
-            tickets = data
-        elif isinstance(data, dict):
-            tickets = data.get("content", [])
-        else:
-            logging.warning(f"Formato de resposta inesperado na página {current_page}")
-            break
-
-        if not tickets:
-            logging.info(f"Nenhum apontamento encontrado na página {current_page}. Encerrando.")
-            break
+# === Parâmetros de paginação da API ===
+# Limite de páginas por execução, para evitar loops infinitos em caso de erro na API
+LIMITE_DE_PAGINAS = 500
+RESULTADOS_POR_PAGINA = '50'
+DATA_INICIAL = '01/04/2025'
+
+# === Sincronização incremental ===
+ENTIDADE = "apontamentos"
+# Campo usado como marca d'água e filtro enviado à API nas execuções incrementais
+WATERMARK_FIELD = "dataDeAlteracao"
+# O nome do filtro é presumido (segue o padrão dos demais parâmetros da API); a primeira página de cada
+# carga incremental é conferida contra ele e um aviso vai para o log se a API o ignorar (tickets_sync/state.py)
+FILTRO_ALTERACAO = "dataDeAlteracaoInicial"
+
+# === Backfill por janelas de datas (tickets_sync/backfill.py) ===
+INICIO_DO_HISTORICO = DATA_INICIAL
+# Filtros de data inicial e final (do lançamento) de cada janela e a coluna correspondente na tabela
+FILTROS_JANELA = ("dataInicial", "dataFinal")
+COLUNA_JANELA = "dataDoLancamento"
+
+# === Atualização dirigida pelos chamados alterados (tickets_sync/refresh.py) ===
+# Filtro por ticket da API e campo do registro com o ticket
+FILTRO_TICKET = "ticketKey"
+CAMPO_TICKET = "ticketKey"
+
+def page_request(page, filtros=None):
+    # URL e parâmetros da página, compartilhados com o motor assíncrono (tickets_sync/aio.py)
+    return API_URL_APONTAMENTOS, {"pagina": page, "resultadosPorPagina": RESULTADOS_POR_PAGINA, "dataInicial": DATA_INICIAL, **(filtros or {})}
+
+def fetch_page(page, filtros=None, metrics=NO_METRICS):
+    url, params = page_request(page, filtros)
+    # Sessão compartilhada: conexões keep-alive, gzip e autenticação já configurados
+    with metrics.phase("fetch"):
+        response = get_client().get(url, params=params, metrics=metrics)
+
+    if response.status_code != 200:
+        logging.error(f"Erro ao buscar página {page}: {response.status_code} - {response.text}")
+        return None
 
-        all_tickets.extend(tickets)
+    try:
+        with metrics.phase("decode"):
+            tickets = DECODER.decode(response.content)
+    except Exception as e:
+        logging.error(f"Erro ao decodificar JSON da página {page}: {e}")
+        return None
+
+    if not tickets:
+        logging.info(f"Nenhum apontamento encontrado na página {page}. Encerrando.")
+    return tickets
+
+def fetch_tickets(page=1, limit_pages=None, workers=None, filtros=None, metrics=NO_METRICS):
+    # As páginas são buscadas em paralelo (API_FETCH_WORKERS) mas entregues em ordem,
+    # uma a uma, para que a gravação no banco comece sem esperar o fim do download
+    for current_page, tickets in iter_pages(partial(fetch_page, filtros=filtros, metrics=metrics), page=page, limit_pages=limit_pages, workers=workers, key=PRIMARY_KEY):
         logging.info(f"Página {current_page} processada com {len(tickets)} apontamentos.")
-
-        # Controle de paginação
-        if limit_pages and current_page >= limit_pages:
-            break
-
-        # Caso a API não tenha metadado de próxima página, apenas itera até a próxima página manualmente
-        current_page += 1
-
-    return all_tickets
-
-def insert_tickets(conn, tickets):
-    cursor = conn.cursor()
-
-    for t in tickets:
-        # Alguns apontamentos podem nao ter 'links' ou 'href'
-        link_href = None
-        if isinstance(t.get("links"), list) and len(t["links"]) > 0:
-            link_href = t["links"][0].get("href")
-
-        ticket_data = {
-            "requestUUID": t.get("requestUUID"),
-            "apontamentoKey": t.get("apontamentoKey"),
-            "ticketKey": t.get("ticketKey"),
-            "organizacaoDoTicketKey": t.get("organizacaoDoTicketKey"),
-            "organizacaoDoTicketNome": t.get("organizacaoDoTicketNome"),
-            "usuarioKey": t.get("usuarioKey"),
-            "usuarioNomeAbreviado": t.get("usuarioNomeAbreviado"),
-            "descricao": t.get("descricao"),
-            "dataDeCriacao": t.get("dataDeCriacao"),
-            "dataDeAlteracao": t.get("dataDeAlteracao"),
-            "dataDoLancamentoFormatada": t.get("dataDoLancamentoFormatada"),
-            "dataDoLancamento": t.get("dataDoLancamento"),
-            "horaDoLancamento": t.get("horaDoLancamento"),
-            "quantidade": t.get("quantidade"),
-            "quantidadeFormatada": t.get("quantidadeFormatada"),
-            "valorPorQuantidade": t.get("valorPorQuantidade"),
-            "bonificado": t.get("bonificado"),
-            "tipoDeApontamentoKey": t.get("tipoDeApontamentoKey"),
-            "permiteEditarApontamentosDeOutrosUsuarios": t.get("permiteEditarApontamentosDeOutrosUsuarios"),
-            "valorTotal": t.get("valorTotal"),
-            "valorCredito": t.get("valorCredito"),
-            "ativo": t.get("ativo"),
-            "moderado": t.get("moderado"),
-            "kanbanStatusDescricaoAtuacao": t.get("kanbanStatusDescricaoAtuacao"),
-            "excedeuTempoEstimado": t.get("excedeuTempoEstimado"),
-            "semSaldoTempoEstimado": t.get("semSaldoTempoEstimado"),
-            "link_href": link_href
-        }
-
-        try:
-            cursor.execute(INSERT_SQL, ticket_data)
-        except mysql.connector.Error as err:
-            logging.error(f"Erro ao inserir ticket: {err}")
-
-    conn.commit()
-    cursor.close()
-    logging.info(f"{len(tickets)} apontamentos inseridos/atualizados no banco.")
-
-def main(limit_pages=None):
-    logging.info("=== Iniciando sincronização com API Acelerato ===")
-    conn = connect_db()
-    ensure_table_exists(conn)
-
-    tickets = fetch_tickets(limit_pages=limit_pages)
-    if tickets:
-        conn.ping(reconnect=True, attempts=3, delay=2)
-        insert_tickets(conn, tickets)
-    else:
-        logging.warning("Nenhum apontamento encontrado para sincronizar.")
-
-    conn.close()
-    logging.info("=== Sincronização concluída ===")
+        metrics.count("paginas")
+        yield current_page, tickets
+
+def fetch_for_tickets(ticket_keys, metrics=NO_METRICS):
+    # Só os apontamentos dos chamados alterados, vários tickets em paralelo, entregues em lotes
+    records = iter_ticket_records(partial(fetch_page, metrics=metrics), ticket_keys, FILTRO_TICKET, CAMPO_TICKET,
+                                  key=PRIMARY_KEY, page_size=int(RESULTADOS_POR_PAGINA))
+    for batch, tickets in records:
+        logging.info(f"Lote {batch} processado com {len(tickets)} apontamentos de chamados alterados.")
+        metrics.count("paginas")
+        yield batch, tickets
+
+def insert_tickets(conn, tickets, hashes=None, sink=None, loader=None, metrics=NO_METRICS, dimensions=None,
+                   writer=None, page=None):
+    with metrics.phase("transform"):
+        rows = SPEC.extract_many(tickets)
+    # O destino colunar recebe todas as linhas; a mesclagem por chave torna a gravação idempotente
+    if sink is not None:
+        with metrics.phase("parquet"):
+            sink.write(rows)
+
+    # Com o índice de hashes, apenas linhas novas ou alteradas seguem para o banco
+    with metrics.phase("transform"):
+        if hashes is not None:
+            rows = hashes.changed_rows(rows)
+        else:
+            rows = [row + (row_hash(row),) for row in rows]
+
+    # Nomes e descrições vão para as dimensões (cada linha uma vez por execução); o fato fica só com as chaves
+    if dimensions is not None:
+        with metrics.phase("write"):
+            dimensions.write(conn, rows, metrics)
+    facts = SPEC.fact_rows(rows)
+
+    # Na carga em massa as linhas vão para o arquivo de staging e são mescladas no final
+    if loader is not None:
+        with metrics.phase("write"):
+            loader.write(facts)
+        return rows
+
+    # Na gravação em paralelo as linhas seguem para as threads do PartitionedWriter
+    if writer is not None:
+        with metrics.phase("write"):
+            writer.write(facts, page)
+        return rows
+
+    # Os hashes só entram no índice depois da gravação; as linhas que falharam são reenviadas na próxima execução
+    failed = []
+    with metrics.phase("write"):
+        written = bulk_upsert(conn, SPEC.fact_table, SPEC.write_columns, facts, key=PRIMARY_KEY, metrics=metrics,
+                              failed=failed)
+    if hashes is not None:
+        hashes.confirm(facts, failed=failed)
+    metrics.count("linhas_gravadas", written)
+    logging.info(f"{written} de {len(tickets)} apontamentos inseridos/atualizados no banco.")
+    return rows
+
+def main(limit_pages=None, **options):
+    # Marca d'água, checkpoint, gravação e tabela unificada ficam em tickets_sync/runner.py, comum às três entidades
+    return sync_entity(sys.modules[__name__], limit_pages, **options)
 
 if __name__ == "__main__":
-    # limite de páginas para testes
-    main(limit_pages=500)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Sincroniza os apontamentos do Acelerato com o MySQL")
+    parser.add_argument("--full", action="store_true", help="ignora a marca d'água e refaz a carga completa")
+    parser.add_argument("--resume", action="store_true", help="continua a última carga interrompida a partir do checkpoint")
+    parser.add_argument("--bulk", action="store_true", help="carga em massa via LOAD DATA LOCAL INFILE e staging (backfills)")
+    parser.add_argument("--engine", choices=["threads", "async"], help="motor da sincronização (padrão: SYNC_ENGINE)")
+    parser.add_argument("--window-start", help="carrega só a janela de datas iniciada neste dia (dd/mm/aaaa; padrão: início do histórico)")
+    parser.add_argument("--window-end", help="último dia (inclusivo) da janela (dd/mm/aaaa; padrão: hoje)")
+    args = parser.parse_args()
+
+    setup_logging('logs/apontamentos.log')
+    window = parse_window(args.window_start, args.window_end, INICIO_DO_HISTORICO)
+    stats = main(limit_pages=LIMITE_DE_PAGINAS, full=args.full, resume=args.resume, bulk=args.bulk, engine=args.engine, window=window)
+    write_run_report([stats])
\ No newline at end of file
@@ -1,194 +1,183 @@
 import os
-import requests
+import sys
 import mysql.connector
 import logging
 from mysql.connector import errorcode
-from dotenv import load_dotenv
-
-# === Configuração de ambiente e logs ===
-load_dotenv()
-
-logging.basicConfig(
-    filename='logs/feedbacks.log',
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s'
-)
-
-API_URL_FEEDBACKS = os.getenv("API_URL_FEEDBACKS")
-API_EMAIL = os.getenv("API_EMAIL")
-API_TOKEN = os.getenv("API_TOKEN")
-
-DB_CONFIG = {
-    'host': os.getenv("DB_HOST"),
-    'user': os.getenv("DB_USER"),
-    'password': os.getenv("DB_PASSWORD"),
-    'database': os.getenv("DB_NAME")
-}
-
-# === Criação da tabela ===
-CREATE_TABLE_SQL = """
-CREATE TABLE IF NOT EXISTS feedbacks (
-    ticketId INT PRIMARY KEY,
-    pesquisaId INT,
-    pesquisaNome VARCHAR(255),
-    dataDeProntoTicket VARCHAR(50),
-    agenteId VARCHAR(50),
-    agenteNome VARCHAR(255),
-    comentarios TEXT,
-    avaliacaoMedia DECIMAL(5,2),
-    status VARCHAR(50),
-    pergunta TEXT,
-    nota DECIMAL(5,2),
-    usuarioAvaliacaoId INT,
-    usuarioAvaliacaoNome VARCHAR(255),
-    dataDeAvaliacao VARCHAR(50),
-    statusPergunta VARCHAR(50)
-);
-"""
-
-INSERT_SQL = """
-REPLACE INTO feedbacks (
-    ticketId, pesquisaId, pesquisaNome, dataDeProntoTicket, agenteId, agenteNome,
-    comentarios, avaliacaoMedia, status, pergunta, nota, usuarioAvaliacaoId,
-    usuarioAvaliacaoNome, dataDeAvaliacao, statusPergunta
-)
-VALUES (
-    %(ticketId)s, %(pesquisaId)s, %(pesquisaNome)s, %(dataDeProntoTicket)s, %(agenteId)s, %(agenteNome)s,
-    %(comentarios)s, %(avaliacaoMedia)s, %(status)s, %(pergunta)s, %(nota)s, %(usuarioAvaliacaoId)s,
-    %(usuarioAvaliacaoNome)s, %(dataDeAvaliacao)s, %(statusPergunta)s
-);
-"""
-
-def connect_db():
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
-    except mysql.connector.Error as err:
-        logging.error(f"Erro ao conectar ao banco: {err}")
-        raise
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tickets_sync.changes import HASH_COLUMN, row_hash
+from tickets_sync.client import get_client
+from tickets_sync.config import API_URL_FEEDBACKS, setup_logging
+from tickets_sync.db import bulk_upsert
+from tickets_sync.decoding import PageDecoder
+from tickets_sync.mapping import Field, RecordSpec, as_datetime
+from tickets_sync.migrations import Migration, add_column, add_index, convert_to_temporal, create_table, migrate
+from tickets_sync.pagination import iter_pages
+from tickets_sync.refresh import iter_ticket_records
+from tickets_sync.runner import sync_entity
+from tickets_sync.telemetry import NO_METRICS, write_run_report
+
+# === Mapeamento JSON -> colunas ===
+# Gera o CREATE TABLE, o INSERT e o extrator que devolve as tuplas na ordem das colunas
+SPEC = RecordSpec("feedbacks", [
+    Field("ticketId", "INT", primary_key=True),
+    Field("pesquisaId", "INT"),
+    Field("pesquisaNome", "VARCHAR(255)"),
+    Field("dataDeProntoTicket", "DATETIME", convert=as_datetime),
+    Field("agenteId", "VARCHAR(50)"),
+    Field("agenteNome", "VARCHAR(255)"),
+    Field("comentarios", "TEXT"),
+    Field("avaliacaoMedia", "DECIMAL(5,2)"),
+    Field("status", "VARCHAR(50)"),
+    # Caso o JSON tenha perguntas, pegamos a primeira
+    Field("pergunta", "TEXT", ("perguntas", 0, "pergunta")),
+    Field("nota", "DECIMAL(5,2)", ("perguntas", 0, "nota")),
+    Field("usuarioAvaliacaoId", "INT", ("perguntas", 0, "usuarioAvaliacaoId")),
+    Field("usuarioAvaliacaoNome", "VARCHAR(255)", ("perguntas", 0, "usuarioAvaliacaoNome")),
+    Field("dataDeAvaliacao", "DATETIME", ("perguntas", 0, "dataDeAvaliacao"), convert=as_datetime),
+    Field("statusPergunta", "VARCHAR(50)", ("perguntas", 0, "status")),
+])
+
+INSERT_SQL = SPEC.insert_sql
+PRIMARY_KEY = SPEC.primary_key
+COLUMNS = SPEC.columns
+# Posição do ticket nas linhas extraídas, para atualizar apenas esses chamados na tabela unificada
+TICKET_INDEX = COLUMNS.index("ticketId")
+# Coluna usada para particionar por mês a exportação Parquet (opcional, ver PARQUET_DIR)
+PARQUET_PARTITION = "dataDeAvaliacao"
+# Decodifica cada página direto nos registros do SPEC (ver JSON_DECODER)
+DECODER = PageDecoder(SPEC, envelope="data")
+
+# === Migrações de esquema ===
+MIGRATIONS = [
+    Migration(1, "cria a tabela feedbacks", create_table(SPEC)),
+    Migration(2, "coluna rowHash", add_column("feedbacks", HASH_COLUMN, "CHAR(32)")),
+    Migration(3, "datas em DATETIME",
+              convert_to_temporal("feedbacks", "dataDeAvaliacao", "DATETIME"),
+              convert_to_temporal("feedbacks", "dataDeProntoTicket", "DATETIME")),
+    Migration(4, "índice por data da avaliação",
+              add_index("feedbacks", "idx_feedbacks_dataDeAvaliacao", ["dataDeAvaliacao"])),
+]
 
 def ensure_table_exists(conn):
     try:
-        cursor = conn.cursor()
-        cursor.execute(CREATE_TABLE_SQL)
-        conn.commit()
-        cursor.close()
+        migrate(conn, SPEC.table, MIGRATIONS)
         logging.info("Tabela verificada/criada com sucesso.")
     except mysql.connector.Error as err:
         logging.error(f"Erro ao criar tabela: {err}")
         raise
 
-def fetch_tickets(page=1, limit_pages=None):
-    all_tickets = []
-    current_page = page
-    itens_por_pagina = '100'
-    status_do_ticket = 'TODOS'
-    data_de_criacao_minima = "02/04/2025"
-    headers = {"Content-Type": "application/json"}
-    auth = (API_EMAIL, API_TOKEN)
-
-    while True:
-        params = {"page": current_page, "size": itens_por_pagina, "status": status_do_ticket, "dataDeCriacaoMinima": data_de_criacao_minima}
-        response = requests.get(API_URL_FEEDBACKS, auth=auth, headers=headers, params=params)
-
-        if response.status_code != 200:
-            logging.error(f"Erro ao buscar página {current_page}: {response.status_code} - {response.text}")
-            break
-
-        try:
-            data = response.json()
-        except Exception as e:
-            logging.error(f"Erro ao decodificar JSON da página {current_page}: {e}")
-            break
-
-        # Detecta se o retorno é lista ou dicionário
-        if isinstance(data, list):
-            tickets = data
-        elif isinstance(data, dict):
-            tickets = data.get("data", data)
-        else:
-            logging.warning(f"Formato de resposta inesperado na página {current_page}")
-            break
-
-        if not tickets:
-            logging.info(f"Nenhum ticket encontrado na página {current_page}. Encerrando.")
-            break
+# === Parâmetros de paginação da API ===
+# Limite de páginas por execução, para evitar loops infinitos em caso de erro na API
+LIMITE_DE_PAGINAS = 30
+ITENS_POR_PAGINA = '100'
+STATUS_DO_TICKET = 'TODOS'
+DATA_DE_CRIACAO_MINIMA = "02/04/2025"
+# O endpoint de feedbacks ignora `page`/`size` e devolve o conjunto completo a cada
+# requisição; buscar páginas em paralelo só multiplicaria downloads repetidos. A
+# paginação segue sequencial e termina assim que uma página repete a anterior.
+FETCH_WORKERS = 1
+# Na reconciliação (tickets_sync/reconcile.py), a página 2 igual à 1 confirma o conjunto completo
+# em vez de invalidar a lista de chaves
+PAGINACAO_IGNORADA = True
+ENTIDADE = "feedbacks"
+
+# === Atualização dirigida pelos chamados alterados (tickets_sync/refresh.py) ===
+# Filtro por ticket da API e campo do registro com o ticket; cada ticket tem no máximo
+# uma avaliação, então basta a primeira página
+FILTRO_TICKET = "ticketId"
+CAMPO_TICKET = "ticketId"
+PAGINAS_POR_TICKET = 1
+
+def page_request(page, filtros=None):
+    # URL e parâmetros da página, compartilhados com o motor assíncrono (tickets_sync/aio.py);
+    # o endpoint não tem filtro de alteração, então `filtros` só traz o filtro por ticket da atualização dirigida
+    return API_URL_FEEDBACKS, {"page": page, "size": ITENS_POR_PAGINA, "status": STATUS_DO_TICKET, "dataDeCriacaoMinima": DATA_DE_CRIACAO_MINIMA, **(filtros or {})}
+
+def fetch_page(page, filtros=None, metrics=NO_METRICS):
+    url, params = page_request(page, filtros)
+    # Sessão compartilhada: conexões keep-alive, gzip e autenticação já configurados
+    with metrics.phase("fetch"):
+        response = get_client().get(url, params=params, metrics=metrics)
+
+    if response.status_code != 200:
+        logging.error(f"Erro ao buscar página {page}: {response.status_code} - {response.text}")
+        return None
 
-        all_tickets.extend(tickets)
+    try:
+        with metrics.phase("decode"):
+            tickets = DECODER.decode(response.content)
+    except Exception as e:
+        logging.error(f"Erro ao decodificar JSON da página {page}: {e}")
+        return None
+
+    if not tickets:
+        logging.info(f"Nenhum ticket encontrado na página {page}. Encerrando.")
+    return tickets
+
+def fetch_tickets(page=1, limit_pages=None, workers=FETCH_WORKERS, filtros=None, metrics=NO_METRICS):
+    # As páginas são entregues uma a uma, para que a gravação no banco comece sem
+    # esperar o fim do download; avaliações repetidas entre páginas são descartadas
+    for current_page, tickets in iter_pages(partial(fetch_page, filtros=filtros, metrics=metrics), page=page, limit_pages=limit_pages, workers=workers, key=PRIMARY_KEY):
         logging.info(f"Página {current_page} processada com {len(tickets)} tickets.")
-
-        # Controle de paginação
-        if limit_pages and current_page >= limit_pages:
-            break
-
-        # Caso a API não tenha metadado de próxima página, apenas itera até a próxima página manualmente
-        current_page += 1
-
-    return all_tickets
-
-def insert_tickets(conn, tickets):
-    cursor = conn.cursor()
-
-    for t in tickets:
-        pergunta = None
-        nota = None
-        usuarioAvaliacaoId = None
-        usuarioAvaliacaoNome = None
-        dataDeAvaliacao = None
-        statusPergunta = None
-
-        # Caso o JSON tenha perguntas, pegamos a primeira
-        if isinstance(t.get("perguntas"), list) and len(t["perguntas"]) > 0:
-            p = t["perguntas"][0]
-            pergunta = p.get("pergunta")
-            nota = p.get("nota")
-            usuarioAvaliacaoId = p.get("usuarioAvaliacaoId")
-            usuarioAvaliacaoNome = p.get("usuarioAvaliacaoNome")
-            dataDeAvaliacao = p.get("dataDeAvaliacao")
-            statusPergunta = p.get("status")
-
-        ticket_data = {
-            "ticketId": t.get("ticketId"),
-            "pesquisaId": t.get("pesquisaId"),
-            "pesquisaNome": t.get("pesquisaNome"),
-            "dataDeProntoTicket": t.get("dataDeProntoTicket"),
-            "agenteId": t.get("agenteId"),
-            "agenteNome": t.get("agenteNome"),
-            "comentarios": t.get("comentarios"),
-            "avaliacaoMedia": t.get("avaliacaoMedia"),
-            "status": t.get("status"),
-            "pergunta": pergunta,
-            "nota": nota,
-            "usuarioAvaliacaoId": usuarioAvaliacaoId,
-            "usuarioAvaliacaoNome": usuarioAvaliacaoNome,
-            "dataDeAvaliacao": dataDeAvaliacao,
-            "statusPergunta": statusPergunta
-        }
-
-        try:
-            cursor.execute(INSERT_SQL, ticket_data)
-        except mysql.connector.Error as err:
-            logging.error(f"Erro ao inserir avaliação do ticket {t.get('ticketId')}: {err}")
-
-    conn.commit()
-    cursor.close()
-    logging.info(f"{len(tickets)} avaliações inseridas/atualizadas no banco.")
-
-def main(limit_pages=None):
-    logging.info("=== Iniciando sincronização com API Acelerato ===")
-    conn = connect_db()
-    ensure_table_exists(conn)
-
-    tickets = fetch_tickets(limit_pages=limit_pages)
-    if tickets:
-        conn.ping(reconnect=True, attempts=3, delay=2)
-        insert_tickets(conn, tickets)
-    else:
-        logging.warning("Nenhum ticket encontrado para sincronizar.")
-
-    conn.close()
-    logging.info("=== Sincronização concluída ===")
+        metrics.count("paginas")
+        yield current_page, tickets
+
+def fetch_for_tickets(ticket_keys, metrics=NO_METRICS):
+    # Só as avaliações dos chamados alterados, vários tickets em paralelo, entregues em lotes
+    records = iter_ticket_records(partial(fetch_page, metrics=metrics), ticket_keys, FILTRO_TICKET, CAMPO_TICKET,
+                                  key=PRIMARY_KEY, pages_per_ticket=PAGINAS_POR_TICKET)
+    for batch, tickets in records:
+        logging.info(f"Lote {batch} processado com {len(tickets)} avaliações de chamados alterados.")
+        metrics.count("paginas")
+        yield batch, tickets
+
+# Mesma assinatura dos demais scripts (tickets_sync/runner.py); as avaliações não têm dimensões
+def insert_tickets(conn, tickets, hashes=None, sink=None, loader=None, metrics=NO_METRICS, dimensions=None,
+                   writer=None, page=None):
+    with metrics.phase("transform"):
+        rows = SPEC.extract_many(tickets)
+    # O destino colunar recebe todas as linhas; a mesclagem por chave torna a gravação idempotente
+    if sink is not None:
+        with metrics.phase("parquet"):
+            sink.write(rows)
+
+    # Com o índice de hashes, apenas linhas novas ou alteradas seguem para o banco
+    with metrics.phase("transform"):
+        if hashes is not None:
+            rows = hashes.changed_rows(rows)
+        else:
+            rows = [row + (row_hash(row),) for row in rows]
+
+    # Na carga em massa as linhas vão para o arquivo de staging e são mescladas no final
+    if loader is not None:
+        with metrics.phase("write"):
+            loader.write(rows)
+        return rows
+
+    # Na gravação em paralelo as linhas seguem para as threads do PartitionedWriter
+    if writer is not None:
+        with metrics.phase("write"):
+            writer.write(rows, page)
+        return rows
+
+    # Os hashes só entram no índice depois da gravação; as linhas que falharam são reenviadas na próxima execução
+    failed = []
+    with metrics.phase("write"):
+        written = bulk_upsert(conn, SPEC.table, SPEC.write_columns, rows, key=PRIMARY_KEY, metrics=metrics,
+                              failed=failed)
+    if hashes is not None:
+        hashes.confirm(rows, failed=failed)
+    metrics.count("linhas_gravadas", written)
+    logging.info(f"{written} de {len(tickets)} avaliações inseridas/atualizadas no banco.")
+    return rows
+
+def main(limit_pages=None, **options):
+    # Marca d'água, checkpoint, gravação e tabela unificada ficam em tickets_sync/runner.py, comum às três entidades
+    return sync_entity(sys.modules[__name__], limit_pages, **options)
 
 if __name__ == "__main__":
-    # limite de páginas para testes
-    main(limit_pages=30)
\ No newline at end of file
+    setup_logging('logs/feedbacks.log')
+    stats = main(limit_pages=LIMITE_DE_PAGINAS)
+    write_run_report([stats])
\ No newline at end of file
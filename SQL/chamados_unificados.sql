@@ -0,0 +1,18 @@
+SELECT
+		 u."ticketKey" AS "Ticket ID",
+		 u."titulo" AS "Título do Chamado",
+		 u."kanbanStatusdescricao" AS "Status Kanban",
+		 u."agenteNome" AS "Agente Responsável",
+		 u."organizacaonome" AS "Organização",
+		 u."dataDeCriacao" AS "Data de Criação",
+		 u."dataDaUltimaAlteracao" AS "Última Alteração",
+		 /* Feedback*/ u."avaliacaoMedia" AS "Avaliação Média",
+		 u."nota" AS "Nota da Pergunta",
+		 u."pergunta" AS "Pergunta",
+		 u."comentarios" AS "Comentário do Usuário",
+		 u."usuarioAvaliacaoNome" AS "Usuário que Avaliou",
+		 u."dataDeAvaliacao" AS "Data da Avaliação",
+		 LPAD(FLOOR(u."minutosApontados" / 60), 2, '0') || ':' || LPAD(MOD(u."minutosApontados", 60), 2, '0') AS "Tempo Total Apontado (HH:MM)",
+		 u."qtdApontamentos" AS "Qtd. Apontamentos"
+FROM  "chamados_unificados" AS  u
+ORDER BY u."dataDeCriacao" DESC 
@@ -0,0 +1,128 @@
+# Benchmark: REPLACE INTO linha a linha (antigo) vs. bulk_upsert em lotes (novo).
+#
+# Uso:
+#   python benchmarks/bench_bulk_insert.py                  # SQLite em arquivo temporário
+#   python benchmarks/bench_bulk_insert.py --mysql          # MySQL/MariaDB do .env (tabela bench_bulk_insert)
+#   python benchmarks/bench_bulk_insert.py --rows 20000 --batch-size 1000
+#   python benchmarks/bench_bulk_insert.py --latency-ms 1   # simula o round trip de rede no SQLite
+import os
+import sys
+import time
+import argparse
+import sqlite3
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tickets_sync.db import bulk_upsert
+
+TABLE = "bench_bulk_insert"
+COLUMNS = ["ticketKey"] + [f"campo{i}" for i in range(1, 16)]
+
+
+class LatencyCursor:
+    # O SQLite roda no próprio processo e não tem round trip; este wrapper soma
+    # uma latência fixa por comando para aproximar o custo de um servidor remoto.
+    def __init__(self, cursor, latency):
+        self._cursor = cursor
+        self._latency = latency
+
+    def execute(self, sql, params=()):
+        time.sleep(self._latency)
+        return self._cursor.execute(sql, params)
+
+    def close(self):
+        self._cursor.close()
+
+
+class LatencyConnection:
+    def __init__(self, conn, latency):
+        self._conn = conn
+        self._latency = latency
+
+    def cursor(self):
+        return LatencyCursor(self._conn.cursor(), self._latency)
+
+    def commit(self):
+        time.sleep(self._latency)
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+def make_rows(n):
+    return [(i,) + tuple(f"valor {i}-{c}" for c in range(1, len(COLUMNS))) for i in range(1, n + 1)]
+
+
+def connect(use_mysql):
+    if use_mysql:
+        import mysql.connector
+        from dotenv import load_dotenv
+        load_dotenv()
+        conn = mysql.connector.connect(
+            host=os.getenv("DB_HOST"), user=os.getenv("DB_USER"),
+            password=os.getenv("DB_PASSWORD"), database=os.getenv("DB_NAME"),
+        )
+        return conn, "mysql", "%s"
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    return sqlite3.connect(path), "sqlite", "?"
+
+
+def reset_table(conn):
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    cols = ", ".join(f"{c} VARCHAR(100)" for c in COLUMNS[1:])
+    cursor.execute(f"CREATE TABLE {TABLE} (ticketKey INT PRIMARY KEY, {cols})")
+    conn.commit()
+    cursor.close()
+
+
+def run_per_row(conn, rows, placeholder):
+    # Reproduz o comportamento anterior dos scripts: um REPLACE INTO por registro
+    sql = f"REPLACE INTO {TABLE} ({', '.join(COLUMNS)}) VALUES ({', '.join([placeholder] * len(COLUMNS))})"
+    cursor = conn.cursor()
+    for row in rows:
+        cursor.execute(sql, row)
+    conn.commit()
+    cursor.close()
+
+
+def timed(label, func, n):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {n:>8} linhas em {elapsed:8.3f}s  ->  {n / elapsed:12,.0f} linhas/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de escrita linha a linha vs. em lotes")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--mysql", action="store_true", help="usa o MySQL configurado no .env em vez do SQLite")
+    parser.add_argument("--latency-ms", type=float, default=0, help="latência simulada por comando (somente SQLite)")
+    args = parser.parse_args()
+
+    conn, dialect, placeholder = connect(args.mysql)
+    if args.latency_ms and not args.mysql:
+        conn = LatencyConnection(conn, args.latency_ms / 1000)
+    rows = make_rows(args.rows)
+
+    reset_table(conn)
+    before = timed("antes (linha a linha)", lambda: run_per_row(conn, rows, placeholder), len(rows))
+
+    reset_table(conn)
+    after = timed(
+        f"depois (lotes de {args.batch_size})",
+        lambda: bulk_upsert(conn, TABLE, COLUMNS, rows, key="ticketKey", batch_size=args.batch_size, dialect=dialect),
+        len(rows),
+    )
+    print(f"ganho: {before / after:.1f}x")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Benchmark: bulk_upsert em lotes vs. carga em massa (LOAD DATA LOCAL INFILE + staging + mesclagem).
+#
+# Requer o MySQL/MariaDB do .env com local_infile=ON no servidor (não há equivalente no SQLite).
+# Usa uma cópia da tabela de apontamentos (bench_apontamentos_bulk), removida ao final.
+#
+# Uso:
+#   python benchmarks/bench_bulk_load.py
+#   python benchmarks/bench_bulk_load.py --rows 500000 --batch-size 1000
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Apontamentos.apontamentos import SPEC
+from tickets_sync.changes import row_hash
+from tickets_sync.db import bulk_upsert, connect_db
+from tickets_sync.mapping import RecordSpec
+from tickets_sync.staging import StagingLoader
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synthetic import records
+
+BENCH_SPEC = RecordSpec("bench_apontamentos_bulk", SPEC.fields)
+
+
+def reset_table(conn):
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {BENCH_SPEC.table}")
+    cursor.execute(BENCH_SPEC.create_table_sql)
+    conn.commit()
+    cursor.close()
+
+
+def timed(label, func, n):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {n:>8} linhas em {elapsed:8.3f}s  ->  {n / elapsed:12,.0f} linhas/s")
+    return elapsed
+
+
+def run_staging(conn, rows):
+    loader = StagingLoader(conn, BENCH_SPEC)
+    loader.write(rows)
+    loader.merge()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de INSERT em lotes vs. LOAD DATA com staging")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    rows = [row + (row_hash(row),) for row in BENCH_SPEC.extract_many(records("apontamentos", args.rows, tickets=50000))]
+    conn = connect_db(local_infile=True)
+
+    reset_table(conn)
+    before = timed(
+        f"INSERT em lotes de {args.batch_size}",
+        lambda: bulk_upsert(conn, BENCH_SPEC.table, BENCH_SPEC.write_columns, rows, key=BENCH_SPEC.primary_key, batch_size=args.batch_size),
+        len(rows),
+    )
+
+    reset_table(conn)
+    after = timed("LOAD DATA + staging + mesclagem", lambda: run_staging(conn, rows), len(rows))
+    print(f"ganho: {before / after:.1f}x")
+
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {BENCH_SPEC.table}")
+    cursor.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Benchmark: paginação sequencial vs. concorrente contra um servidor HTTP local com latência injetada.
+#
+# Uso:
+#   python benchmarks/bench_concurrent_fetch.py
+#   python benchmarks/bench_concurrent_fetch.py --pages 40 --latency-ms 200 --workers 1 4 8
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tickets_sync.client import AceleratoClient
+from tickets_sync.pagination import iter_pages
+
+
+def make_handler(total_pages, page_size, latency):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            page = int(parse_qs(urlparse(self.path).query).get("page", ["1"])[0])
+            items = []
+            if page <= total_pages:
+                items = [{"ticketKey": (page - 1) * page_size + i} for i in range(page_size)]
+            body = json.dumps(items).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de paginação sequencial vs. concorrente")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.pages, args.page_size, args.latency_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/tickets"
+
+    client = AceleratoClient(email="bench", token="bench", pool_size=max(args.workers))
+
+    def fetch_page(page):
+        return client.get(url, params={"page": page}).json()
+
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        pages = [n for n, _ in iter_pages(fetch_page, workers=workers)]
+        elapsed = time.perf_counter() - start
+        assert pages == list(range(1, args.pages + 1)), "páginas fora de ordem ou faltando"
+        baseline = baseline or elapsed
+        print(f"workers={workers:<3} {len(pages)} páginas em {elapsed:6.2f}s  ({baseline / elapsed:.1f}x)")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Benchmark: decodificação de uma página grande da API + extração das linhas, por decodificador JSON.
+#
+# Compara json (biblioteca padrão) e orjson, que geram dicionários, com msgspec, que
+# decodifica direto nos registros tipados do SPEC. Mede o tempo de decodificação, o de
+# extração das tuplas e a memória ocupada pelos registros da página decodificada.
+# O padrão reproduz a página de feedbacks observada em produção (7.459 avaliações).
+#
+# Uso:
+#   python benchmarks/bench_decode.py
+#   python benchmarks/bench_decode.py --entity chamados --records 5000 --repeat 10
+import os
+import sys
+import time
+import json
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synthetic import page_records
+from tickets_sync.decoding import PageDecoder, available_backends
+
+# Entidade -> (módulo do script, endpoint do gerador sintético, envelope da resposta)
+ENTITIES = {
+    "feedbacks": ("Feedbacks.feedbacks", "feedbacks", None),
+    "chamados": ("chamados.chamados", "tickets", None),
+    "apontamentos": ("Apontamentos.apontamentos", "apontamentos", "content"),
+}
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def retained_bytes(decoder, body):
+    # Memória alocada que continua viva enquanto a página decodificada é mantida
+    tracemalloc.start()
+    records = decoder.decode(body)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos decodificadores JSON das páginas da API")
+    parser.add_argument("--entity", choices=list(ENTITIES), default="feedbacks")
+    parser.add_argument("--records", type=int, default=7459)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    module_name, endpoint, envelope = ENTITIES[args.entity]
+    module = __import__(module_name, fromlist=["SPEC", "DECODER"])
+    items = page_records(endpoint, 1, args.records, args.records)
+    body = json.dumps({envelope: items} if envelope else items, ensure_ascii=False).encode("utf-8")
+    print(f"{args.entity}: {len(items)} registros, {len(body) / 1024 / 1024:.1f} MiB de JSON\n")
+    print(f"{'decodificador':<14}{'decode':>10}{'extração':>10}{'total':>10}{'memória':>12}")
+
+    baseline = None
+    reference_rows = None
+    for backend in available_backends()[::-1]:
+        decoder = PageDecoder(module.SPEC, envelope=module.DECODER.envelope,
+                              envelope_required=module.DECODER.envelope_required, backend=backend)
+        decode_time, records = best_of(lambda: decoder.decode(body), args.repeat)
+        extract_time, rows = best_of(lambda: module.SPEC.extract_many(records), args.repeat)
+        memory = retained_bytes(decoder, body)
+        total = decode_time + extract_time
+        if reference_rows is None:
+            baseline, reference_rows = total, rows
+        # Todos os decodificadores precisam gerar exatamente as mesmas linhas
+        assert rows == reference_rows, f"linhas divergentes com {backend}"
+        print(f"{backend:<14}{decode_time * 1000:>8.1f}ms{extract_time * 1000:>8.1f}ms{total * 1000:>8.1f}ms"
+              f"{memory / 1024 / 1024:>9.1f} MiB  ({baseline / total:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
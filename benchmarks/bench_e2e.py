@@ -0,0 +1,219 @@
+# Benchmark ponta a ponta: API simulada (benchmarks/mock_api.py) -> fetch_tickets -> insert_tickets -> banco local.
+#
+# Com banco, cada entidade roda o main() do próprio script (busca, transformação e
+# gravação sobrepostas, como em produção) em um banco separado (--database, criado
+# se não existir), com as tabelas recriadas a cada execução. Sem banco (--no-db),
+# mede apenas a busca e a transformação. Os resultados podem ser gravados em JSON
+# (--output) para comparar execuções antes e depois de uma mudança.
+#
+# Uso:
+#   python benchmarks/bench_e2e.py --no-db
+#   python benchmarks/bench_e2e.py --tickets 100000 --apontamentos 1000000 --latency-ms 80
+#   python benchmarks/bench_e2e.py --entities apontamentos --error-rate 0.02 --output resultados.json
+#   python benchmarks/bench_e2e.py --bulk        # carga em massa (LOAD DATA LOCAL INFILE)
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import platform
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mock_api import MockAcelerato
+
+# Entidade -> (módulo do script, constante com a URL do endpoint, endpoint simulado)
+ENTITIES = {
+    "chamados": ("chamados.chamados", "API_URL_TICKETS", "tickets"),
+    "apontamentos": ("Apontamentos.apontamentos", "API_URL_APONTAMENTOS", "apontamentos"),
+    "feedbacks": ("Feedbacks.feedbacks", "API_URL_FEEDBACKS", "feedbacks"),
+}
+
+# Tabelas recriadas antes de cada execução
+BENCH_TABLES = ["chamados_unificados"]
+
+
+def configure_env(args):
+    # Lido por tickets_sync.config na importação, por isso é definido antes dela;
+    # o .env não sobrescreve variáveis já definidas
+    os.environ.setdefault("API_EMAIL", "bench")
+    os.environ.setdefault("API_TOKEN", "bench")
+    os.environ["API_BACKOFF_BASE"] = str(args.backoff)
+    os.environ["API_FETCH_WORKERS"] = str(args.workers)
+    os.environ["API_POOL_SIZE"] = str(max(args.workers, 4))
+    os.environ["RUN_REPORT_DIR"] = ""
+    os.environ["PROMETHEUS_TEXTFILE"] = ""
+    os.environ.setdefault("PARQUET_DIR", "")
+    if args.decoder:
+        os.environ["JSON_DECODER"] = args.decoder
+    if args.cache_dir:
+        os.environ["HTTP_CACHE_DIR"] = args.cache_dir
+        os.environ["HTTP_CACHE_TTL"] = str(args.cache_ttl)
+    if not args.no_db:
+        # O motor assíncrono abre as próprias conexões a partir do .env
+        os.environ["DB_NAME"] = args.database
+
+
+def bench_connection(database, local_infile=False):
+    from tickets_sync.db import _db_config
+    import mysql.connector
+
+    config = dict(_db_config(local_infile))
+    config.pop("database", None)
+    conn = mysql.connector.connect(**config)
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS {database}")
+    cursor.close()
+    conn.database = database
+    return conn
+
+
+def reset_entity(conn, module):
+    cursor = conn.cursor()
+    # Com dimensões, o nome da entidade é uma view sobre a tabela de fatos
+    cursor.execute(f"SHOW FULL TABLES LIKE '{module.SPEC.table}'")
+    if any(row[1] == "VIEW" for row in cursor.fetchall()):
+        cursor.execute(f"DROP VIEW {module.SPEC.table}")
+    for table in [module.SPEC.table, module.SPEC.fact_table] + BENCH_TABLES:
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    for table in ("schema_migrations", "sync_state", "sync_checkpoint"):
+        cursor.execute(f"SHOW TABLES LIKE '{table}'")
+        if cursor.fetchall():
+            cursor.execute(f"DELETE FROM {table} WHERE entidade IN (%s, %s)", (module.ENTIDADE, "chamados_unificados"))
+    conn.commit()
+    cursor.close()
+
+
+def run_without_db(module, limit_pages):
+    # Busca + transformação (extrator do SPEC e hash), sem gravar
+    from tickets_sync.changes import row_hash
+    from tickets_sync.telemetry import RunMetrics
+
+    metrics = RunMetrics(module.ENTIDADE)
+    total = 0
+    for _, records in module.fetch_tickets(limit_pages=limit_pages, metrics=metrics):
+        with metrics.phase("transform"):
+            rows = [row + (row_hash(row),) for row in module.SPEC.extract_many(records)]
+        total += len(rows)
+    return {"entidade": module.ENTIDADE, "registros": total, "concluida": True, "telemetria": metrics.snapshot()}
+
+
+def prepare_entity(name, args, mock):
+    # Aponta o script para a API simulada e calcula o limite de páginas do volume gerado
+    module_name, url_constant, endpoint = ENTITIES[name]
+    module = importlib.import_module(module_name)
+    setattr(module, url_constant, mock.url(endpoint))
+    page_size = int(getattr(module, "ITENS_POR_PAGINA", getattr(module, "RESULTADOS_POR_PAGINA", 100)))
+    if args.max_page_size:
+        page_size = min(page_size, args.max_page_size)
+    return module, mock.totals[endpoint] // page_size + 2
+
+
+def run_async_engine(entities, args, mock):
+    # Todas as entidades no mesmo event loop, como em `python -m tickets_sync sync --engine async`
+    from tickets_sync import aio
+
+    jobs = [prepare_entity(name, args, mock) for name in entities]
+    for module, _ in jobs:
+        conn = bench_connection(args.database)
+        reset_entity(conn, module)
+        conn.close()
+    results = aio.run(jobs, full=True)
+    for stats in results:
+        stats["registros_por_s"] = stats["registros"] / stats["segundos"] if stats["segundos"] else 0
+    return results
+
+
+def run_entity(name, args, mock):
+    module, limit_pages = prepare_entity(name, args, mock)
+
+    start = time.perf_counter()
+    if args.no_db:
+        stats = run_without_db(module, limit_pages)
+    else:
+        conn = bench_connection(args.database, local_infile=args.bulk)
+        reset_entity(conn, module)
+        start = time.perf_counter()
+        stats = module.main(limit_pages=limit_pages, full=True, bulk=args.bulk, conn=conn, engine="threads")
+    stats["segundos"] = time.perf_counter() - start
+    stats["registros_por_s"] = stats["registros"] / stats["segundos"] if stats["segundos"] else 0
+    return stats
+
+
+def print_results(results):
+    print(f"\n{'entidade':<14}{'registros':>10}{'tempo':>10}{'reg/s':>12}  fases (s)")
+    for r in results:
+        phases = r.get("telemetria", {}).get("fases_s", {})
+        rendered = "  ".join(f"{k}={v:.2f}" for k, v in phases.items() if v)
+        print(f"{r['entidade']:<14}{r['registros']:>10}{r['segundos']:>9.2f}s{r['registros_por_s']:>12,.0f}  {rendered}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ponta a ponta contra a API simulada")
+    parser.add_argument("--entities", default=",".join(ENTITIES), help="lista separada por vírgulas (padrão: todas)")
+    parser.add_argument("--tickets", type=int, default=10000)
+    parser.add_argument("--apontamentos", type=int, default=50000)
+    parser.add_argument("--feedbacks", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fração das requisições respondidas com 429/503")
+    parser.add_argument("--max-page-size", type=int, help="limita o tamanho de página aceito pela API simulada")
+    parser.add_argument("--workers", type=int, default=4, help="API_FETCH_WORKERS")
+    parser.add_argument("--backoff", type=float, default=0.05, help="API_BACKOFF_BASE em segundos")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--etag", action="store_true", help="API simulada com ETag/Last-Modified e respostas 304")
+    parser.add_argument("--cache-dir", help="ativa o cache HTTP em disco (HTTP_CACHE_DIR)")
+    parser.add_argument("--cache-ttl", type=float, default=0, help="HTTP_CACHE_TTL em segundos")
+    parser.add_argument("--runs", type=int, default=1, help="execuções seguidas (a partir da 2ª, com o cache aquecido)")
+    parser.add_argument("--decoder", choices=["auto", "msgspec", "orjson", "json"], help="JSON_DECODER dos scripts")
+    parser.add_argument("--no-db", action="store_true", help="mede só a busca e a transformação")
+    parser.add_argument("--bulk", action="store_true", help="usa a carga em massa (--bulk) dos scripts")
+    parser.add_argument("--engine", choices=["threads", "async"], default="threads",
+                        help="async roda as entidades juntas no motor assíncrono (requer banco, sem --bulk)")
+    parser.add_argument("--database", default="acelerato_bench", help="banco de benchmark no MySQL do .env")
+    parser.add_argument("--output", help="grava os resultados em JSON")
+    args = parser.parse_args()
+
+    configure_env(args)
+    entities = [e.strip() for e in args.entities.split(",") if e.strip()]
+    unknown = [e for e in entities if e not in ENTITIES]
+    if unknown:
+        raise SystemExit(f"Entidades desconhecidas: {', '.join(unknown)} (opções: {', '.join(ENTITIES)})")
+    if args.engine == "async" and (args.no_db or args.bulk):
+        raise SystemExit("--engine async requer o banco e não suporta --bulk.")
+
+    with MockAcelerato(
+        tickets=args.tickets, apontamentos=args.apontamentos, feedbacks=args.feedbacks,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        max_page_size=args.max_page_size, conditional=args.etag, seed=args.seed,
+    ) as mock:
+        for run in range(1, args.runs + 1):
+            if args.runs > 1:
+                print(f"\n--- Execução {run}/{args.runs} ---")
+            if args.engine == "async":
+                results = run_async_engine(entities, args, mock)
+            else:
+                results = [run_entity(name, args, mock) for name in entities]
+            print_results(results)
+        print(mock.summary())
+        if args.cache_dir and args.engine != "async":
+            from tickets_sync.client import get_client
+            print(get_client().summary())
+
+    if args.output:
+        report = {
+            "gerado_em": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "parametros": vars(args),
+            "resultados": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+        print(f"Resultados gravados em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# Micro-benchmark: montagem manual do dicionário ticket_data (antiga) vs. extrator compilado do SPEC.
+#
+# Uso:
+#   python benchmarks/bench_flatten.py
+#   python benchmarks/bench_flatten.py --records 100000 --repeat 3
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chamados.chamados import COLUMNS, SPEC
+from tickets_sync.mapping import as_datetime
+
+
+def synthetic_ticket(i, rng):
+    def maybe(obj):
+        # Parte dos tickets chega com objetos aninhados nulos
+        return obj if rng.random() > 0.1 else None
+
+    return {
+        "ticketKey": i,
+        "titulo": f"Chamado {i}",
+        "arquivado": rng.random() < 0.1,
+        "lixeira": False,
+        "suspenso": False,
+        "impedido": rng.random() < 0.05,
+        "alvoDeSpam": False,
+        "tempoDeVidaEmDias": rng.randint(0, 400),
+        "tempoCiclicoEmDias": rng.randint(0, 100),
+        "kanbanStatus": maybe({"kanbanStatusKey": rng.randint(1, 8), "descricao": "Em atendimento", "inicio": False, "fim": False, "fila": True}),
+        "organizacao": maybe({"organizacaoKey": rng.randint(1, 300), "nome": "Cliente S.A.", "ativo": True}),
+        "equipeDeAtendimento": maybe({"equipeKey": rng.randint(1, 10), "nome": "Suporte N1"}),
+        "agente": maybe({"usuarioKey": rng.randint(1, 50), "nome": "Agente", "email": "agente@exemplo.com", "ultimoAcessoEm": "2025-10-30T14:05:19"}),
+        "categoria": maybe({"categoriaKey": rng.randint(1, 20), "descricao": "Dúvida"}),
+        "tipoDeTicket": maybe({"tipoDeTicketKey": 1, "descricao": "Incidente"}),
+        "tipoDePrioridade": maybe({"tipoDePrioridadeKey": 2, "descricao": "Alta"}),
+        "dataDeCriacao": "2025-10-01T10:00:00",
+        "dataDaUltimaAlteracao": "2025-10-30T14:05:19",
+        "reporter": maybe({"usuarioKey": rng.randint(1, 5000), "nome": "Usuário", "email": "usuario@cliente.com"}),
+        "origem": "EMAIL",
+        "url": f"https://exemplo.acelerato.com/tickets/{i}",
+    }
+
+
+def legacy_flatten(tickets):
+    # Código anterior de insert_tickets em chamados.py (dicionário + tupla por coluna)
+    rows = []
+    for t in tickets:
+        ticket_data = {
+            "ticketKey": t.get("ticketKey"),
+            "titulo": t.get("titulo"),
+            "arquivado": t.get("arquivado"),
+            "lixeira": t.get("lixeira"),
+            "suspenso": t.get("suspenso"),
+            "impedido": t.get("impedido"),
+            "alvoDeSpam": t.get("alvoDeSpam"),
+            "tempoDeVidaEmDias": t.get("tempoDeVidaEmDias"),
+            "tempoCiclicoEmDias": t.get("tempoCiclicoEmDias"),
+            "kanbanStatusKey": (t.get("kanbanStatus") or {}).get("kanbanStatusKey"),
+            "kanbanStatusdescricao": (t.get("kanbanStatus") or {}).get("descricao"),
+            "kanbanStatusinicio": (t.get("kanbanStatus") or {}).get("inicio"),
+            "kanbanStatusfim": (t.get("kanbanStatus") or {}).get("fim"),
+            "kanbanStatusfila": (t.get("kanbanStatus") or {}).get("fila"),
+            "organizacaoKey": (t.get("organizacao") or {}).get("organizacaoKey"),
+            "organizacaonome": (t.get("organizacao") or {}).get("nome"),
+            "organizacaoativo": (t.get("organizacao") or {}).get("ativo"),
+            "equipeDeAtendimentoequipeKey": (t.get("equipeDeAtendimento") or {}).get("equipeKey"),
+            "equipeDeAtendimentonome": (t.get("equipeDeAtendimento") or {}).get("nome"),
+            "agenteUsuarioKey": (t.get("agente") or {}).get("usuarioKey"),
+            "agenteNome": (t.get("agente") or {}).get("nome"),
+            "agenteEmail": (t.get("agente") or {}).get("email"),
+            "agenteUltimoAcessoEm": as_datetime((t.get("agente") or {}).get("ultimoAcessoEm")),
+            "categoriaKey": (t.get("categoria") or{}).get("categoriaKey"),
+            "categoriadescricao": (t.get("categoria") or{}).get("descricao"),
+            "tipoDeTicketKey": (t.get("tipoDeTicket") or{}).get("tipoDeTicketKey"),
+            "tipoDeTicketDescricao": (t.get("tipoDeTicket") or{}).get("descricao"),
+            "tipoDePrioridadeKey": (t.get("tipoDePrioridade") or {}).get("tipoDePrioridadeKey"),
+            "tipoDePrioridadeDescricao": (t.get("tipoDePrioridade") or {}).get("descricao"),
+            "dataDeCriacao": as_datetime(t.get("dataDeCriacao")),
+            "dataDaUltimaAlteracao": as_datetime(t.get("dataDaUltimaAlteracao")),
+            "reporterUsuarioKey": (t.get("reporter") or {}).get("usuarioKey"),
+            "reporterNome": (t.get("reporter") or {}).get("nome"),
+            "reporterEmail": (t.get("reporter") or {}).get("email"),
+            "origem": t.get("origem"),
+            "url": t.get("url"),
+        }
+        rows.append(tuple(ticket_data[c] for c in COLUMNS))
+    return rows
+
+
+def best_of(func, tickets, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(tickets)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do achatamento de registros")
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    tickets = [synthetic_ticket(i, rng) for i in range(1, args.records + 1)]
+    assert legacy_flatten(tickets[:1000]) == SPEC.extract_many(tickets[:1000]), "extratores divergem"
+
+    before = best_of(legacy_flatten, tickets, args.repeat)
+    after = best_of(SPEC.extract_many, tickets, args.repeat)
+    for label, elapsed in (("antes (dicionário)", before), ("depois (SPEC compilado)", after)):
+        print(f"{label:<26} {args.records} registros em {elapsed:6.3f}s  ->  {args.records / elapsed:12,.0f} registros/s")
+    print(f"ganho: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
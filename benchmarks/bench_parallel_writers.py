@@ -0,0 +1,134 @@
+# Benchmark: gravação com uma conexão (antes) vs. PartitionedWriter com N conexões (depois).
+#
+# Uso:
+#   python benchmarks/bench_parallel_writers.py                      # SQLite com 1 ms por comando e 50 µs por linha
+#   python benchmarks/bench_parallel_writers.py --workers 1,2,4,8 --pages 100
+#   python benchmarks/bench_parallel_writers.py --mysql              # MySQL/MariaDB do .env (tabela bench_bulk_insert)
+#
+# O SQLite trava o arquivo inteiro durante a escrita, enquanto o InnoDB trava só as
+# linhas. Para reproduzir isso com partições disjuntas, cada conexão do SQLite grava
+# em um arquivo próprio; a conferência soma as linhas de todos os arquivos. Além do
+# round trip, o servidor gasta tempo por linha (índices, redo log): é esse trabalho
+# que as conexões em paralelo sobrepõem, e que --row-cost-us simula.
+import os
+import sys
+import time
+import argparse
+import sqlite3
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_bulk_insert import COLUMNS, TABLE, LatencyConnection, LatencyCursor, connect, make_rows, reset_table
+from tickets_sync.db import bulk_upsert
+from tickets_sync.writers import PartitionedWriter
+
+
+class ServerCostCursor(LatencyCursor):
+    def __init__(self, cursor, latency, row_cost):
+        super().__init__(cursor, latency)
+        self._row_cost = row_cost
+
+    def execute(self, sql, params=()):
+        time.sleep(self._row_cost * len(params) / len(COLUMNS))
+        return super().execute(sql, params)
+
+
+class ServerCostConnection(LatencyConnection):
+    def __init__(self, conn, latency, row_cost):
+        super().__init__(conn, latency)
+        self._row_cost = row_cost
+
+    def cursor(self):
+        return ServerCostCursor(self._conn.cursor(), self._latency, self._row_cost)
+
+
+class SqliteFiles:
+    """Abre uma conexão por arquivo, com a tabela do benchmark já criada."""
+
+    def __init__(self, latency, row_cost):
+        self.latency = latency
+        self.row_cost = row_cost
+        self.directory = tempfile.mkdtemp()
+        self.paths = []
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            path = os.path.join(self.directory, f"bench{len(self.paths)}.db")
+            self.paths.append(path)
+        # A conexão é aberta aqui e usada pela thread do PartitionedWriter
+        conn = sqlite3.connect(path, check_same_thread=False)
+        reset_table(conn)
+        return ServerCostConnection(conn, self.latency, self.row_cost)
+
+    def count(self):
+        total = 0
+        for path in self.paths:
+            conn = sqlite3.connect(path)
+            total += conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+            conn.close()
+        return total
+
+
+def pages_of(rows, size):
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+
+def run_single(connect_one, pages, dialect):
+    conn = connect_one()
+    for page in pages:
+        bulk_upsert(conn, TABLE, COLUMNS, page, key="ticketKey", dialect=dialect)
+    conn.close()
+
+
+def run_partitioned(connect_one, pages, dialect, workers):
+    writer = PartitionedWriter(TABLE, COLUMNS, "ticketKey", workers=workers, connect=connect_one, dialect=dialect)
+    for number, page in enumerate(pages, 1):
+        writer.write(page, number)
+    return writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de gravação com uma conexão vs. conexões particionadas")
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--workers", default="2,4,8", help="quantidades de conexões, separadas por vírgulas")
+    parser.add_argument("--mysql", action="store_true", help="usa o MySQL configurado no .env em vez do SQLite")
+    parser.add_argument("--latency-ms", type=float, default=1, help="latência simulada por comando (somente SQLite)")
+    parser.add_argument("--row-cost-us", type=float, default=50, help="tempo simulado do servidor por linha (somente SQLite)")
+    args = parser.parse_args()
+
+    rows = make_rows(args.pages * args.page_size)
+    pages = pages_of(rows, args.page_size)
+
+    def setup():
+        # Cada rodada começa com a tabela vazia
+        if args.mysql:
+            conn, _, _ = connect(True)
+            reset_table(conn)
+            conn.close()
+            return (lambda: connect(True)[0]), "mysql", None
+        files = SqliteFiles(args.latency_ms / 1000, args.row_cost_us / 1e6)
+        return files, "sqlite", files
+
+    connect_one, dialect, files = setup()
+    start = time.perf_counter()
+    run_single(connect_one, pages, dialect)
+    before = time.perf_counter() - start
+    print(f"{'antes (1 conexão)':<28} {len(rows):>8} linhas em {before:8.3f}s  ->  {len(rows) / before:12,.0f} linhas/s")
+
+    for workers in (int(w) for w in args.workers.split(",")):
+        connect_one, dialect, files = setup()
+        start = time.perf_counter()
+        written = run_partitioned(connect_one, pages, dialect, workers)
+        elapsed = time.perf_counter() - start
+        stored = files.count() if files else written
+        print(
+            f"{f'depois ({workers} conexões)':<28} {len(rows):>8} linhas em {elapsed:8.3f}s  ->  "
+            f"{len(rows) / elapsed:12,.0f} linhas/s  ganho: {before / elapsed:4.1f}x  gravadas: {stored}"
+        )
+
+
+if __name__ == "__main__":
+    main()
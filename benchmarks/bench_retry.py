@@ -0,0 +1,94 @@
+# Verificação do cliente contra um servidor local que injeta respostas 429 (com Retry-After) e 503.
+#
+# Uso:
+#   python benchmarks/bench_retry.py
+#   python benchmarks/bench_retry.py --pages 30 --error-rate 0.4 --rate-limit 20 --workers 4
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tickets_sync.client import AceleratoClient
+from tickets_sync.pagination import iter_pages
+
+
+def make_handler(total_pages, error_rate, seed):
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    injected = {"429": 0, "503": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            page = int(parse_qs(urlparse(self.path).query).get("page", ["1"])[0])
+            with lock:
+                failure = rng.random() < error_rate
+                status = rng.choice(["429", "503"]) if failure else None
+                if status:
+                    injected[status] += 1
+            if status == "429":
+                self.send_response(429)
+                self.send_header("Retry-After", "0.2")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if status == "503":
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            items = [{"ticketKey": page * 1000 + i} for i in range(50)] if page <= total_pages else []
+            body = json.dumps(items).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler, injected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retries e limitação de taxa contra um servidor com falhas injetadas")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.3)
+    parser.add_argument("--rate-limit", type=float, default=0, help="requisições/s (0 = sem limite)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    handler, injected = make_handler(args.pages, args.error_rate, args.seed)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/tickets"
+
+    client = AceleratoClient(email="bench", token="bench", max_retries=8, rate_limit=args.rate_limit, rate_burst=args.workers)
+
+    def fetch_page(page):
+        response = client.get(url, params={"page": page})
+        return response.json() if response.status_code == 200 else None
+
+    start = time.perf_counter()
+    pages = [n for n, _ in iter_pages(fetch_page, workers=args.workers, key="ticketKey")]
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    assert pages == list(range(1, args.pages + 1)), f"páginas faltando: {pages}"
+    print(f"{len(pages)} páginas completas em {elapsed:.2f}s")
+    print(f"falhas injetadas: {injected['429']}x 429, {injected['503']}x 503")
+    print(client.summary())
+    if args.rate_limit:
+        print(f"taxa efetiva: {client.requests / elapsed:.1f} req/s (limite {args.rate_limit})")
+
+
+if __name__ == "__main__":
+    main()
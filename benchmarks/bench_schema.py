@@ -0,0 +1,207 @@
+# Benchmark: esquema antigo (datas e duração em texto, sem índice em apontamentos.ticketKey)
+# vs. esquema migrado (DATE/DATETIME, minutos inteiros e índices secundários).
+#
+# Mostra o plano (EXPLAIN) e o tempo de duas consultas do BI em cada esquema:
+#   - agregação completa de bases_unify.sql (minutos e quantidade de apontamentos por chamado);
+#   - consultas pontuais por ticket, como as da atualização incremental de chamados_unificados.
+#
+# Uso:
+#   python benchmarks/bench_schema.py                     # SQLite em arquivo temporário
+#   python benchmarks/bench_schema.py --mysql             # MySQL/MariaDB do .env (tabelas bench_*)
+#   python benchmarks/bench_schema.py --tickets 50000 --apontamentos-por-ticket 8
+import os
+import sys
+import time
+import random
+import argparse
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tickets_sync.db import bulk_upsert
+from tickets_sync.mapping import as_date, as_datetime, as_minutes
+
+CHAMADOS = "bench_chamados"
+APONTAMENTOS = "bench_apontamentos"
+
+# Minutos calculados a partir do texto "HH:MM", como na consulta original
+TEXT_MINUTES_SQL = "CAST(SUBSTR(a.quantidadeFormatada, 1, 2) AS DECIMAL) * 60 + CAST(SUBSTR(a.quantidadeFormatada, 4, 2) AS DECIMAL)"
+
+BEFORE_AGGREGATE_SQL = f"""
+SELECT c.ticketKey, SUM({TEXT_MINUTES_SQL}), COUNT(DISTINCT a.apontamentoKey)
+FROM {CHAMADOS} AS c
+LEFT JOIN {APONTAMENTOS} AS a ON a.ticketKey = c.ticketKey
+WHERE c.arquivado = 0 AND c.lixeira = 0 AND a.dataDoLancamento >= '2025-06-01'
+GROUP BY c.ticketKey
+"""
+
+AFTER_AGGREGATE_SQL = f"""
+SELECT c.ticketKey, SUM(a.minutos), COUNT(DISTINCT a.apontamentoKey)
+FROM {CHAMADOS} AS c
+LEFT JOIN {APONTAMENTOS} AS a ON a.ticketKey = c.ticketKey
+WHERE c.arquivado = 0 AND c.lixeira = 0 AND a.dataDoLancamento >= '2025-06-01'
+GROUP BY c.ticketKey
+"""
+
+BEFORE_LOOKUP_SQL = f"SELECT SUM({TEXT_MINUTES_SQL}), COUNT(*) FROM {APONTAMENTOS} AS a WHERE a.ticketKey = {{p}}"
+AFTER_LOOKUP_SQL = f"SELECT SUM(a.minutos), COUNT(*) FROM {APONTAMENTOS} AS a WHERE a.ticketKey = {{p}}"
+
+
+def connect(use_mysql):
+    if use_mysql:
+        import mysql.connector
+        from dotenv import load_dotenv
+        load_dotenv()
+        conn = mysql.connector.connect(
+            host=os.getenv("DB_HOST"), user=os.getenv("DB_USER"),
+            password=os.getenv("DB_PASSWORD"), database=os.getenv("DB_NAME"),
+        )
+        return conn, "mysql", "%s"
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    return sqlite3.connect(path), "sqlite", "?"
+
+
+def make_data(tickets, per_ticket, seed=42):
+    rng = random.Random(seed)
+    start = datetime(2025, 4, 1)
+    chamados = [(k, rng.random() < 0.1, rng.random() < 0.05) for k in range(1, tickets + 1)]
+    apontamentos = []
+    key = 0
+    for ticket in range(1, tickets + 1):
+        for _ in range(rng.randint(0, per_ticket * 2)):
+            key += 1
+            when = start + timedelta(minutes=rng.randint(0, 300 * 24 * 60))
+            duration = f"{rng.randint(0, 12):02d}:{rng.randint(0, 59):02d}"
+            apontamentos.append((f"uuid-{key}", key, ticket, when.strftime("%Y-%m-%dT%H:%M:%S.000-03:00"), duration))
+    return chamados, apontamentos
+
+
+def execute(conn, *statements):
+    cursor = conn.cursor()
+    for sql in statements:
+        cursor.execute(sql)
+    conn.commit()
+    cursor.close()
+
+
+def load_before(conn, dialect, chamados, apontamentos):
+    execute(
+        conn,
+        f"DROP TABLE IF EXISTS {APONTAMENTOS}",
+        f"DROP TABLE IF EXISTS {CHAMADOS}",
+        f"CREATE TABLE {CHAMADOS} (ticketKey INT PRIMARY KEY, arquivado BOOLEAN, lixeira BOOLEAN)",
+        f"CREATE TABLE {APONTAMENTOS} (requestUUID VARCHAR(100) PRIMARY KEY, apontamentoKey INT, ticketKey INT, "
+        f"dataDoLancamento VARCHAR(50), quantidadeFormatada VARCHAR(20))",
+    )
+    bulk_upsert(conn, CHAMADOS, ["ticketKey", "arquivado", "lixeira"], chamados, key="ticketKey", dialect=dialect)
+    bulk_upsert(
+        conn, APONTAMENTOS, ["requestUUID", "apontamentoKey", "ticketKey", "dataDoLancamento", "quantidadeFormatada"],
+        apontamentos, key="requestUUID", dialect=dialect,
+    )
+
+
+def load_after(conn, dialect, chamados, apontamentos):
+    # Mesmo esquema das migrações: datas nativas, minutos parseados na carga e índices secundários
+    execute(
+        conn,
+        f"DROP TABLE IF EXISTS {APONTAMENTOS}",
+        f"DROP TABLE IF EXISTS {CHAMADOS}",
+        f"CREATE TABLE {CHAMADOS} (ticketKey INT PRIMARY KEY, arquivado BOOLEAN, lixeira BOOLEAN)",
+        f"CREATE TABLE {APONTAMENTOS} (requestUUID VARCHAR(100) PRIMARY KEY, apontamentoKey INT, ticketKey INT, "
+        f"dataDeCriacao DATETIME, dataDoLancamento DATE, quantidadeFormatada VARCHAR(20), minutos INT)",
+        f"CREATE INDEX idx_{CHAMADOS}_ativos ON {CHAMADOS} (arquivado, lixeira)",
+        f"CREATE INDEX idx_{APONTAMENTOS}_ticketKey ON {APONTAMENTOS} (ticketKey)",
+        f"CREATE INDEX idx_{APONTAMENTOS}_lancamento ON {APONTAMENTOS} (dataDoLancamento)",
+    )
+    rows = [
+        (uuid, key, ticket, as_datetime(when), as_date(when), duration, as_minutes(duration))
+        for uuid, key, ticket, when, duration in apontamentos
+    ]
+    if dialect == "sqlite":
+        # O sqlite3 grava date/datetime como texto ISO, comparável com '2025-06-01'
+        rows = [r[:3] + (r[3].isoformat(" "), r[4].isoformat()) + r[5:] for r in rows]
+    bulk_upsert(conn, CHAMADOS, ["ticketKey", "arquivado", "lixeira"], chamados, key="ticketKey", dialect=dialect)
+    bulk_upsert(
+        conn, APONTAMENTOS,
+        ["requestUUID", "apontamentoKey", "ticketKey", "dataDeCriacao", "dataDoLancamento", "quantidadeFormatada", "minutos"],
+        rows, key="requestUUID", dialect=dialect,
+    )
+    execute(conn, f"ANALYZE TABLE {APONTAMENTOS}" if dialect == "mysql" else "ANALYZE")
+
+
+def explain(conn, dialect, sql):
+    cursor = conn.cursor()
+    cursor.execute(("EXPLAIN " if dialect == "mysql" else "EXPLAIN QUERY PLAN ") + sql)
+    plan = cursor.fetchall()
+    cursor.close()
+    for row in plan:
+        print("    " + " | ".join("" if v is None else str(v) for v in row))
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_aggregate(conn, sql):
+    cursor = conn.cursor()
+    cursor.execute(sql)
+    cursor.fetchall()
+    cursor.close()
+
+
+def run_lookups(conn, sql, keys):
+    cursor = conn.cursor()
+    for key in keys:
+        cursor.execute(sql, (key,))
+        cursor.fetchall()
+    cursor.close()
+
+
+def measure(label, conn, dialect, placeholder, aggregate_sql, lookup_sql, keys, repeat):
+    print(f"\n== {label} ==")
+    print("  EXPLAIN agregação:")
+    explain(conn, dialect, aggregate_sql)
+    print("  EXPLAIN consulta por ticket:")
+    explain(conn, dialect, lookup_sql.format(p=keys[0]))
+    aggregate = best_of(lambda: run_aggregate(conn, aggregate_sql), repeat)
+    lookups = best_of(lambda: run_lookups(conn, lookup_sql.format(p=placeholder), keys), repeat)
+    print(f"  agregação completa:          {aggregate:8.3f}s")
+    print(f"  {len(keys)} consultas por ticket:  {lookups:8.3f}s")
+    return aggregate, lookups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do esquema antigo vs. esquema migrado")
+    parser.add_argument("--tickets", type=int, default=20000)
+    parser.add_argument("--apontamentos-por-ticket", type=int, default=5)
+    parser.add_argument("--lookups", type=int, default=500, help="consultas pontuais por ticket")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mysql", action="store_true", help="usa o MySQL configurado no .env em vez do SQLite")
+    args = parser.parse_args()
+
+    conn, dialect, placeholder = connect(args.mysql)
+    chamados, apontamentos = make_data(args.tickets, args.apontamentos_por_ticket)
+    keys = random.Random(7).sample(range(1, args.tickets + 1), min(args.lookups, args.tickets))
+    print(f"{len(chamados)} chamados, {len(apontamentos)} apontamentos ({dialect})")
+
+    load_before(conn, dialect, chamados, apontamentos)
+    before = measure("antes (texto, sem índices)", conn, dialect, placeholder, BEFORE_AGGREGATE_SQL, BEFORE_LOOKUP_SQL, keys, args.repeat)
+
+    load_after(conn, dialect, chamados, apontamentos)
+    after = measure("depois (tipos nativos, minutos, índices)", conn, dialect, placeholder, AFTER_AGGREGATE_SQL, AFTER_LOOKUP_SQL, keys, args.repeat)
+
+    print(f"\nganho na agregação: {before[0] / after[0]:.1f}x")
+    print(f"ganho nas consultas por ticket: {before[1] / after[1]:.1f}x")
+    execute(conn, f"DROP TABLE IF EXISTS {APONTAMENTOS}", f"DROP TABLE IF EXISTS {CHAMADOS}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
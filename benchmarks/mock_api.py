@@ -0,0 +1,246 @@
+# Servidor HTTP local que imita os endpoints de tickets, apontamentos e feedbacks da API Acelerato.
+#
+# Os registros vêm de benchmarks/synthetic.py e são gerados sob demanda, página a
+# página. Latência, jitter, tamanho máximo de página e taxa de erros (429/503) são
+# configuráveis, assim como a compressão gzip e as requisições condicionais
+# (ETag/Last-Modified com resposta 304, para testar o cache HTTP). Os filtros por
+# ticket da atualização dirigida (`ticketKey` nos apontamentos, `ticketId` nos
+# feedbacks) também são atendidos.
+#
+# Uso standalone (aponte as URLs do .env para o servidor):
+#   python benchmarks/mock_api.py --port 8080 --tickets 100000 --apontamentos 500000 --latency-ms 120
+#   API_URL_TICKETS=http://127.0.0.1:8080/tickets
+#   API_URL_APONTAMENTOS=http://127.0.0.1:8080/apontamentos
+#   API_URL_FEEDBACKS=http://127.0.0.1:8080/feedbacks
+import os
+import sys
+import gzip
+import json
+import hashlib
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synthetic import page_records
+
+# Parâmetros de paginação de cada endpoint: (página, tamanho, tamanho padrão)
+PAGING = {
+    "tickets": ("page", "size", 100),
+    "apontamentos": ("pagina", "resultadosPorPagina", 50),
+}
+
+# Filtro por ticket de cada endpoint e campo do registro com o ticket
+TICKET_FILTERS = {
+    "apontamentos": ("ticketKey", "ticketKey"),
+    "feedbacks": ("ticketId", "ticketId"),
+}
+
+LAST_MODIFIED = "Wed, 01 Oct 2025 12:00:00 GMT"
+
+
+class MockAcelerato:
+    """API Acelerato simulada em uma thread; use start()/stop() ou como context manager."""
+
+    def __init__(self, tickets=10000, apontamentos=50000, feedbacks=2000, latency_ms=50, jitter_ms=0,
+                 error_rate=0.0, max_page_size=None, gzip_enabled=True, conditional=False, seed=42,
+                 host="127.0.0.1", port=0):
+        self.totals = {"tickets": tickets, "apontamentos": apontamentos, "feedbacks": feedbacks}
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.max_page_size = max_page_size
+        self.gzip_enabled = gzip_enabled
+        self.conditional = conditional
+        self.seed = seed
+        self.host = host
+        self.port = port
+
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._feedbacks_body = None
+        self._by_ticket = {}
+        self._server = None
+
+    # --- Respostas ---
+    def _draw(self):
+        # Sorteia latência e erro sob o mesmo lock (random.Random não é thread-safe)
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0)
+            error = self._rng.random() < self.error_rate
+            status = self._rng.choice((429, 503)) if error else 200
+            if error:
+                self.errors += 1
+        return delay, status
+
+    def ticket_records(self, entity, ticket):
+        # Índice ticket -> registros, montado na primeira consulta filtrada com o tamanho de página padrão
+        with self._lock:
+            if entity not in self._by_ticket:
+                _, _, size = PAGING.get(entity, (None, None, self.totals[entity]))
+                index = {}
+                for page in range(1, self.totals[entity] // size + 2):
+                    for item in page_records(entity, page, size, self.totals[entity], self.seed, tickets=self.totals["tickets"]):
+                        index.setdefault(str(item[TICKET_FILTERS[entity][1]]), []).append(item)
+                self._by_ticket[entity] = index
+        return self._by_ticket[entity].get(ticket, [])
+
+    def payload(self, entity, query):
+        param = TICKET_FILTERS.get(entity, (None,))[0]
+        if param in query:
+            items = self.ticket_records(entity, query[param][0])
+            if entity == "feedbacks":
+                return json.dumps(items, ensure_ascii=False).encode("utf-8")
+            page_param, size_param, default_size = PAGING[entity]
+            page = int(query.get(page_param, ["1"])[0])
+            size = int(query.get(size_param, [str(default_size)])[0])
+            body = {"content": items[(page - 1) * size:page * size], "totalElements": len(items), "number": page}
+            return json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+        if entity == "feedbacks":
+            # O endpoint real ignora page/size e devolve sempre o conjunto completo
+            if self._feedbacks_body is None:
+                items = page_records("feedbacks", 1, self.totals["feedbacks"], self.totals["feedbacks"], self.seed)
+                self._feedbacks_body = json.dumps(items, ensure_ascii=False).encode("utf-8")
+            return self._feedbacks_body
+
+        page_param, size_param, default_size = PAGING[entity]
+        page = int(query.get(page_param, ["1"])[0])
+        size = int(query.get(size_param, [str(default_size)])[0])
+        if self.max_page_size:
+            size = min(size, self.max_page_size)
+        items = page_records(entity, page, size, self.totals[entity], self.seed, tickets=self.totals["tickets"])
+        if entity == "apontamentos":
+            body = {"content": items, "totalElements": self.totals[entity], "number": page}
+        else:
+            body = items
+        return json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                entity = url.path.strip("/").split("/")[-1]
+                if entity not in mock.totals:
+                    self._send(404, b'{"erro": "endpoint desconhecido"}')
+                    return
+                delay, status = mock._draw()
+                time.sleep(delay)
+                if status != 200:
+                    headers = {"Retry-After": "0"} if status == 429 else {}
+                    self._send(status, b'{"erro": "falha simulada"}', headers)
+                    return
+                body = mock.payload(entity, parse_qs(url.query))
+                if not mock.conditional:
+                    self._send(200, body)
+                    return
+                # Os dados sintéticos não mudam: o ETag depende só do conteúdo
+                validators = {"ETag": '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest(),
+                              "Last-Modified": LAST_MODIFIED}
+                if self.headers.get("If-None-Match") == validators["ETag"]:
+                    with mock._lock:
+                        mock.not_modified += 1
+                    self._send(304, b"", validators)
+                    return
+                self._send(200, body, validators)
+
+            def _send(self, status, body, headers=None):
+                extra = dict(headers or {})
+                if body and mock.gzip_enabled and "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body, compresslevel=1)
+                    extra["Content-Encoding"] = "gzip"
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in extra.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # O cliente desistiu da resposta (ex.: páginas canceladas no fim da paginação)
+                    return
+                with mock._lock:
+                    mock.bytes_sent += len(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    # --- Ciclo de vida ---
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_port
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def url(self, entity):
+        return f"http://{self.host}:{self.port}/{entity}"
+
+    def summary(self):
+        return (
+            f"{self.requests} requisições ({self.errors} com erro simulado, {self.not_modified} respondidas com 304), "
+            f"{self.bytes_sent / 1024 / 1024:.1f} MiB enviados"
+        )
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API Acelerato simulada para benchmarks locais")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--tickets", type=int, default=10000)
+    parser.add_argument("--apontamentos", type=int, default=50000)
+    parser.add_argument("--feedbacks", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fração das requisições respondidas com 429/503")
+    parser.add_argument("--max-page-size", type=int, help="limita o tamanho de página pedido pelo cliente")
+    parser.add_argument("--no-gzip", action="store_true")
+    parser.add_argument("--etag", action="store_true", help="responde com ETag/Last-Modified e 304 às requisições condicionais")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    mock = MockAcelerato(
+        tickets=args.tickets, apontamentos=args.apontamentos, feedbacks=args.feedbacks,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        max_page_size=args.max_page_size, gzip_enabled=not args.no_gzip, conditional=args.etag, seed=args.seed,
+        host=args.host, port=args.port,
+    ).start()
+    for entity in mock.totals:
+        print(f"{entity:<13} {mock.url(entity)}")
+    try:
+        while True:
+            time.sleep(60)
+            print(mock.summary())
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# Gerador de registros sintéticos com o formato das respostas da API Acelerato.
+#
+# Os registros são determinísticos: a mesma semente, entidade e página geram
+# sempre os mesmos dados, o que permite gerar de 10 mil a 1 milhão de registros
+# sob demanda, página a página, sem mantê-los em memória.
+#
+# Uso direto (amostra em JSON):
+#   python benchmarks/synthetic.py tickets --count 3
+#   python benchmarks/synthetic.py apontamentos --count 3 --tickets 10000
+import sys
+import json
+import random
+import argparse
+from datetime import datetime, timedelta
+
+START = datetime(2025, 4, 1, 8, 0, 0)
+SPAN_MINUTES = 300 * 24 * 60
+
+KANBAN_STATUS = [
+    (1, "Novo", True, False, True), (2, "Em triagem", False, False, True),
+    (3, "Em atendimento", False, False, False), (4, "Aguardando cliente", False, False, False),
+    (5, "Em desenvolvimento", False, False, False), (6, "Homologação", False, False, False),
+    (7, "Resolvido", False, True, False), (8, "Fechado", False, True, False),
+]
+CATEGORIAS = ["Dúvida", "Incidente", "Melhoria", "Configuração", "Integração", "Relatórios"]
+TIPOS_DE_TICKET = ["Incidente", "Requisição", "Problema", "Mudança"]
+PRIORIDADES = ["Baixa", "Média", "Alta", "Urgente"]
+EQUIPES = ["Suporte N1", "Suporte N2", "Desenvolvimento", "Implantação"]
+ORIGENS = ["EMAIL", "PORTAL", "TELEFONE", "CHAT"]
+ATIVIDADES = [
+    "Análise do chamado e reprodução do erro",
+    "Atendimento remoto\tverificação de logs\nretorno ao cliente",
+    "Reunião de alinhamento com o cliente",
+    "Correção aplicada em homologação",
+    "Documentação da solução na base de conhecimento",
+]
+PERGUNTAS = [
+    "Como você avalia o atendimento recebido?",
+    "O problema foi resolvido?",
+    "Qual a probabilidade de recomendar nosso suporte?",
+]
+COMENTARIOS = ["", "Ótimo atendimento!", "Demorou mais do que o esperado.", "Resolvido rapidamente, obrigado.", None]
+
+
+def _iso(moment):
+    # Mesmo formato da API: milissegundos e fuso de Brasília
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.000-03:00")
+
+
+def _moment(rng):
+    return START + timedelta(minutes=rng.randint(0, SPAN_MINUTES))
+
+
+def _maybe(rng, obj, null_rate=0.05):
+    # Parte dos registros chega com objetos aninhados nulos
+    return obj if rng.random() >= null_rate else None
+
+
+def _person(rng, key_range, prefix):
+    key = rng.randint(1, key_range)
+    return key, f"{prefix} {key}", f"{prefix.lower()}{key}@exemplo.com"
+
+
+def ticket(i, rng):
+    created = _moment(rng)
+    changed = created + timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+    status = rng.choice(KANBAN_STATUS)
+    agente_key, agente_nome, agente_email = _person(rng, 80, "Agente")
+    reporter_key, reporter_nome, reporter_email = _person(rng, 20000, "Usuario")
+    organizacao = rng.randint(1, 300)
+    # Como na API, cada chave traz sempre a mesma descrição (ver tickets_sync/dimensions.py)
+    equipe = rng.randint(1, len(EQUIPES))
+    categoria = rng.randint(1, len(CATEGORIAS))
+    tipo = rng.randint(1, len(TIPOS_DE_TICKET))
+    prioridade = rng.randint(1, len(PRIORIDADES))
+    return {
+        "ticketKey": i,
+        "titulo": f"Chamado {i}: {rng.choice(CATEGORIAS).lower()} no módulo {rng.randint(1, 40)}",
+        "arquivado": rng.random() < 0.08,
+        "lixeira": rng.random() < 0.02,
+        "suspenso": rng.random() < 0.03,
+        "impedido": rng.random() < 0.05,
+        "alvoDeSpam": rng.random() < 0.01,
+        "tempoDeVidaEmDias": (changed - created).days,
+        "tempoCiclicoEmDias": rng.randint(0, 30),
+        "kanbanStatus": _maybe(rng, {
+            "kanbanStatusKey": status[0], "descricao": status[1], "inicio": status[2], "fim": status[3], "fila": status[4],
+        }),
+        "organizacao": _maybe(rng, {"organizacaoKey": organizacao, "nome": f"Cliente {organizacao} S.A.", "ativo": organizacao % 20 != 0}),
+        "equipeDeAtendimento": _maybe(rng, {"equipeKey": equipe, "nome": EQUIPES[equipe - 1]}),
+        "agente": _maybe(rng, {"usuarioKey": agente_key, "nome": agente_nome, "email": agente_email,
+                               "ultimoAcessoEm": _iso(START + timedelta(hours=agente_key))}, null_rate=0.1),
+        "categoria": _maybe(rng, {"categoriaKey": categoria, "descricao": CATEGORIAS[categoria - 1]}),
+        "tipoDeTicket": _maybe(rng, {"tipoDeTicketKey": tipo, "descricao": TIPOS_DE_TICKET[tipo - 1]}),
+        "tipoDePrioridade": _maybe(rng, {"tipoDePrioridadeKey": prioridade, "descricao": PRIORIDADES[prioridade - 1]}),
+        "dataDeCriacao": _iso(created),
+        "dataDaUltimaAlteracao": _iso(changed),
+        "reporter": _maybe(rng, {"usuarioKey": reporter_key, "nome": reporter_nome, "email": reporter_email}),
+        "origem": rng.choice(ORIGENS),
+        "url": f"https://exemplo.acelerato.com/tickets/{i}",
+        "links": [{"rel": "self", "href": f"https://exemplo.acelerato.com/api/tickets/{i}"}],
+    }
+
+
+def apontamento(i, rng, tickets=10000):
+    when = _moment(rng)
+    minutes = rng.randint(5, 8 * 60)
+    valor = round(rng.uniform(80, 250), 2)
+    usuario = rng.randint(1, 80)
+    organizacao = rng.randint(1, 300)
+    return {
+        "requestUUID": f"{i:08x}-{rng.getrandbits(16):04x}-4{rng.getrandbits(12):03x}-a{rng.getrandbits(12):03x}-{rng.getrandbits(48):012x}",
+        "apontamentoKey": i,
+        "ticketKey": rng.randint(1, tickets),
+        "organizacaoDoTicketKey": organizacao,
+        "organizacaoDoTicketNome": f"Cliente {organizacao} S.A.",
+        "usuarioKey": usuario,
+        "usuarioNomeAbreviado": f"Agente {usuario}",
+        "descricao": rng.choice(ATIVIDADES),
+        "dataDeCriacao": _iso(when),
+        "dataDeAlteracao": _iso(when + timedelta(minutes=rng.randint(0, 120))),
+        "dataDoLancamentoFormatada": when.strftime("%d/%m/%Y"),
+        "dataDoLancamento": when.strftime("%Y-%m-%d"),
+        "horaDoLancamento": when.strftime("%H:%M"),
+        "quantidade": round(minutes / 60, 2),
+        "quantidadeFormatada": f"{minutes // 60:02d}:{minutes % 60:02d}",
+        "valorPorQuantidade": valor,
+        "bonificado": rng.random() < 0.1,
+        "tipoDeApontamentoKey": rng.randint(1, 6),
+        "permiteEditarApontamentosDeOutrosUsuarios": False,
+        "valorTotal": round(valor * minutes / 60, 2),
+        "valorCredito": 0.0,
+        "ativo": True,
+        "moderado": rng.random() < 0.2,
+        "kanbanStatusDescricaoAtuacao": rng.choice(KANBAN_STATUS)[1],
+        "excedeuTempoEstimado": rng.random() < 0.1,
+        "semSaldoTempoEstimado": rng.random() < 0.05,
+        "links": _maybe(rng, [{"rel": "self", "href": f"https://exemplo.acelerato.com/api/apontamentos/{i}"}]),
+    }
+
+
+def feedback(i, rng):
+    ready = _moment(rng)
+    agente_key, agente_nome, _ = _person(rng, 80, "Agente")
+    usuario_key, usuario_nome, _ = _person(rng, 20000, "Usuario")
+    perguntas = [
+        {
+            "pergunta": pergunta,
+            "nota": float(rng.randint(1, 5)),
+            "usuarioAvaliacaoId": usuario_key,
+            "usuarioAvaliacaoNome": usuario_nome,
+            "dataDeAvaliacao": _iso(ready + timedelta(hours=rng.randint(1, 72))),
+            "status": "RESPONDIDA",
+        }
+        for pergunta in PERGUNTAS[:rng.randint(0, len(PERGUNTAS))]
+    ]
+    return {
+        "ticketId": i,
+        "pesquisaId": 1,
+        "pesquisaNome": "Pesquisa de satisfação",
+        "dataDeProntoTicket": _iso(ready),
+        "agenteId": str(agente_key),
+        "agenteNome": agente_nome,
+        "comentarios": rng.choice(COMENTARIOS),
+        "avaliacaoMedia": round(sum(p["nota"] for p in perguntas) / len(perguntas), 2) if perguntas else None,
+        "status": "RESPONDIDA" if perguntas else "PENDENTE",
+        "perguntas": perguntas,
+    }
+
+
+def page_records(entity, page, page_size, total, seed=42, tickets=10000):
+    """Registros da página `page` (a partir de 1) de um conjunto com `total` registros."""
+    first = (page - 1) * page_size + 1
+    last = min(total, page * page_size)
+    if first > last:
+        return []
+    rng = random.Random(f"{seed}:{entity}:{page}:{page_size}")
+    if entity == "tickets":
+        return [ticket(i, rng) for i in range(first, last + 1)]
+    if entity == "apontamentos":
+        return [apontamento(i, rng, tickets) for i in range(first, last + 1)]
+    if entity == "feedbacks":
+        return [feedback(i, rng) for i in range(first, last + 1)]
+    raise ValueError(f"Entidade desconhecida: {entity}")
+
+
+def records(entity, count, seed=42, tickets=10000, page_size=1000):
+    """Gera `count` registros da entidade, página a página."""
+    for page in range(1, (count + page_size - 1) // page_size + 1):
+        yield from page_records(entity, page, page_size, count, seed, tickets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Amostra de registros sintéticos da API Acelerato")
+    parser.add_argument("entity", choices=["tickets", "apontamentos", "feedbacks"])
+    parser.add_argument("--count", type=int, default=3)
+    parser.add_argument("--tickets", type=int, default=10000, help="chamados referenciados pelos apontamentos")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    json.dump(list(records(args.entity, args.count, args.seed, args.tickets)), sys.stdout, ensure_ascii=False, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
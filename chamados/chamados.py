@@ -1,224 +1,226 @@
 import os
-import requests
+import sys
+import argparse
 import mysql.connector
 import logging
 from mysql.connector import errorcode
-from dotenv import load_dotenv
-
-# === Configuração de ambiente e logs ===
-load_dotenv()
-
-logging.basicConfig(
-    filename='logs/chamados.log',
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s'
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tickets_sync.backfill import parse_window
+from tickets_sync.changes import HASH_COLUMN, row_hash
+from tickets_sync.client import get_client
+from tickets_sync.config import API_URL_TICKETS, setup_logging
+from tickets_sync.db import bulk_upsert
+from tickets_sync.decoding import PageDecoder
+from tickets_sync.dimensions import (
+    AGENTES, CATEGORIAS, EQUIPES, KANBAN_STATUS, ORGANIZACOES, TIPOS_DE_PRIORIDADE, TIPOS_DE_TICKET,
 )
-
-API_URL_TICKETS = os.getenv("API_URL_TICKETS")
-API_EMAIL = os.getenv("API_EMAIL")
-API_TOKEN = os.getenv("API_TOKEN")
-
-DB_CONFIG = {
-    'host': os.getenv("DB_HOST"),
-    'user': os.getenv("DB_USER"),
-    'password': os.getenv("DB_PASSWORD"),
-    'database': os.getenv("DB_NAME")
-}
-
-# === Criação da tabela ===
-CREATE_TABLE_SQL = """
-CREATE TABLE IF NOT EXISTS chamados (
-    ticketKey INT PRIMARY KEY,
-    titulo VARCHAR(255),
-    arquivado BOOLEAN,
-    lixeira BOOLEAN,
-    suspenso BOOLEAN,
-    impedido BOOLEAN,
-    alvoDeSpam BOOLEAN,
-    tempoDeVidaEmDias INT,
-    tempoCiclicoEmDias INT,
-    kanbanStatusKey INT,
-    kanbanStatusdescricao VARCHAR(100),
-    kanbanStatusinicio BOOLEAN,
-    kanbanStatusfim BOOLEAN,
-    kanbanStatusfila BOOLEAN,
-    organizacaoKey INT,
-    organizacaonome VARCHAR(150),
-    organizacaoativo BOOLEAN,
-    equipeDeAtendimentoequipeKey INT,
-    equipeDeAtendimentonome VARCHAR(150),
-    agenteUsuarioKey INT,
-    agenteNome VARCHAR(150),
-    agenteEmail VARCHAR(255),
-    agenteUltimoAcessoEm DATETIME,
-    categoriaKey INT,
-    categoriadescricao VARCHAR(150),
-    tipoDeTicketKey INT,
-    tipoDeTicketDescricao VARCHAR(150),
-    tipoDePrioridadeKey INT,
-    tipoDePrioridadeDescricao VARCHAR(150),
-    dataDeCriacao DATETIME,
-    dataDaUltimaAlteracao DATETIME,
-    reporterUsuarioKey INT,
-    reporterNome VARCHAR(150),
-    reporterEmail VARCHAR(255),
-    origem VARCHAR(100),
-    url VARCHAR(300)
-);
-"""
-
-INSERT_SQL = """
-REPLACE INTO chamados (
-    ticketKey, titulo, arquivado, lixeira, suspenso, impedido, alvoDeSpam, tempoDeVidaEmDias, 
-    tempoCiclicoEmDias, kanbanStatusKey, kanbanStatusdescricao, kanbanStatusinicio, kanbanStatusfim, kanbanStatusfila,
-    organizacaoKey, organizacaonome, organizacaoativo, equipeDeAtendimentoequipeKey, equipeDeAtendimentonome, agenteUsuarioKey,
-    agenteNome, agenteEmail, agenteUltimoAcessoEm, categoriaKey, categoriadescricao, tipoDeTicketKey, tipoDeTicketdescricao, 
-    tipoDePrioridadeKey, tipoDePrioridadedescricao, dataDeCriacao, dataDaUltimaAlteracao, reporterUsuarioKey, reporterNome, 
-    reporterEmail, origem, url
+from tickets_sync.mapping import Field, RecordSpec, as_datetime
+from tickets_sync.migrations import Migration, add_column, add_index, create_table, migrate, split_dimensions
+from tickets_sync.pagination import iter_pages
+from tickets_sync.runner import sync_entity
+from tickets_sync.telemetry import NO_METRICS, write_run_report
+
+# === Mapeamento JSON -> colunas ===
+# Gera o CREATE TABLE, o INSERT e o extrator que devolve as tuplas na ordem das colunas
+SPEC = RecordSpec("chamados", [
+    Field("ticketKey", "INT", primary_key=True),
+    Field("titulo", "VARCHAR(255)"),
+    Field("arquivado", "BOOLEAN"),
+    Field("lixeira", "BOOLEAN"),
+    Field("suspenso", "BOOLEAN"),
+    Field("impedido", "BOOLEAN"),
+    Field("alvoDeSpam", "BOOLEAN"),
+    Field("tempoDeVidaEmDias", "INT"),
+    Field("tempoCiclicoEmDias", "INT"),
+    Field("kanbanStatusKey", "INT", ("kanbanStatus", "kanbanStatusKey")),
+    Field("kanbanStatusdescricao", "VARCHAR(100)", ("kanbanStatus", "descricao")),
+    Field("kanbanStatusinicio", "BOOLEAN", ("kanbanStatus", "inicio")),
+    Field("kanbanStatusfim", "BOOLEAN", ("kanbanStatus", "fim")),
+    Field("kanbanStatusfila", "BOOLEAN", ("kanbanStatus", "fila")),
+    Field("organizacaoKey", "INT", ("organizacao", "organizacaoKey")),
+    Field("organizacaonome", "VARCHAR(150)", ("organizacao", "nome")),
+    Field("organizacaoativo", "BOOLEAN", ("organizacao", "ativo")),
+    Field("equipeDeAtendimentoequipeKey", "INT", ("equipeDeAtendimento", "equipeKey")),
+    Field("equipeDeAtendimentonome", "VARCHAR(150)", ("equipeDeAtendimento", "nome")),
+    Field("agenteUsuarioKey", "INT", ("agente", "usuarioKey")),
+    Field("agenteNome", "VARCHAR(150)", ("agente", "nome")),
+    Field("agenteEmail", "VARCHAR(255)", ("agente", "email")),
+    Field("agenteUltimoAcessoEm", "DATETIME", ("agente", "ultimoAcessoEm"), convert=as_datetime),
+    Field("categoriaKey", "INT", ("categoria", "categoriaKey")),
+    Field("categoriadescricao", "VARCHAR(150)", ("categoria", "descricao")),
+    Field("tipoDeTicketKey", "INT", ("tipoDeTicket", "tipoDeTicketKey")),
+    Field("tipoDeTicketDescricao", "VARCHAR(150)", ("tipoDeTicket", "descricao")),
+    Field("tipoDePrioridadeKey", "INT", ("tipoDePrioridade", "tipoDePrioridadeKey")),
+    Field("tipoDePrioridadeDescricao", "VARCHAR(150)", ("tipoDePrioridade", "descricao")),
+    Field("dataDeCriacao", "DATETIME", convert=as_datetime),
+    Field("dataDaUltimaAlteracao", "DATETIME", convert=as_datetime),
+    Field("reporterUsuarioKey", "INT", ("reporter", "usuarioKey")),
+    Field("reporterNome", "VARCHAR(150)", ("reporter", "nome")),
+    Field("reporterEmail", "VARCHAR(255)", ("reporter", "email")),
+    Field("origem", "VARCHAR(100)"),
+    Field("url", "VARCHAR(300)"),
+],
+    # Nomes e descrições ficam nas dimensões; fato_chamados guarda só as chaves e `chamados` vira uma view
+    fact_table="fato_chamados",
+    dimensions=[
+        KANBAN_STATUS.link("kanbanStatusKey", descricao="kanbanStatusdescricao", inicio="kanbanStatusinicio",
+                           fim="kanbanStatusfim", fila="kanbanStatusfila"),
+        ORGANIZACOES.link("organizacaoKey", nome="organizacaonome", ativo="organizacaoativo"),
+        EQUIPES.link("equipeDeAtendimentoequipeKey", nome="equipeDeAtendimentonome"),
+        AGENTES.link("agenteUsuarioKey", nome="agenteNome", email="agenteEmail", ultimoAcessoEm="agenteUltimoAcessoEm"),
+        CATEGORIAS.link("categoriaKey", descricao="categoriadescricao"),
+        TIPOS_DE_TICKET.link("tipoDeTicketKey", descricao="tipoDeTicketDescricao"),
+        TIPOS_DE_PRIORIDADE.link("tipoDePrioridadeKey", descricao="tipoDePrioridadeDescricao"),
+    ],
 )
-VALUES (
-    %(ticketKey)s, %(titulo)s, %(arquivado)s, %(lixeira)s, %(suspenso)s, %(impedido)s, %(alvoDeSpam)s, %(tempoDeVidaEmDias)s, 
-    %(tempoCiclicoEmDias)s, %(kanbanStatusKey)s, %(kanbanStatusdescricao)s, %(kanbanStatusinicio)s, %(kanbanStatusfim)s, %(kanbanStatusfila)s,
-    %(organizacaoKey)s, %(organizacaonome)s, %(organizacaoativo)s, %(equipeDeAtendimentoequipeKey)s, %(equipeDeAtendimentonome)s, %(agenteUsuarioKey)s,
-    %(agenteNome)s, %(agenteEmail)s, %(agenteUltimoAcessoEm)s, %(categoriaKey)s, %(categoriadescricao)s, %(tipoDeTicketKey)s, %(tipoDeTicketDescricao)s, 
-    %(tipoDePrioridadeKey)s, %(tipoDePrioridadedescricao)s, %(dataDeCriacao)s, %(dataDaUltimaAlteracao)s, %(reporterUsuarioKey)s, %(reporterNome)s, 
-    %(reporterEmail)s, %(origem)s, %(url)s
-);
-"""
-
-def connect_db():
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
-    except mysql.connector.Error as err:
-        logging.error(f"Erro ao conectar ao banco: {err}")
-        raise
+
+INSERT_SQL = SPEC.insert_sql
+PRIMARY_KEY = SPEC.primary_key
+COLUMNS = SPEC.columns
+# Posição do ticket nas linhas extraídas, para atualizar apenas esses chamados na tabela unificada
+TICKET_INDEX = COLUMNS.index("ticketKey")
+# Coluna usada para particionar por mês a exportação Parquet (opcional, ver PARQUET_DIR)
+PARQUET_PARTITION = "dataDeCriacao"
+# Decodifica cada página direto nos registros do SPEC (ver JSON_DECODER)
+DECODER = PageDecoder(SPEC, envelope="data")
+
+# === Migrações de esquema ===
+MIGRATIONS = [
+    Migration(1, "cria a tabela chamados", create_table(SPEC)),
+    Migration(2, "coluna rowHash", add_column("chamados", HASH_COLUMN, "CHAR(32)")),
+    # Filtro de chamados ativos e ordenação por data de criação usados pelo BI
+    Migration(3, "índice de chamados ativos por data de criação",
+              add_index("chamados", "idx_chamados_ativos_criacao", ["arquivado", "lixeira", "dataDeCriacao"])),
+    Migration(4, "dimensões e tabela de fatos só com as chaves", split_dimensions(SPEC)),
+    # Varredura por janela de criação no backfill e na reconciliação (tickets_sync/reconcile.py)
+    Migration(5, "índice por data de criação",
+              add_index("fato_chamados", "idx_chamados_dataDeCriacao", ["dataDeCriacao"])),
+]
 
 def ensure_table_exists(conn):
     try:
-        cursor = conn.cursor()
-        cursor.execute(CREATE_TABLE_SQL)
-        conn.commit()
-        cursor.close()
+        migrate(conn, SPEC.table, MIGRATIONS)
         logging.info("Tabela verificada/criada com sucesso.")
     except mysql.connector.Error as err:
         logging.error(f"Erro ao criar tabela: {err}")
         raise
 
-def fetch_tickets(page=1, limit_pages=None):
-    all_tickets = []
-    current_page = page
-    itens_por_pagina = '100'
-    status_do_ticket = 'TODOS'
-    data_de_criacao_minima = "02/04/2025"
-    headers = {"Content-Type": "application/json"}
-    auth = (API_EMAIL, API_TOKEN)
-
-    while True:
-        params = {"page": current_page, "size": itens_por_pagina, "status": status_do_ticket, "dataDeCriacaoMinima": data_de_criacao_minima}
-        response = requests.get(API_URL_TICKETS, auth=auth, headers=headers, params=params)
-
-        if response.status_code != 200:
-            logging.error(f"Erro ao buscar página {current_page}: {response.status_code} - {response.text}")
-            break
-
-        try:
-            data = response.json()
-        except Exception as e:
-            logging.error(f"Erro ao decodificar JSON da página {current_page}: {e}")
-            break
-
-        # Detecta se o retorno é lista ou dicionário
-        if isinstance(data, list):
-            tickets = data
-        elif isinstance(data, dict):
-            tickets = data.get("data", data)
-        else:
-            logging.warning(f"Formato de resposta inesperado na página {current_page}")
-            break
-
-        if not tickets:
-            logging.info(f"Nenhum ticket encontrado na página {current_page}. Encerrando.")
-            break
+# === Parâmetros de paginação da API ===
+# Limite de páginas por execução, para evitar loops infinitos em caso de erro na API
+LIMITE_DE_PAGINAS = 500
+ITENS_POR_PAGINA = '100'
+STATUS_DO_TICKET = 'TODOS'
+DATA_DE_CRIACAO_MINIMA = "02/04/2025"
+
+# === Sincronização incremental ===
+ENTIDADE = "chamados"
+# Campo usado como marca d'água e filtro enviado à API nas execuções incrementais
+WATERMARK_FIELD = "dataDaUltimaAlteracao"
+# O nome do filtro é presumido (segue o padrão dos demais parâmetros da API); a primeira página de cada
+# carga incremental é conferida contra ele e um aviso vai para o log se a API o ignorar (tickets_sync/state.py)
+FILTRO_ALTERACAO = "dataDaUltimaAlteracaoMinima"
+
+# === Backfill por janelas de datas (tickets_sync/backfill.py) ===
+INICIO_DO_HISTORICO = DATA_DE_CRIACAO_MINIMA
+# Filtros de data de criação mínima e máxima de cada janela e a coluna correspondente na tabela
+FILTROS_JANELA = ("dataDeCriacaoMinima", "dataDeCriacaoMaxima")
+COLUNA_JANELA = "dataDeCriacao"
+
+def page_request(page, filtros=None):
+    # URL e parâmetros da página, compartilhados com o motor assíncrono (tickets_sync/aio.py)
+    return API_URL_TICKETS, {"page": page, "size": ITENS_POR_PAGINA, "status": STATUS_DO_TICKET, "dataDeCriacaoMinima": DATA_DE_CRIACAO_MINIMA, **(filtros or {})}
+
+def fetch_page(page, filtros=None, metrics=NO_METRICS):
+    url, params = page_request(page, filtros)
+    # Sessão compartilhada: conexões keep-alive, gzip e autenticação já configurados
+    with metrics.phase("fetch"):
+        response = get_client().get(url, params=params, metrics=metrics)
+
+    if response.status_code != 200:
+        logging.error(f"Erro ao buscar página {page}: {response.status_code} - {response.text}")
+        return None
 
-        all_tickets.extend(tickets)
+    try:
+        with metrics.phase("decode"):
+            tickets = DECODER.decode(response.content)
+    except Exception as e:
+        logging.error(f"Erro ao decodificar JSON da página {page}: {e}")
+        return None
+
+    if not tickets:
+        logging.info(f"Nenhum ticket encontrado na página {page}. Encerrando.")
+    return tickets
+
+def fetch_tickets(page=1, limit_pages=None, workers=None, filtros=None, metrics=NO_METRICS):
+    # As páginas são buscadas em paralelo (API_FETCH_WORKERS) mas entregues em ordem,
+    # uma a uma, para que a gravação no banco comece sem esperar o fim do download
+    for current_page, tickets in iter_pages(partial(fetch_page, filtros=filtros, metrics=metrics), page=page, limit_pages=limit_pages, workers=workers, key=PRIMARY_KEY):
         logging.info(f"Página {current_page} processada com {len(tickets)} tickets.")
-
-        # Controle de paginação
-        if limit_pages and current_page >= limit_pages:
-            break
-
-        # Caso a API não tenha metadado de próxima página, apenas itera até a próxima página manualmente
-        current_page += 1
-
-    return all_tickets
-
-def insert_tickets(conn, tickets):
-    cursor = conn.cursor()
-    for t in tickets:
-        ticket_data = {
-            "ticketKey": t.get("ticketKey"),
-            "titulo": t.get("titulo"),
-            "arquivado": t.get("arquivado"),
-            "lixeira": t.get("lixeira"),
-            "suspenso": t.get("suspenso"),
-            "impedido": t.get("impedido"),
-            "alvoDeSpam": t.get("alvoDeSpam"),
-            "tempoDeVidaEmDias": t.get("tempoDeVidaEmDias"),
-            "tempoCiclicoEmDias": t.get("tempoCiclicoEmDias"),
-            "kanbanStatusKey": (t.get("kanbanStatus") or {}).get("kanbanStatusKey"),
-            "kanbanStatusdescricao": (t.get("kanbanStatus") or {}).get("descricao"),
-            "kanbanStatusinicio": (t.get("kanbanStatus") or {}).get("inicio"),
-            "kanbanStatusfim": (t.get("kanbanStatus") or {}).get("fim"),
-            "kanbanStatusfila": (t.get("kanbanStatus") or {}).get("fila"),
-            "organizacaoKey": (t.get("organizacao") or {}).get("organizacaoKey"),
-            "organizacaonome": (t.get("organizacao") or {}).get("nome"),
-            "organizacaoativo": (t.get("organizacao") or {}).get("ativo"),
-            "equipeDeAtendimentoequipeKey": (t.get("equipeDeAtendimento") or {}).get("equipeKey"),
-            "equipeDeAtendimentonome": (t.get("equipeDeAtendimento") or {}).get("nome"),
-            "agenteUsuarioKey": (t.get("agente") or {}).get("usuarioKey"),
-            "agenteNome": (t.get("agente") or {}).get("nome"),
-            "agenteEmail": (t.get("agente") or {}).get("email"),
-            "agenteUltimoAcessoEm": (t.get("agente") or {}).get("ultimoAcessoEm"),
-            "categoriaKey": (t.get("categoria") or{}).get("categoriaKey"),
-            "categoriadescricao": (t.get("categoria") or{}).get("descricao"),
-            "tipoDeTicketKey": (t.get("tipoDeTicket") or{}).get("tipoDeTicketKey"),
-            "tipoDeTicketDescricao": (t.get("tipoDeTicket") or{}).get("descricao"),
-            "tipoDePrioridadeKey": (t.get("tipoDePrioridade") or {}).get("tipoDePrioridadeKey"),
-            "tipoDePrioridadedescricao": (t.get("tipoDePrioridade") or {}).get("descricao"),
-            "dataDeCriacao": t.get("dataDeCriacao"),
-            "dataDaUltimaAlteracao": t.get("dataDaUltimaAlteracao"),
-            "reporterUsuarioKey": (t.get("reporter") or {}).get("usuarioKey"),
-            "reporterNome": (t.get("reporter") or {}).get("nome"),
-            "reporterEmail": (t.get("reporter") or {}).get("email"),
-            "origem": t.get("origem"),
-            "url": t.get("url"),
-        }
-        # logging.info(f"Inserindo ticketKey={ticket_data['ticketKey']}")
-        try:
-            cursor.execute(INSERT_SQL, ticket_data)
-        except mysql.connector.Error as err:
-            logging.error(f"Erro ao inserir ticket {t.get('id')}: {err}")
-
-    conn.commit()
-    cursor.close()
-    logging.info(f"{len(tickets)} tickets inseridos/atualizados no banco.")
-
-def main(limit_pages=None):
-    logging.info("=== Iniciando sincronização com API Acelerato ===")
-    conn = connect_db()
-    ensure_table_exists(conn)
-
-    tickets = fetch_tickets(limit_pages=limit_pages)
-    if tickets:
-        conn.ping(reconnect=True, attempts=3, delay=2)
-        insert_tickets(conn, tickets)
-    else:
-        logging.warning("Nenhum ticket encontrado para sincronizar.")
-
-    conn.close()
-    logging.info("=== Sincronização concluída ===")
+        metrics.count("paginas")
+        yield current_page, tickets
+
+def insert_tickets(conn, tickets, hashes=None, sink=None, loader=None, metrics=NO_METRICS, dimensions=None,
+                   writer=None, page=None):
+    with metrics.phase("transform"):
+        rows = SPEC.extract_many(tickets)
+    # O destino colunar recebe todas as linhas; a mesclagem por chave torna a gravação idempotente
+    if sink is not None:
+        with metrics.phase("parquet"):
+            sink.write(rows)
+
+    # Com o índice de hashes, apenas linhas novas ou alteradas seguem para o banco
+    with metrics.phase("transform"):
+        if hashes is not None:
+            rows = hashes.changed_rows(rows)
+        else:
+            rows = [row + (row_hash(row),) for row in rows]
+
+    # Nomes e descrições vão para as dimensões (cada linha uma vez por execução); o fato fica só com as chaves
+    if dimensions is not None:
+        with metrics.phase("write"):
+            dimensions.write(conn, rows, metrics)
+    facts = SPEC.fact_rows(rows)
+
+    # Na carga em massa as linhas vão para o arquivo de staging e são mescladas no final
+    if loader is not None:
+        with metrics.phase("write"):
+            loader.write(facts)
+        return rows
+
+    # Na gravação em paralelo as linhas seguem para as threads do PartitionedWriter
+    if writer is not None:
+        with metrics.phase("write"):
+            writer.write(facts, page)
+        return rows
+
+    # Os hashes só entram no índice depois da gravação; as linhas que falharam são reenviadas na próxima execução
+    failed = []
+    with metrics.phase("write"):
+        written = bulk_upsert(conn, SPEC.fact_table, SPEC.write_columns, facts, key=PRIMARY_KEY, metrics=metrics,
+                              failed=failed)
+    if hashes is not None:
+        hashes.confirm(facts, failed=failed)
+    metrics.count("linhas_gravadas", written)
+    logging.info(f"{written} de {len(tickets)} tickets inseridos/atualizados no banco.")
+    return rows
+
+def main(limit_pages=None, **options):
+    # Marca d'água, checkpoint, gravação e tabela unificada ficam em tickets_sync/runner.py, comum às três entidades
+    return sync_entity(sys.modules[__name__], limit_pages, **options)
 
 if __name__ == "__main__":
-    # limite de páginas para testes
-    main(limit_pages=500)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Sincroniza os chamados (tickets) do Acelerato com o MySQL")
+    parser.add_argument("--full", action="store_true", help="ignora a marca d'água e refaz a carga completa")
+    parser.add_argument("--resume", action="store_true", help="continua a última carga interrompida a partir do checkpoint")
+    parser.add_argument("--bulk", action="store_true", help="carga em massa via LOAD DATA LOCAL INFILE e staging (backfills)")
+    parser.add_argument("--engine", choices=["threads", "async"], help="motor da sincronização (padrão: SYNC_ENGINE)")
+    parser.add_argument("--window-start", help="carrega só a janela de datas iniciada neste dia (dd/mm/aaaa; padrão: início do histórico)")
+    parser.add_argument("--window-end", help="último dia (inclusivo) da janela (dd/mm/aaaa; padrão: hoje)")
+    args = parser.parse_args()
+
+    setup_logging('logs/chamados.log')
+    window = parse_window(args.window_start, args.window_end, INICIO_DO_HISTORICO)
+    stats = main(limit_pages=LIMITE_DE_PAGINAS, full=args.full, resume=args.resume, bulk=args.bulk, engine=args.engine, window=window)
+    write_run_report([stats])
\ No newline at end of file
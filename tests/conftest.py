@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os scripts de cada entidade e o pacote tickets_sync ficam na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
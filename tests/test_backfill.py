@@ -0,0 +1,46 @@
+from datetime import date
+
+import pytest
+
+import Apontamentos.apontamentos as apontamentos
+import chamados.chamados as chamados
+from tickets_sync.backfill import WindowFilterError, check_window, date_windows
+from tickets_sync.pagination import FetchError
+
+WINDOW = (date(2025, 5, 1), date(2025, 5, 7))
+
+
+def test_date_windows_cover_the_range_without_overlap():
+    windows = date_windows("01/05/2025", "2025-05-16", days=7)
+    assert windows == [
+        (date(2025, 5, 1), date(2025, 5, 7)),
+        (date(2025, 5, 8), date(2025, 5, 14)),
+        (date(2025, 5, 15), date(2025, 5, 16)),
+    ]
+
+
+def test_records_inside_the_window_pass_through():
+    pages = [
+        (1, [{"ticketKey": 1, "dataDeCriacao": "2025-05-01T00:00:00.000-03:00"},
+             {"ticketKey": 2, "dataDeCriacao": "2025-05-07T23:59:59"}]),
+        # Sem data, o registro não é conferido
+        (2, [{"ticketKey": 3, "dataDeCriacao": None}]),
+    ]
+    assert list(check_window(iter(pages), chamados, WINDOW)) == pages
+
+
+def test_records_outside_the_window_stop_before_the_page_is_delivered():
+    pages = iter([
+        (1, [{"requestUUID": "a", "dataDoLancamento": "2025-05-03"}]),
+        (2, [{"requestUUID": "b", "dataDoLancamento": "2025-05-04"},
+             {"requestUUID": "c", "dataDoLancamento": "2025-06-20"}]),
+        (3, [{"requestUUID": "d", "dataDoLancamento": "2025-05-05"}]),
+    ])
+    delivered = []
+    with pytest.raises(WindowFilterError) as raised:
+        for page, records in check_window(pages, apontamentos, WINDOW):
+            delivered.append(page)
+    assert delivered == [1]
+    assert raised.value.page == 2
+    # O runner trata o erro como uma falha de busca: a janela fica incompleta
+    assert isinstance(raised.value, FetchError)
@@ -0,0 +1,67 @@
+import sqlite3
+
+import pytest
+
+from tickets_sync.changes import RowHashIndex, row_hash
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE itens (chave INTEGER PRIMARY KEY, valor TEXT, rowHash TEXT)")
+    conn.executemany("INSERT INTO itens VALUES (?, ?, ?)", [
+        (1, "a", row_hash((1, "a"))),
+        (2, "b", row_hash((2, "b"))),
+    ])
+    yield conn
+    conn.close()
+
+
+def test_index_is_loaded_from_the_table(conn):
+    hashes = RowHashIndex(conn, "itens", "chave")
+    assert hashes.hashes == {"1": row_hash((1, "a")), "2": row_hash((2, "b"))}
+
+
+def test_changed_rows_skips_unchanged_rows_and_appends_the_hash(conn):
+    hashes = RowHashIndex(conn, "itens", "chave")
+    rows = [(1, "a"), (2, "b2"), (3, "c")]
+    changed = hashes.changed_rows(rows)
+    assert changed == [(2, "b2", row_hash((2, "b2"))), (3, "c", row_hash((3, "c")))]
+    assert hashes.unchanged == 1
+    # Nada entra no índice antes da confirmação da gravação
+    assert "3" not in hashes.hashes
+    assert hashes.changed_rows(rows) == changed
+
+
+def test_confirm_counts_inserted_updated_and_unchanged(conn):
+    hashes = RowHashIndex(conn, "itens", "chave")
+    changed = hashes.changed_rows([(1, "a"), (2, "b2"), (3, "c")])
+    hashes.confirm(changed)
+    assert (hashes.inserted, hashes.updated, hashes.unchanged, hashes.failed) == (1, 1, 1, 0)
+    assert hashes.changed_rows([(2, "b2"), (3, "c")]) == []
+    # A mesma versão confirmada de novo (enviada duas vezes antes da primeira confirmação)
+    hashes.confirm(changed[:1])
+    assert (hashes.inserted, hashes.updated, hashes.unchanged) == (1, 1, 4)
+
+
+def test_failed_rows_stay_out_of_the_index(conn):
+    hashes = RowHashIndex(conn, "itens", "chave")
+    changed = hashes.changed_rows([(2, "b2"), (3, "c"), (4, "d")])
+    # As chaves chegam como o banco as devolve; a comparação é feita como texto
+    hashes.confirm(changed, failed=["3", 4])
+    assert (hashes.inserted, hashes.updated, hashes.failed) == (0, 1, 2)
+    assert "3" not in hashes.hashes and "4" not in hashes.hashes
+    # Na próxima página (ou execução) as linhas que falharam são enviadas de novo
+    assert [row[0] for row in hashes.changed_rows([(2, "b2"), (3, "c"), (4, "d")])] == [3, 4]
+    assert "2 com erro na gravação" in hashes.summary()
+
+
+def test_key_index_and_where(conn):
+    conn.execute("INSERT INTO itens VALUES (5, 'e', 'x')")
+    # `where` limita o índice às linhas da janela (placeholders do driver em uso)
+    hashes = RowHashIndex(conn, "itens", "chave", where=("chave >= ?", (2,)))
+    assert sorted(hashes.hashes) == ["2", "5"]
+    changed = hashes.changed_rows([("b", 2)], key_index=1)
+    hashes.confirm(changed, key_index=1)
+    assert hashes.hashes["2"] == row_hash(("b", 2))
+    assert hashes.updated == 1
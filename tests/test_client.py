@@ -0,0 +1,191 @@
+import json
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+import tickets_sync.client as client_module
+from tickets_sync.client import AceleratoClient, backoff_delay, retry_after_seconds
+from tickets_sync.pagination import FetchError, iter_pages
+
+
+class ScriptedServer:
+    """Servidor HTTP local que devolve as respostas roteirizadas em ordem; depois delas, `default`."""
+
+    def __init__(self, *responses, default=(200, {}, [])):
+        self.responses = deque(responses)
+        self.default = default
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(parse_qs(urlparse(self.path).query))
+                status, headers, payload = server.responses.popleft() if server.responses else server.default
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/tickets"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(*responses, **kwargs):
+        servers.append(ScriptedServer(*responses, **kwargs))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # As esperas do backoff são registradas em vez de dormidas
+    delays = []
+    monkeypatch.setattr(client_module.time, "sleep", delays.append)
+    return delays
+
+
+def make_client(max_retries=3):
+    return AceleratoClient(email="teste", token="teste", max_retries=max_retries, rate_limit=0)
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_retries_temporary_errors(serve, sleeps, status):
+    server = serve((status, {}, {}), (status, {}, {}), (200, {}, [{"ticketKey": 1}]))
+    client = make_client()
+    response = client.get(server.url, params={"page": 1})
+    assert response.status_code == 200
+    assert response.json() == [{"ticketKey": 1}]
+    assert len(server.requests) == 3
+    assert len(sleeps) == 2
+    assert client.retries == 2
+
+
+def test_does_not_retry_client_errors(serve, sleeps):
+    server = serve((404, {}, {"erro": "não encontrado"}))
+    response = make_client().get(server.url)
+    assert response.status_code == 404
+    assert len(server.requests) == 1
+    assert sleeps == []
+
+
+def test_honors_retry_after_seconds(serve, sleeps):
+    server = serve((429, {"Retry-After": "7"}, {}), (200, {}, []))
+    assert make_client().get(server.url).status_code == 200
+    assert sleeps == [7.0]
+
+
+def test_honors_retry_after_http_date(serve, sleeps, monkeypatch):
+    monkeypatch.setattr(client_module, "API_BACKOFF_MAX", 3600)
+    server = serve((503, {"Retry-After": "Wed, 21 Oct 2099 07:28:00 GMT"}, {}), (200, {}, []))
+    assert make_client().get(server.url).status_code == 200
+    # Data distante: a espera fica no limite
+    assert sleeps == [3600]
+
+
+def test_retry_after_is_capped(serve, sleeps, monkeypatch):
+    monkeypatch.setattr(client_module, "API_BACKOFF_MAX", 30)
+    server = serve((429, {"Retry-After": "86400"}, {}), (200, {}, []))
+    assert make_client().get(server.url).status_code == 200
+    assert sleeps == [30]
+
+
+def with_retry_after(value=None):
+    response = requests.models.Response()
+    if value is not None:
+        response.headers["Retry-After"] = value
+    return response
+
+
+def test_retry_after_seconds_parsing():
+    assert retry_after_seconds(with_retry_after()) is None
+    assert retry_after_seconds(with_retry_after("2.5"), cap=60) == 2.5
+    assert retry_after_seconds(with_retry_after("-4"), cap=60) == 0.0
+    assert retry_after_seconds(with_retry_after("600"), cap=60) == 60
+    assert retry_after_seconds(with_retry_after("Thu, 01 Jan 1970 00:00:00 GMT"), cap=60) == 0.0
+    assert retry_after_seconds(with_retry_after("amanhã"), cap=60) is None
+
+
+def test_backoff_is_bounded(serve, sleeps, monkeypatch):
+    monkeypatch.setattr(client_module, "API_BACKOFF_BASE", 1)
+    monkeypatch.setattr(client_module, "API_BACKOFF_MAX", 4)
+    server = serve(default=(503, {}, {}))
+    response = make_client(max_retries=6).get(server.url)
+    # Esgotadas as tentativas, a última resposta é devolvida para quem chamou
+    assert response.status_code == 503
+    assert len(server.requests) == 7
+    assert len(sleeps) == 6
+    for attempt, delay in enumerate(sleeps):
+        assert 0 <= delay <= min(4, 2 ** attempt)
+
+
+def test_backoff_delay_bounds():
+    for attempt in range(12):
+        for _ in range(50):
+            assert 0 <= backoff_delay(attempt, base=0.5, cap=10) <= min(10, 0.5 * 2 ** attempt)
+
+
+def test_network_errors_raise_after_retries(sleeps):
+    # Porta sem servidor: cada tentativa falha na conexão
+    server = ScriptedServer()
+    url = server.url
+    server.close()
+    client = make_client(max_retries=2)
+    with pytest.raises(requests.ConnectionError):
+        client.get(url)
+    assert len(sleeps) == 2
+    assert client.requests == 3
+
+
+def test_fetch_error_once_retries_run_out(serve, sleeps):
+    server = serve(default=(503, {}, {}))
+    client = make_client(max_retries=2)
+
+    def fetch_page(page):
+        response = client.get(server.url, params={"page": page})
+        return response.json() if response.status_code == 200 else None
+
+    with pytest.raises(FetchError) as raised:
+        list(iter_pages(fetch_page, limit_pages=3, workers=1, page_retries=1))
+    assert raised.value.page == 1
+    # (1 + max_retries) requisições por tentativa da página, e 1 + page_retries tentativas
+    assert len(server.requests) == 3 * 2
+
+
+def test_pages_before_the_failure_are_delivered(serve, sleeps):
+    server = serve((200, {}, [{"ticketKey": 1}]), default=(503, {}, {}))
+    client = make_client(max_retries=1)
+
+    def fetch_page(page):
+        response = client.get(server.url, params={"page": page})
+        return response.json() if response.status_code == 200 else None
+
+    delivered = []
+    with pytest.raises(FetchError) as raised:
+        for page, items in iter_pages(fetch_page, limit_pages=3, workers=1, page_retries=1):
+            delivered.append((page, items))
+    assert delivered == [(1, [{"ticketKey": 1}])]
+    assert raised.value.page == 2
@@ -0,0 +1,79 @@
+import sqlite3
+
+import pytest
+
+from tickets_sync.db import build_upsert_sql, bulk_upsert
+
+COLUMNS = ("chave", "valor")
+
+
+class Connection(sqlite3.Connection):
+    # Conta as instruções executadas, para conferir quais lotes foram reprocessados linha a linha
+    statements = None
+
+    def cursor(self, *args, **kwargs):
+        cursor = super().cursor(*args, **kwargs)
+        statements = self.statements
+        execute = cursor.execute
+
+        class Cursor:
+            def execute(self, sql, params=()):
+                statements.append(sql.count("(?"))
+                return execute(sql, params)
+
+            def __getattr__(self, name):
+                return getattr(cursor, name)
+
+        return Cursor()
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:", factory=Connection)
+    conn.statements = []
+    # Um CHECK rejeita as linhas com valor 'ruim', como uma linha inválida no MySQL
+    conn.execute("CREATE TABLE itens (chave INTEGER PRIMARY KEY, valor TEXT CHECK (valor != 'ruim'))")
+    yield conn
+    conn.close()
+
+
+def stored(conn):
+    return dict(conn.execute("SELECT chave, valor FROM itens"))
+
+
+def test_build_upsert_sql():
+    assert build_upsert_sql("itens", COLUMNS, "chave", rows=2) == (
+        "INSERT INTO itens (chave, valor)\nVALUES (%s, %s), (%s, %s)\nON DUPLICATE KEY UPDATE valor = VALUES(valor)"
+    )
+    assert build_upsert_sql("marcas", ("entidade", "chave", "ticketKey"), ("entidade", "chave"), dialect="sqlite") == (
+        "INSERT INTO marcas (entidade, chave, ticketKey)\nVALUES (?, ?, ?)\n"
+        "ON CONFLICT (entidade, chave) DO UPDATE SET ticketKey = excluded.ticketKey"
+    )
+
+
+def test_rows_are_inserted_and_updated_in_batches(conn):
+    rows = [(key, f"v{key}") for key in range(1, 8)]
+    assert bulk_upsert(conn, "itens", COLUMNS, rows, key="chave", batch_size=3, dialect="sqlite") == 7
+    # 3 lotes multi-linha (3 + 3 + 1 linhas), nenhum reprocessado
+    assert conn.statements == [3, 3, 1]
+    assert bulk_upsert(conn, "itens", COLUMNS, [(2, "novo")], key="chave", dialect="sqlite") == 1
+    assert stored(conn)[2] == "novo"
+    assert len(stored(conn)) == 7
+
+
+def test_only_the_failing_batch_is_retried_row_by_row(conn):
+    rows = [(key, "ruim" if key == 5 else f"v{key}") for key in range(1, 10)]
+    failed = []
+    written = bulk_upsert(conn, "itens", COLUMNS, rows, key="chave", batch_size=3, dialect="sqlite", failed=failed)
+    assert written == 8
+    assert failed == [5]
+    # Lote 1 inteiro; lote 2 falha e é refeito linha a linha (3 instruções); lote 3 inteiro
+    assert conn.statements == [3, 3, 1, 1, 1, 3]
+    assert sorted(stored(conn)) == [1, 2, 3, 4, 6, 7, 8, 9]
+
+
+def test_failed_list_is_appended_to(conn):
+    failed = ["anterior"]
+    bulk_upsert(conn, "itens", COLUMNS, [(1, "ruim"), (2, "ruim")], key="chave", dialect="sqlite", failed=failed)
+    assert failed == ["anterior", 1, 2]
+    assert stored(conn) == {}
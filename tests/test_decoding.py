@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+import Apontamentos.apontamentos as apontamentos
+import Feedbacks.feedbacks as feedbacks
+import chamados.chamados as chamados
+from tickets_sync.decoding import PageDecoder, available_backends
+
+pytestmark = pytest.mark.skipif("msgspec" not in available_backends(), reason="msgspec não instalado")
+
+
+def chamado(ticket_key, **overrides):
+    record = {
+        "ticketKey": ticket_key,
+        "titulo": f"Chamado {ticket_key}",
+        "arquivado": False,
+        "organizacao": {"organizacaoKey": 7, "nome": "ACME", "ativo": True},
+        "agente": {"usuarioKey": 3, "nome": "Ana", "email": "ana@example.com", "ultimoAcessoEm": "2025-04-02T10:00:00"},
+        "dataDeCriacao": "2025-04-01T09:30:00",
+        "campoIgnorado": {"qualquer": ["coisa"]},
+    }
+    record.update(overrides)
+    return record
+
+
+def feedback(ticket_id, **overrides):
+    record = {
+        "ticketId": ticket_id,
+        "avaliacaoMedia": 4.5,
+        "perguntas": [{"pergunta": "Satisfeito?", "nota": 5, "dataDeAvaliacao": "2025-04-03T08:00:00"}],
+    }
+    record.update(overrides)
+    return record
+
+
+def apontamento(uuid, **overrides):
+    record = {"requestUUID": uuid, "ticketKey": 10, "quantidadeFormatada": "01:30", "links": [{"href": "http://x/1"}]}
+    record.update(overrides)
+    return record
+
+
+def decode_rows(module, body, backend):
+    decoder = PageDecoder(module.SPEC, envelope=module.DECODER.envelope,
+                          envelope_required=module.DECODER.envelope_required, backend=backend)
+    return module.SPEC.extract_many(decoder.decode(body))
+
+
+PAGES = {
+    "envelope data null": (chamados, {"data": None}),
+    "envelope data null (feedbacks)": (feedbacks, {"data": None}),
+    "envelope content null": (apontamentos, {"content": None}),
+    "sem envelope opcional": (apontamentos, {"totalPages": 0}),
+    "lista vazia": (chamados, []),
+    "lista na raiz": (chamados, [chamado(1), chamado(2)]),
+    "objeto aninhado nulo": (chamados, {"data": [chamado(1, organizacao=None, agente=None)]}),
+    "objeto aninhado vazio": (chamados, {"data": [chamado(1, organizacao="", agente=[])]}),
+    "objeto aninhado falso": (chamados, {"data": [chamado(1, organizacao=False), chamado(2)]}),
+    "lista aninhada como objeto": (feedbacks, {"data": [feedback(1, perguntas={"pergunta": "?"}), feedback(2)]}),
+    "lista aninhada como texto": (feedbacks, {"data": [feedback(1, perguntas="sem perguntas")]}),
+    "lista aninhada vazia": (feedbacks, {"data": [feedback(1, perguntas=[])]}),
+    "item nulo na lista aninhada": (apontamentos, {"content": [apontamento("a", links=[None]), apontamento("b")]}),
+    "lista aninhada como número": (apontamentos, {"content": [apontamento("a", links=0)]}),
+}
+
+
+@pytest.mark.parametrize("name", PAGES)
+def test_typed_decoder_matches_dict_decoder(name):
+    module, page = PAGES[name]
+    body = json.dumps(page).encode("utf-8")
+    assert decode_rows(module, body, "msgspec") == decode_rows(module, body, "json")
+
+
+@pytest.mark.parametrize("module", [chamados, feedbacks, apontamentos])
+def test_null_envelope_is_empty_page(module):
+    body = json.dumps({module.DECODER.envelope: None}).encode("utf-8")
+    assert PageDecoder(module.SPEC, envelope=module.DECODER.envelope, backend="msgspec").decode(body) == []
+
+
+def test_typed_decoder_reads_nested_values():
+    body = json.dumps({"data": [chamado(1)]}).encode("utf-8")
+    (row,) = decode_rows(chamados, body, "msgspec")
+    columns = dict(zip(chamados.SPEC.columns, row))
+    assert columns["organizacaonome"] == "ACME"
+    assert columns["agenteEmail"] == "ana@example.com"
+
+
+@pytest.mark.parametrize("backend", ["msgspec", "json"])
+def test_missing_required_envelope_is_unexpected(backend):
+    decoder = PageDecoder(chamados.SPEC, envelope="data", backend=backend)
+    with pytest.raises(ValueError):
+        decoder.decode(b'{"erro": "token inv\\u00e1lido"}')
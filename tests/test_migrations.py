@@ -0,0 +1,124 @@
+import sqlite3
+
+import pytest
+
+import Feedbacks.feedbacks as feedbacks
+from tickets_sync.migrations import Migration, add_column, applied_versions, convert_to_temporal, migrate
+
+# CREATE TABLE das versões anteriores às migrações: datas em texto e sem rowHash
+OLD_CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS feedbacks (
+    ticketId INT PRIMARY KEY, pesquisaId INT, pesquisaNome VARCHAR(255), dataDeProntoTicket VARCHAR(50),
+    agenteId VARCHAR(50), agenteNome VARCHAR(255), comentarios TEXT, avaliacaoMedia DECIMAL(5,2),
+    status VARCHAR(50), pergunta TEXT, nota DECIMAL(5,2), usuarioAvaliacaoId INT,
+    usuarioAvaliacaoNome VARCHAR(255), dataDeAvaliacao VARCHAR(50), statusPergunta VARCHAR(50)
+);
+"""
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "migracoes.db"))
+    yield conn
+    conn.close()
+
+
+def column_types(conn, table):
+    return {row[1]: row[2] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def indexes(conn, table):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (table,))}
+
+
+def recorded(conn):
+    return conn.execute("SELECT entidade, versao, descricao FROM schema_migrations ORDER BY versao").fetchall()
+
+
+def test_new_table_gets_the_current_schema_and_versions(conn):
+    migrate(conn, "feedbacks", feedbacks.MIGRATIONS, dialect="sqlite")
+    types = column_types(conn, "feedbacks")
+    assert types["dataDeAvaliacao"] == "DATETIME" and types["dataDeProntoTicket"] == "DATETIME"
+    assert "rowHash" in types
+    assert "idx_feedbacks_dataDeAvaliacao" in indexes(conn, "feedbacks")
+    assert recorded(conn) == [("feedbacks", m.version, m.description) for m in feedbacks.MIGRATIONS]
+    assert applied_versions(conn, "feedbacks", dialect="sqlite") == {1, 2, 3, 4}
+
+
+def test_running_twice_changes_nothing(conn):
+    migrate(conn, "feedbacks", feedbacks.MIGRATIONS, dialect="sqlite")
+    conn.execute("INSERT INTO feedbacks (ticketId, dataDeAvaliacao) VALUES (1, '2025-10-30 14:05:19')")
+    conn.commit()
+    schema = column_types(conn, "feedbacks")
+    migrate(conn, "feedbacks", feedbacks.MIGRATIONS, dialect="sqlite")
+    assert column_types(conn, "feedbacks") == schema
+    assert len(recorded(conn)) == len(feedbacks.MIGRATIONS)
+    assert conn.execute("SELECT ticketId, dataDeAvaliacao FROM feedbacks").fetchall() == [(1, "2025-10-30 14:05:19")]
+
+
+def test_old_table_is_migrated_and_dates_are_normalized(conn):
+    conn.execute(OLD_CREATE_TABLE_SQL)
+    conn.executemany("INSERT INTO feedbacks (ticketId, dataDeAvaliacao, dataDeProntoTicket) VALUES (?, ?, ?)", [
+        (1, "2025-10-30T14:05:19.000-03:00", "30/10/2025 09:00:00"),
+        (2, "30/10/2025", ""),
+        (3, None, "2025-01-02T03:04:05Z"),
+    ])
+    conn.commit()
+    migrate(conn, "feedbacks", feedbacks.MIGRATIONS, dialect="sqlite")
+    types = column_types(conn, "feedbacks")
+    assert types["dataDeAvaliacao"] == "DATETIME" and types["dataDeProntoTicket"] == "DATETIME"
+    assert "rowHash" in types
+    assert conn.execute("SELECT ticketId, dataDeAvaliacao, dataDeProntoTicket FROM feedbacks ORDER BY ticketId").fetchall() == [
+        (1, "2025-10-30 14:05:19", "2025-10-30 09:00:00"),
+        (2, "2025-10-30", None),
+        (3, None, "2025-01-02 03:04:05"),
+    ]
+    # As datas normalizadas voltam a ser comparáveis como datas
+    assert conn.execute("SELECT COUNT(*) FROM feedbacks WHERE dataDeAvaliacao >= '2025-10-30'").fetchone()[0] == 2
+    assert applied_versions(conn, "feedbacks", dialect="sqlite") == {1, 2, 3, 4}
+
+
+def test_steps_are_idempotent_without_the_recorded_versions(conn):
+    # Tabela já no formato atual, mas sem schema_migrations (por exemplo, criada à mão)
+    migrate(conn, "feedbacks", feedbacks.MIGRATIONS, dialect="sqlite")
+    conn.execute("INSERT INTO feedbacks (ticketId, dataDeAvaliacao) VALUES (1, '2025-10-30 14:05:19')")
+    conn.execute("DROP TABLE schema_migrations")
+    conn.commit()
+    schema = column_types(conn, "feedbacks")
+    migrate(conn, "feedbacks", feedbacks.MIGRATIONS, dialect="sqlite")
+    assert column_types(conn, "feedbacks") == schema
+    assert conn.execute("SELECT dataDeAvaliacao FROM feedbacks").fetchall() == [("2025-10-30 14:05:19",)]
+    assert len(recorded(conn)) == len(feedbacks.MIGRATIONS)
+
+
+def test_convert_to_date_and_backfill(conn):
+    conn.execute("CREATE TABLE itens (chave INT PRIMARY KEY, dia VARCHAR(50), duracao VARCHAR(20))")
+    conn.executemany("INSERT INTO itens VALUES (?, ?, ?)", [
+        (1, "2025-06-01T10:00:00.000-03:00", "01:30"), (2, "15/06/2025", "00:45"), (3, "", None),
+    ])
+    conn.commit()
+    migrations = [
+        Migration(1, "dia em DATE", convert_to_temporal("itens", "dia", "DATE")),
+        Migration(2, "minutos", add_column(
+            "itens", "minutos", "INT",
+            backfill="CAST(SUBSTR(duracao, 1, 2) AS INT) * 60 + CAST(SUBSTR(duracao, 4, 2) AS INT)")),
+    ]
+    migrate(conn, "itens", migrations, dialect="sqlite")
+    assert column_types(conn, "itens")["dia"] == "DATE"
+    assert conn.execute("SELECT chave, dia, minutos FROM itens ORDER BY chave").fetchall() == [
+        (1, "2025-06-01", 90), (2, "2025-06-15", 45), (3, None, None),
+    ]
+
+
+def test_failed_migration_is_not_recorded(conn):
+    migrations = [
+        Migration(1, "tabela", "CREATE TABLE itens (chave INT PRIMARY KEY)"),
+        Migration(2, "coluna em tabela inexistente", "ALTER TABLE inexistente ADD COLUMN valor INT"),
+    ]
+    with pytest.raises(sqlite3.Error):
+        migrate(conn, "itens", migrations, dialect="sqlite")
+    # A versão 1 foi confirmada antes da falha; a 2 roda de novo na próxima execução
+    assert applied_versions(conn, "itens", dialect="sqlite") == {1}
+    migrations[1] = Migration(2, "coluna", add_column("itens", "valor", "INT"))
+    migrate(conn, "itens", migrations, dialect="sqlite")
+    assert applied_versions(conn, "itens", dialect="sqlite") == {1, 2}
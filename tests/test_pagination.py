@@ -0,0 +1,119 @@
+import threading
+
+import pytest
+
+from tickets_sync.pagination import FetchError, PageDeduplicator, iter_pages, page_fingerprint
+
+
+def records(*keys):
+    return [{"id": key} for key in keys]
+
+
+def scripted(pages):
+    """fetch_page que devolve as páginas roteirizadas (página -> registros, ou None para erro)."""
+    calls = []
+    lock = threading.Lock()
+
+    def fetch_page(page):
+        with lock:
+            calls.append(page)
+        return pages.get(page, [])
+
+    return fetch_page, calls
+
+
+# === PageDeduplicator ===
+
+def test_page_fingerprint_ignores_order():
+    assert page_fingerprint([1, 2, 3]) == page_fingerprint([3, 1, 2])
+    assert page_fingerprint([1, 2]) != page_fingerprint([1, 2, 3])
+
+
+def test_records_seen_in_earlier_pages_are_dropped():
+    dedup = PageDeduplicator("id")
+    assert dedup.filter(1, records(1, 2, 3)) == records(1, 2, 3)
+    assert dedup.filter(2, records(3, 4, 4, 5)) == records(4, 5)
+    assert dedup.duplicates == 2
+
+
+def test_records_without_key_are_kept():
+    dedup = PageDeduplicator("id")
+    assert dedup.filter(1, [{"id": None}, {"outro": 1}, {"id": 1}]) == [{"id": None}, {"outro": 1}, {"id": 1}]
+
+
+def test_repeated_page_stops():
+    dedup = PageDeduplicator("id")
+    dedup.filter(1, records(1, 2))
+    dedup.filter(2, records(3, 4))
+    assert dedup.filter(3, records(4, 3)) is None
+
+
+def test_page_without_new_keys_stops():
+    dedup = PageDeduplicator("id")
+    dedup.filter(1, records(1, 2))
+    dedup.filter(2, records(3, 4))
+    # Não repete nenhuma página inteira, mas só traz chaves já vistas
+    assert dedup.filter(3, records(2, 3)) is None
+
+
+# === iter_pages ===
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_pages_are_delivered_in_order_until_the_empty_page(workers):
+    fetch_page, calls = scripted({1: records(1), 2: records(2), 3: records(3)})
+    assert list(iter_pages(fetch_page, workers=workers)) == [(1, records(1)), (2, records(2)), (3, records(3))]
+    assert 4 in calls
+
+
+def test_limit_pages():
+    fetch_page, calls = scripted({page: records(page) for page in range(1, 10)})
+    assert [page for page, _ in iter_pages(fetch_page, page=3, limit_pages=5, workers=2)] == [3, 4, 5]
+    assert max(calls) == 5
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_cross_page_dedup(workers):
+    fetch_page, _ = scripted({1: records(1, 2), 2: records(2, 3), 3: records(4)})
+    assert list(iter_pages(fetch_page, workers=workers, key="id")) == [
+        (1, records(1, 2)), (2, records(3)), (3, records(4))]
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_endpoint_that_ignores_pagination_stops_at_the_second_page(workers):
+    # Como o endpoint de feedbacks: todas as páginas trazem o conjunto completo
+    fetch_page, calls = scripted({page: records(1, 2, 3) for page in range(1, 31)})
+    assert list(iter_pages(fetch_page, limit_pages=30, workers=workers, key="id")) == [(1, records(1, 2, 3))]
+    # Só as páginas já solicitadas pela janela deslizante foram buscadas
+    assert len(calls) <= 1 + workers
+
+
+def test_stops_on_page_without_new_keys():
+    fetch_page, _ = scripted({1: records(1, 2), 2: records(3), 3: records(1, 3), 4: records(9)})
+    assert [page for page, _ in iter_pages(fetch_page, workers=1, key="id")] == [1, 2]
+
+
+def test_failed_page_is_retried():
+    attempts = {}
+
+    def fetch_page(page):
+        attempts[page] = attempts.get(page, 0) + 1
+        if page == 2 and attempts[page] == 1:
+            return None
+        return records(page) if page <= 3 else []
+
+    assert [page for page, _ in iter_pages(fetch_page, workers=2, page_retries=1)] == [1, 2, 3]
+    assert attempts[2] == 2
+
+
+def test_fetch_error_after_retries_and_exceptions():
+    def fetch_page(page):
+        if page == 2:
+            raise ConnectionError("falha de rede")
+        return records(page) if page <= 3 else []
+
+    delivered = []
+    with pytest.raises(FetchError) as raised:
+        for page, _ in iter_pages(fetch_page, workers=3, page_retries=2):
+            delivered.append(page)
+    assert delivered == [1]
+    assert raised.value.page == 2
@@ -0,0 +1,189 @@
+import json
+import sqlite3
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+import Feedbacks.feedbacks as feedbacks
+import chamados.chamados as chamados
+import tickets_sync.reconcile as reconcile
+from tickets_sync.reconcile import KeySet, api_keys, orphan_keys, reconcile_window, remove_orphans
+
+WINDOW = (date(2025, 5, 1), date(2025, 5, 31))
+
+
+class FakeAPI:
+    """Cliente da API com as páginas roteirizadas: página -> lista de chaves, ou um status HTTP de erro."""
+
+    def __init__(self, pages, key="ticketKey"):
+        self.pages = pages
+        self.key = key
+        self.calls = []
+
+    def get(self, url, params=None, metrics=None, revalidate=False):
+        self.calls.append((params["page"], revalidate))
+        page = self.pages.get(params["page"], [])
+        if isinstance(page, int):
+            return SimpleNamespace(status_code=page, text="erro", content=b"")
+        body = json.dumps({"data": [{self.key: key} for key in page]}).encode()
+        return SimpleNamespace(status_code=200, text="", content=body)
+
+
+@pytest.fixture
+def api(monkeypatch):
+    def install(pages, key="ticketKey"):
+        fake = FakeAPI(pages, key)
+        monkeypatch.setattr(reconcile, "get_client", lambda: fake)
+        return fake
+    return install
+
+
+class Connection(sqlite3.Connection):
+    # O SQLite não tem ping(); a reconciliação o chama antes de cada etapa
+    def ping(self, **kwargs):
+        pass
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:", factory=Connection)
+    conn.execute("CREATE TABLE fato_chamados (ticketKey INT PRIMARY KEY, dataDeCriacao TEXT)")
+    conn.execute("CREATE TABLE sync_tombstones (entidade TEXT, chave TEXT, ticketKey INT, removidoEm TEXT, "
+                 "PRIMARY KEY (entidade, chave))")
+    conn.executemany("INSERT INTO fato_chamados VALUES (?, ?)",
+                     [(key, f"2025-05-{key:02d} 10:00:00") for key in range(1, 11)]
+                     + [(99, "2025-07-01 10:00:00")])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def stored(conn):
+    return [key for (key,) in conn.execute("SELECT ticketKey FROM fato_chamados ORDER BY ticketKey")]
+
+
+# === KeySet ===
+
+def test_integer_keys_are_sorted_and_unique():
+    keys = KeySet(integer=True)
+    for key in [5, "3", 9, 3, None, 5]:
+        keys.add(key)
+    assert list(keys) == [3, 5, 9]
+    assert len(keys) == 3
+    assert 3 in keys and "9" in keys
+    assert 4 not in keys
+    keys.add(1)
+    assert 1 in keys and list(keys) == [1, 3, 5, 9]
+
+
+def test_text_keys():
+    keys = KeySet(integer=False)
+    for key in ["b", "a", "b", None]:
+        keys.add(key)
+    assert len(keys) == 2
+    assert "a" in keys and "c" not in keys
+
+
+# === Chaves da API ===
+
+def test_api_keys_reads_until_the_empty_page(api):
+    fake = api({1: [1, 2, 3], 2: [4, 5]})
+    keys = api_keys(chamados, WINDOW, limit_pages=10)
+    assert list(keys) == [1, 2, 3, 4, 5]
+    # Todas as páginas consultam a API, sem servir o cache dentro do TTL
+    assert all(revalidate for _, revalidate in fake.calls)
+
+
+def test_overlapping_pages_are_kept(api):
+    # Um registro novo desloca a paginação: a página 2 repete uma chave, mas traz outras
+    api({1: [1, 2, 3], 2: [3, 4], 3: []})
+    assert list(api_keys(chamados, WINDOW, limit_pages=10)) == [1, 2, 3, 4]
+
+
+@pytest.mark.parametrize("pages", [
+    {1: [1, 2], 2: [3, 4], 3: [3, 4]},        # página repetida
+    {1: [1, 2], 2: [3, 4], 3: [4, 1]},        # página sem chaves novas
+    {1: [1, 2], 2: [2, 1], 3: [5]},           # página 2 igual à 1 em um endpoint paginado
+])
+def test_pages_without_new_keys_invalidate_the_window(api, pages):
+    api(pages)
+    assert api_keys(chamados, WINDOW, limit_pages=10) is None
+
+
+def test_fetch_error_invalidates_the_window(api):
+    api({1: [1, 2], 2: 500})
+    assert api_keys(chamados, WINDOW, limit_pages=10) is None
+
+
+def test_page_limit_invalidates_the_window(api):
+    api({1: [1], 2: [2], 3: [3]})
+    assert api_keys(chamados, WINDOW, limit_pages=2) is None
+
+
+def test_endpoint_that_ignores_pagination(api):
+    # Feedbacks: cada página devolve o conjunto completo, então a página 2 repete a 1
+    api({page: [1, 2, 3] for page in range(1, 31)}, key="ticketId")
+    assert list(api_keys(feedbacks)) == [1, 2, 3]
+
+
+# === Órfãos e remoção ===
+
+def test_orphan_keys():
+    stored_keys = KeySet(integer=True)
+    received = KeySet(integer=True)
+    for key in [1, 2, 3, 4]:
+        stored_keys.add(key)
+    for key in [2, 4, 5]:
+        received.add(key)
+    assert orphan_keys(stored_keys, received) == [1, 3]
+
+
+def test_remove_orphans(conn):
+    count, tickets = remove_orphans(conn, chamados, [2, 4, 404], batch_size=2, dialect="sqlite")
+    assert count == 2
+    assert tickets == {2, 4}
+    assert stored(conn) == [1, 3, 5, 6, 7, 8, 9, 10, 99]
+    assert sorted(conn.execute("SELECT entidade, chave, ticketKey FROM sync_tombstones")) == [
+        ("chamados", "2", 2), ("chamados", "4", 4)]
+
+    # Removida de novo (ex.: --mark e depois a remoção), a chave não duplica a marca
+    conn.execute("INSERT INTO fato_chamados VALUES (2, '2025-05-02 10:00:00')")
+    remove_orphans(conn, chamados, [2], dialect="sqlite")
+    assert conn.execute("SELECT COUNT(*) FROM sync_tombstones").fetchone() == (2,)
+
+
+def test_remove_orphans_mark_only(conn):
+    count, _ = remove_orphans(conn, chamados, [3], delete=False, dialect="sqlite")
+    assert count == 1
+    assert 3 in stored(conn)
+    assert conn.execute("SELECT chave FROM sync_tombstones").fetchall() == [("3",)]
+
+
+def test_reconcile_window_removes_only_the_window_orphans(conn, api, monkeypatch):
+    refreshed = []
+    monkeypatch.setattr(reconcile, "refresh_unified", lambda conn, tickets: refreshed.append(set(tickets)))
+    api({1: [1, 2, 3, 4, 5], 2: [6, 7, 8, 10]})
+    stats = reconcile_window(conn, chamados, WINDOW, dialect="sqlite")
+    assert stats["concluida"]
+    assert (stats["no_banco"], stats["registros"], stats["orfaos"], stats["removidos"]) == (10, 9, 1, 1)
+    # O chamado 99 está fora da janela e não é comparado
+    assert stored(conn) == [1, 2, 3, 4, 5, 6, 7, 8, 10, 99]
+    assert refreshed == [{9}]
+
+
+def test_reconcile_window_keeps_rows_when_the_api_list_is_short(conn, api):
+    # A paginação parou em uma página repetida: nada é removido, mesmo com --force
+    api({1: [1, 2, 3, 4, 5], 2: [1, 2, 3, 4, 5], 3: [6, 7, 8, 9, 10]})
+    stats = reconcile_window(conn, chamados, WINDOW, force=True, dialect="sqlite")
+    assert not stats["concluida"]
+    assert stats["removidos"] == 0
+    assert len(stored(conn)) == 11
+
+
+def test_reconcile_window_orphan_ratio_guard(conn, api):
+    api({1: [1, 2]})
+    stats = reconcile_window(conn, chamados, WINDOW, dialect="sqlite")
+    assert not stats["concluida"]
+    assert stats["orfaos"] == 8
+    assert len(stored(conn)) == 11
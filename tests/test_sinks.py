@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from tickets_sync.mapping import Field, RecordSpec
+from tickets_sync.sinks import NO_DATE_PARTITION, PARTITION_FILE, ParquetSink
+
+# Mesmo formato dos feedbacks: a data da avaliação fica nula até o ticket ser avaliado
+SPEC = RecordSpec("feedbacks", [
+    Field("ticketId", "INT", primary_key=True),
+    Field("nota", "DECIMAL(5,2)"),
+    Field("dataDeAvaliacao", "DATETIME"),
+])
+
+
+def make_sink(tmp_path):
+    return ParquetSink(SPEC, "dataDeAvaliacao", base_dir=str(tmp_path), flush_rows=1000)
+
+
+def stored(tmp_path):
+    """Chaves gravadas em cada partição."""
+    base = tmp_path / SPEC.table
+    return {
+        name[len("mes="):]: sorted(pq.read_table(base / name / PARTITION_FILE)["ticketId"].to_pylist())
+        for name in sorted(os.listdir(base))
+    }
+
+
+def test_rows_are_merged_by_key(tmp_path):
+    sink = make_sink(tmp_path)
+    sink.write([(1, None, "2024-01-10 08:00:00"), (2, None, "2024-01-11 08:00:00")])
+    sink.close()
+    sink = make_sink(tmp_path)
+    sink.write([(2, 4.5, "2024-01-11 08:00:00")])
+    sink.close()
+    assert stored(tmp_path) == {"2024-01": [1, 2]}
+    table = pq.read_table(tmp_path / SPEC.table / "mes=2024-01" / PARTITION_FILE)
+    assert table["nota"].to_pylist() == [None, 4.5]
+
+
+def test_key_leaves_its_previous_partition(tmp_path):
+    sink = make_sink(tmp_path)
+    sink.write([(1, None, None), (2, None, None)])
+    sink.close()
+    assert stored(tmp_path) == {NO_DATE_PARTITION: [1, 2]}
+
+    # O ticket 1 foi avaliado: passa para a partição do mês da avaliação
+    sink = make_sink(tmp_path)
+    sink.write([(1, 5.0, "2024-02-03 10:00:00")])
+    sink.close()
+    assert stored(tmp_path) == {"2024-02": [1], NO_DATE_PARTITION: [2]}
+    assert sink.moved == 1
+
+    # E de novo, quando a data da avaliação é corrigida
+    sink = make_sink(tmp_path)
+    sink.write([(1, 5.0, "2024-03-01 09:00:00")])
+    sink.close()
+    assert stored(tmp_path) == {"2024-02": [], "2024-03": [1], NO_DATE_PARTITION: [2]}
+
+
+def test_last_occurrence_wins_within_a_batch(tmp_path):
+    sink = make_sink(tmp_path)
+    sink.write([(1, None, None)])
+    sink.write([(1, 3.0, "2024-04-05 00:00:00")])
+    sink.close()
+    assert stored(tmp_path) == {"2024-04": [1]}
+    assert sink.written == 2
+
+
+def test_partitions_without_moved_keys_are_not_rewritten(tmp_path):
+    sink = make_sink(tmp_path)
+    sink.write([(1, None, "2024-01-10 08:00:00"), (2, None, "2024-05-10 08:00:00")])
+    sink.close()
+    path = tmp_path / SPEC.table / "mes=2024-01" / PARTITION_FILE
+    before = os.stat(path).st_mtime_ns
+
+    sink = make_sink(tmp_path)
+    sink.write([(2, 1.0, "2024-05-10 08:00:00"), (3, None, "2024-05-11 08:00:00")])
+    sink.close()
+    assert os.stat(path).st_mtime_ns == before
+    assert sink.moved == 0
+    assert stored(tmp_path) == {"2024-01": [1], "2024-05": [2, 3]}
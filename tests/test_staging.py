@@ -0,0 +1,101 @@
+import mysql.connector
+import pytest
+
+from tickets_sync.mapping import Field, RecordSpec
+from tickets_sync.staging import StagingLoader, parse_tsv_value, tsv_value
+
+SPEC = RecordSpec("bench", [
+    Field("ticketKey", "INT", primary_key=True),
+    Field("titulo", "VARCHAR(255)"),
+])
+BAD_KEY = "3"
+
+
+class FakeCursor:
+    """Cursor do MySQL simulado: LOAD DATA com o resultado roteirizado e INSERTs que rejeitam BAD_KEY."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 0
+        self.warning_count = 0
+
+    def execute(self, sql, params=None):
+        self.conn.statements.append(sql.split()[0])
+        self.rowcount, self.warning_count = 0, 0
+        if sql.startswith("LOAD DATA"):
+            with open(params[0], encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            self.rowcount = self.conn.loaded(len(lines)) if self.conn.loaded else len(lines)
+            self.warning_count = self.conn.warnings
+        elif sql.startswith("INSERT INTO bench (") and params is not None:
+            keys = [str(params[i]) for i in range(0, len(params), len(SPEC.write_columns))]
+            if BAD_KEY in keys:
+                raise mysql.connector.Error("Data too long for column 'titulo'")
+            self.conn.upserted.extend(keys)
+            self.rowcount = len(keys)
+        elif sql.startswith("INSERT INTO bench"):
+            self.conn.merged = True
+
+    def close(self):
+        pass
+
+
+class FakeConn:
+    def __init__(self, loaded=None, warnings=0):
+        self.loaded = loaded
+        self.warnings = warnings
+        self.statements = []
+        self.upserted = []
+        self.merged = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def stage(conn, tmp_path):
+    confirmed = []
+
+    def confirm(rows, key_index=0, failed=()):
+        failed = {str(key) for key in failed}
+        confirmed.extend(str(row[key_index]) for row in rows if str(row[key_index]) not in failed)
+
+    loader = StagingLoader(conn, SPEC, directory=str(tmp_path), confirm=confirm)
+    loader.write([(key, f"Chamado\t{key}", f"hash{key}") for key in range(1, 6)])
+    return loader, confirmed
+
+
+def test_tsv_round_trip():
+    for value in ["a\tb\nc\\d", "", "\\N literal"]:
+        assert parse_tsv_value(tsv_value(value)) == value
+    assert tsv_value(None) == "\\N" and parse_tsv_value("\\N") is None
+
+
+def test_complete_load_is_merged_and_confirmed(tmp_path):
+    conn = FakeConn()
+    loader, confirmed = stage(conn, tmp_path)
+    assert loader.merge() == 5
+    assert conn.merged
+    assert confirmed == ["1", "2", "3", "4", "5"]
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("loaded, warnings", [
+    (lambda lines: lines - 1, 0),   # uma linha descartada
+    (None, 1),                      # todas carregadas, mas uma truncada
+])
+def test_partial_load_falls_back_to_batched_inserts(tmp_path, loaded, warnings):
+    conn = FakeConn(loaded=loaded, warnings=warnings)
+    loader, confirmed = stage(conn, tmp_path)
+    assert loader.merge() == 4
+    # Nada é mesclado a partir da tabela de staging; o arquivo segue pelo INSERT em lotes
+    assert not conn.merged
+    assert sorted(conn.upserted) == ["1", "2", "4", "5"]
+    assert loader.failed == ["3"]
+    # A linha que não entrou não tem o hash confirmado e é reenviada na próxima execução
+    assert confirmed == ["1", "2", "4", "5"]
@@ -0,0 +1,49 @@
+import logging
+from datetime import datetime
+
+from tickets_sync.state import WatermarkTracker, check_since, parse_datetime, records_before, since_param
+
+
+def test_parse_datetime_formats():
+    expected = datetime(2025, 10, 30, 14, 5, 19)
+    assert parse_datetime("2025-10-30T14:05:19.000-03:00") == expected
+    assert parse_datetime("2025-10-30T14:05:19Z") == expected
+    assert parse_datetime("30/10/2025 14:05:19") == expected
+    assert parse_datetime("30/10/2025") == datetime(2025, 10, 30)
+    assert parse_datetime("") is None and parse_datetime("ontem") is None
+
+
+def test_since_param_applies_the_overlap():
+    assert since_param(datetime(2025, 5, 10, 8, 30), overlap_days=1) == "09/05/2025"
+    assert since_param(None) is None
+
+
+def test_watermark_tracker_keeps_the_latest_value():
+    tracker = WatermarkTracker("dataDeAlteracao")
+    tracker.update([{"dataDeAlteracao": "2025-05-01T10:00:00"}, {"dataDeAlteracao": None}])
+    tracker.update([{"dataDeAlteracao": "2025-04-01T10:00:00"}, {"dataDeAlteracao": "2025-05-02T00:00:00"}])
+    assert tracker.value == datetime(2025, 5, 2)
+
+
+def test_records_before():
+    records = [{"dataDeAlteracao": "2025-05-09T00:00:00"}, {"dataDeAlteracao": "2025-05-08T23:59:59"},
+               {"dataDeAlteracao": None}]
+    assert records_before(records, "dataDeAlteracao", "09/05/2025") == 1
+
+
+def test_check_since_warns_when_the_filter_is_ignored(caplog):
+    pages = [(1, [{"dataDeAlteracao": "2025-01-02T00:00:00"}, {"dataDeAlteracao": "2025-05-12T00:00:00"}]),
+             (2, [{"dataDeAlteracao": "2024-01-01T00:00:00"}])]
+    with caplog.at_level(logging.ERROR):
+        # As páginas seguem para a gravação: a carga continua correta, só relê o histórico
+        assert list(check_since(iter(pages), "dataDeAlteracao", "dataDeAlteracaoInicial", "09/05/2025")) == pages
+    errors = [r.getMessage() for r in caplog.records if r.levelno == logging.ERROR]
+    assert len(errors) == 1
+    assert "dataDeAlteracaoInicial" in errors[0] and "1 de 2" in errors[0]
+
+
+def test_check_since_is_quiet_when_the_filter_is_applied(caplog):
+    pages = [(3, [{"dataDeAlteracao": "2025-05-09T08:00:00"}])]
+    with caplog.at_level(logging.ERROR):
+        assert list(check_since(iter(pages), "dataDeAlteracao", "dataDeAlteracaoInicial", "09/05/2025")) == pages
+    assert not caplog.records
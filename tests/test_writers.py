@@ -0,0 +1,157 @@
+import sqlite3
+import threading
+
+import pytest
+
+from tickets_sync.writers import PartitionedWriter, partition
+
+COLUMNS = ("chave", "valor", "rowHash")
+# Um CHECK rejeita as linhas com valor 'ruim', como uma linha inválida no MySQL
+CREATE_SQL = "CREATE TABLE itens (chave INTEGER PRIMARY KEY, valor TEXT CHECK (valor != 'ruim'), rowHash TEXT)"
+
+
+class Databases:
+    """Um arquivo SQLite por conexão, na ordem em que o PartitionedWriter as abre (conexão i = thread i)."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.paths = []
+        self.closed = 0
+        self._lock = threading.Lock()
+
+    def connect(self):
+        with self._lock:
+            path = str(self.directory / f"writer{len(self.paths)}.db")
+            self.paths.append(path)
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute(CREATE_SQL)
+        databases = self
+
+        class Connection:
+            # Conta os close() para conferir que todas as conexões foram devolvidas
+            def __getattr__(self, name):
+                return getattr(conn, name)
+
+            def close(self):
+                with databases._lock:
+                    databases.closed += 1
+                conn.close()
+
+        return Connection()
+
+    def rows(self, index):
+        conn = sqlite3.connect(self.paths[index])
+        try:
+            return dict(conn.execute("SELECT chave, valor FROM itens"))
+        finally:
+            conn.close()
+
+
+@pytest.fixture
+def databases(tmp_path):
+    return Databases(tmp_path)
+
+
+def make_writer(databases, workers=3, committed=0, confirm=None):
+    return PartitionedWriter("itens", COLUMNS, "chave", workers=workers, committed=committed,
+                             connect=databases.connect, dialect="sqlite", confirm=confirm)
+
+
+def page_rows(keys, valor="ok"):
+    return [(key, f"{valor}{key}" if valor != "ruim" else valor, f"h{key}") for key in keys]
+
+
+def test_partition_is_stable():
+    # Inteiros pelo resto da divisão; textos pelo CRC32, igual em todas as execuções (ao contrário de hash())
+    assert [partition(key, 4) for key in (0, 5, 10, 11)] == [0, 1, 2, 3]
+    assert partition("8f9c2f4e-uuid", 4) == partition("8f9c2f4e-uuid", 4)
+    assert partition("abc", 7) == 891568578 % 7
+
+
+def test_each_key_always_goes_to_the_same_worker(databases):
+    writer = make_writer(databases)
+    writer.write(page_rows(range(1, 31)), page=1)
+    # Nova versão das mesmas chaves: a mesma thread grava as duas versões, na ordem
+    writer.write(page_rows(range(1, 31), valor="v2-"), page=2)
+    assert writer.close() == 60
+    assert writer.committed == 2
+    assert databases.closed == 3
+    seen = {}
+    for index in range(3):
+        rows = databases.rows(index)
+        assert all(partition(key, 3) == index for key in rows)
+        assert all(valor == f"v2-{key}" for key, valor in rows.items())
+        seen.update(rows)
+    assert sorted(seen) == list(range(1, 31))
+
+
+def test_committed_stops_before_the_first_page_with_failed_rows(databases):
+    confirmed = []
+    lock = threading.Lock()
+
+    def confirm(rows, key_index=0, failed=()):
+        with lock:
+            confirmed.extend(row[key_index] for row in rows if row[key_index] not in failed)
+
+    writer = make_writer(databases, committed=10, confirm=confirm)
+    writer.write(page_rows([1, 2, 3]), page=11)
+    # A chave 4 (thread 1) falha na página 12; as demais threads seguem até a 14
+    writer.write(page_rows([5, 6]) + page_rows([4], valor="ruim"), page=12)
+    writer.write(page_rows([7, 8, 9]), page=13)
+    writer.write(page_rows([10, 11, 12]), page=14)
+    writer.close()
+    assert writer.failed == [4]
+    assert writer.committed == 11
+    assert writer.written == 11
+    assert sorted(confirmed) == [1, 2, 3, 5, 6, 7, 8, 9, 10, 11, 12]
+
+
+def test_committed_starts_at_the_resumed_page(databases):
+    writer = make_writer(databases, committed=7)
+    assert writer.committed == 7
+    writer.write([], page=8)
+    writer.close()
+    assert writer.committed == 8
+
+
+def test_worker_error_is_raised_on_close(databases):
+    def confirm(rows, key_index=0, failed=()):
+        if any(row[key_index] == 2 for row in rows):
+            raise RuntimeError("falha na confirmação")
+
+    writer = make_writer(databases, confirm=confirm)
+    writer.write(page_rows([1, 2, 3]), page=1)
+    writer.write(page_rows([4, 5, 6]), page=2)
+    with pytest.raises(RuntimeError):
+        writer.close()
+    # A thread com erro não avança: o checkpoint fica antes da página 1
+    assert writer.committed == 0
+    assert databases.closed == 3
+
+
+def test_close_without_raising_after_another_error(databases):
+    def confirm(rows, key_index=0, failed=()):
+        raise RuntimeError("falha na confirmação")
+
+    writer = make_writer(databases, confirm=confirm)
+    writer.write(page_rows([1, 2, 3]), page=1)
+    # No encerramento depois de outro erro, o erro da thread fica só no log
+    writer.close(raise_errors=False)
+    assert writer.committed == 0
+    assert databases.closed == 3
+    # close() pode ser chamado de novo; com raise_errors, o erro guardado é relançado
+    writer.close(raise_errors=False)
+    with pytest.raises(RuntimeError):
+        writer.close()
+    assert databases.closed == 3
+
+
+def test_write_raises_a_previous_worker_error(databases):
+    def confirm(rows, key_index=0, failed=()):
+        raise RuntimeError("falha na confirmação")
+
+    writer = make_writer(databases, workers=1, confirm=confirm)
+    writer.write(page_rows([1]), page=1)
+    writer.close(raise_errors=False)
+    with pytest.raises(RuntimeError):
+        writer.write(page_rows([2]), page=2)
@@ -0,0 +1 @@
+# Módulos compartilhados pelos scripts de sincronização (chamados, apontamentos e feedbacks).
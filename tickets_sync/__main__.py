@@ -0,0 +1,5 @@
+import sys
+
+from tickets_sync.cli import main
+
+sys.exit(main())
@@ -0,0 +1,501 @@
+import time
+import asyncio
+import logging
+import contextvars
+from collections import deque
+from contextlib import aclosing
+from urllib.parse import urlparse
+
+from tickets_sync.backfill import window_state_key
+from tickets_sync.changes import RowHashIndex
+from tickets_sync.client import (
+    DEFAULT_HEADERS, RETRY_STATUS, ClientStats, TokenBucket, backoff_delay, retry_after_seconds,
+)
+from tickets_sync.config import (
+    API_EMAIL, API_TOKEN, API_POOL_SIZE, API_TIMEOUT, API_FETCH_WORKERS, API_PAGE_RETRIES,
+    API_MAX_RETRIES, API_RATE_LIMIT, API_RATE_BURST, DB_BATCH_SIZE, DB_CONFIG, DB_POOL_SIZE,
+)
+from tickets_sync.db import build_upsert_sql, connect_db
+from tickets_sync.dimensions import DimensionWriter
+from tickets_sync.pagination import FetchError, PageDeduplicator
+from tickets_sync.schema import prepare_schema
+from tickets_sync.sinks import open_sink
+from tickets_sync.state import (
+    SAVE_CHECKPOINT_SQL, WatermarkTracker, checkpoint_params, clear_checkpoint, get_checkpoint, get_watermark,
+    records_before, save_watermark, since_param,
+)
+from tickets_sync.telemetry import NO_METRICS, RunMetrics
+from tickets_sync.unified import refresh_unified
+
+try:
+    import aiohttp
+    import aiomysql
+    import pymysql
+except ImportError:
+    aiohttp = None
+
+# === Motor assíncrono (asyncio) ===
+# Busca as páginas das entidades e grava no MySQL em um único event loop, sem
+# threads por entidade: cada endpoint tem sua janela de páginas em andamento
+# (concorrência limitada), todas as requisições passam pelo mesmo limitador de
+# taxa e as gravações usam um pool do aiomysql. As operações pontuais de
+# controle (migrações, índice de hashes, marca d'água e tabela unificada) usam
+# as funções síncronas de sempre, fora do event loop (asyncio.to_thread).
+#
+# O motor lê de cada script: ENTIDADE, SPEC, PRIMARY_KEY, TICKET_INDEX, DECODER,
+# PARQUET_PARTITION, page_request() e ensure_table_exists(); WATERMARK_FIELD e
+# FILTRO_ALTERACAO ativam a sincronização incremental, e FETCH_WORKERS limita a
+# concorrência do endpoint.
+
+# Entidade da tarefa atual, exibida no lugar do nome da thread nos logs
+_current_entity = contextvars.ContextVar("entidade", default=None)
+
+
+class _EntityLogFilter(logging.Filter):
+    def filter(self, record):
+        entity = _current_entity.get()
+        if entity:
+            record.threadName = entity
+        return True
+
+
+def _require_async_deps():
+    if aiohttp is None:
+        raise RuntimeError("O motor assíncrono requer aiohttp e aiomysql (pip install aiohttp aiomysql).")
+
+
+# === Cliente HTTP assíncrono ===
+
+class AsyncResponse:
+    """Resposta já lida, com os atributos usados da resposta do requests."""
+
+    def __init__(self, status_code, content, headers):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+
+class AsyncAceleratoClient(ClientStats):
+    """Equivalente assíncrono do AceleratoClient (aiohttp), com os mesmos retries e limitador de taxa."""
+
+    def __init__(self, email=None, token=None, pool_size=None, timeout=None,
+                 max_retries=None, rate_limit=None, rate_burst=None):
+        _require_async_deps()
+        super().__init__()
+        self.auth = aiohttp.BasicAuth(email or API_EMAIL or "", token or API_TOKEN or "")
+        self.timeout = aiohttp.ClientTimeout(total=timeout or API_TIMEOUT)
+        self.pool_size = pool_size or API_POOL_SIZE
+        self.max_retries = API_MAX_RETRIES if max_retries is None else max_retries
+        self.limiter = TokenBucket(
+            API_RATE_LIMIT if rate_limit is None else rate_limit,
+            API_RATE_BURST if rate_burst is None else rate_burst,
+        )
+        self.session = None
+
+    async def __aenter__(self):
+        # O aiohttp negocia gzip e mantém as conexões abertas por conta própria
+        headers = {k: v for k, v in DEFAULT_HEADERS.items() if k not in ("Accept-Encoding", "Connection")}
+        self.session = aiohttp.ClientSession(
+            auth=self.auth, headers=headers, timeout=self.timeout,
+            connector=aiohttp.TCPConnector(limit=self.pool_size),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    async def _acquire(self):
+        while True:
+            wait = self.limiter.try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    async def get(self, url, params=None, metrics=NO_METRICS):
+        # Mesmo uso do cache em disco que o cliente síncrono
+        cache = self.cache
+        entry = cache.lookup(url, params) if cache is not None else None
+        if entry is not None and entry.is_fresh(cache.ttl):
+            content = cache.read(entry, "hit")
+            if content is not None:
+                metrics.count("cache_hits")
+                logging.info(f"GET {urlparse(url).path} {params or ''} -> cache local ({len(content)} bytes)")
+                return AsyncResponse(200, content, entry.headers)
+
+        response = await self._request(url, params, metrics, entry.conditional_headers() if entry else None)
+        if cache is None:
+            return response
+        if response.status_code == 304 and entry is not None:
+            content = cache.read(entry, "revalidated")
+            if content is not None:
+                cache.revalidate(entry, response.headers)
+                metrics.count("cache_revalidados")
+                return AsyncResponse(200, content, entry.headers)
+            response = await self._request(url, params, metrics)
+        if response.status_code == 200:
+            cache.miss()
+            metrics.count("cache_misses")
+            cache.store(url, params, response.headers, response.content)
+        return response
+
+    async def _request(self, url, params=None, metrics=NO_METRICS, headers=None):
+        path = urlparse(url).path
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            await self._acquire()
+            start = time.perf_counter()
+            try:
+                async with self.session.get(url, params=params, headers=headers) as raw:
+                    content = await raw.read()
+                    response = AsyncResponse(raw.status, content, raw.headers)
+                    wire_bytes = raw.content_length or len(content)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                self._count(metrics, retry=not last_attempt)
+                if last_attempt:
+                    raise
+                delay = backoff_delay(attempt)
+                logging.warning(f"GET {path} {params or ''} falhou ({err!r}); nova tentativa em {delay:.1f}s.")
+                await asyncio.sleep(delay)
+                continue
+            elapsed = time.perf_counter() - start
+
+            retry = response.status_code in RETRY_STATUS and not last_attempt
+            self._count(metrics, wire_bytes, retry=retry, elapsed=elapsed)
+            encoding = response.headers.get("Content-Encoding", "identity")
+            logging.info(
+                f"GET {path} {params or ''} -> {response.status_code} "
+                f"em {elapsed:.2f}s ({wire_bytes} bytes, {encoding})"
+            )
+            if not retry:
+                return response
+
+            delay = retry_after_seconds(response)
+            if delay is None:
+                delay = backoff_delay(attempt)
+            logging.warning(
+                f"GET {path} {params or ''} -> {response.status_code}; "
+                f"tentativa {attempt + 1}/{self.max_retries} em {delay:.1f}s."
+            )
+            await asyncio.sleep(delay)
+
+
+# === Paginação assíncrona ===
+
+async def aiter_pages(fetch_page, page=1, limit_pages=None, concurrency=None, key=None, page_retries=None):
+    """Versão assíncrona de iter_pages: até `concurrency` páginas em andamento, entregues em ordem.
+
+    `fetch_page(n)` é uma corrotina com o mesmo contrato da versão síncrona
+    (registros, lista vazia ao fim dos dados ou None em caso de erro).
+    """
+    concurrency = max(1, concurrency or API_FETCH_WORKERS)
+    page_retries = API_PAGE_RETRIES if page_retries is None else page_retries
+    attempts = {}
+    dedup = PageDeduplicator(key) if key else None
+    next_page = page
+    pending = deque()
+
+    def schedule():
+        nonlocal next_page
+        while len(pending) < concurrency and (not limit_pages or next_page <= limit_pages):
+            pending.append((next_page, asyncio.ensure_future(fetch_page(next_page))))
+            next_page += 1
+
+    try:
+        schedule()
+        while pending:
+            current_page, task = pending.popleft()
+            try:
+                items = await task
+            except Exception as err:
+                logging.error(f"Erro ao buscar página {current_page}: {err}")
+                items = None
+            if items is None:
+                attempts[current_page] = attempts.get(current_page, 0) + 1
+                if attempts[current_page] > page_retries:
+                    raise FetchError(current_page)
+                logging.warning(f"Repetindo página {current_page} (tentativa {attempts[current_page]}/{page_retries}).")
+                pending.appendleft((current_page, asyncio.ensure_future(fetch_page(current_page))))
+                continue
+            if not items:
+                break
+            if dedup is not None:
+                items = dedup.filter(current_page, items)
+                if items is None:
+                    break
+            schedule()
+            yield current_page, items
+    finally:
+        # Páginas posteriores já solicitadas são descartadas
+        for _, task in pending:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+
+
+# === Gravação assíncrona (aiomysql) ===
+
+async def create_async_pool(size=None):
+    _require_async_deps()
+    return await aiomysql.create_pool(
+        minsize=1, maxsize=size or DB_POOL_SIZE, autocommit=False, charset="utf8mb4",
+        host=DB_CONFIG["host"], user=DB_CONFIG["user"], password=DB_CONFIG["password"] or "", db=DB_CONFIG["database"],
+    )
+
+
+async def _insert_rows_one_by_one(conn, cursor, table, columns, key, batch, failed):
+    sql = build_upsert_sql(table, columns, key)
+    key_index = columns.index(key)
+    written = 0
+    for row in batch:
+        try:
+            await cursor.execute(sql, row)
+            written += 1
+        except pymysql.MySQLError as err:
+            logging.error(f"Erro ao inserir {key}={row[key_index]} em {table}: {err}")
+            failed.append(row[key_index])
+    await conn.commit()
+    return written
+
+
+async def bulk_upsert_async(pool, table, columns, rows, key, batch_size=None, metrics=None, failed=None):
+    """Versão assíncrona de bulk_upsert: lotes multi-linha, commit por lote e fallback linha a linha."""
+    failed = [] if failed is None else failed
+    batch_size = batch_size or DB_BATCH_SIZE
+    columns = list(columns)
+    rows = list(rows)
+    statements = {}
+    written = 0
+
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                if len(batch) not in statements:
+                    statements[len(batch)] = build_upsert_sql(table, columns, key, rows=len(batch))
+                params = [value for row in batch for value in row]
+                try:
+                    await cursor.execute(statements[len(batch)], params)
+                    start_commit = time.perf_counter()
+                    await conn.commit()
+                    if metrics is not None:
+                        metrics.observe("db_commit_segundos", time.perf_counter() - start_commit)
+                    written += len(batch)
+                except pymysql.MySQLError as err:
+                    await conn.rollback()
+                    logging.warning(
+                        f"Falha no lote {start // batch_size + 1} de {table} ({len(batch)} linhas): {err}. "
+                        f"Reprocessando linha a linha."
+                    )
+                    written += await _insert_rows_one_by_one(conn, cursor, table, columns, key, batch, failed)
+    return written
+
+
+async def save_checkpoint_async(pool, entidade, pagina, filtros, watermark=None):
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(SAVE_CHECKPOINT_SQL, checkpoint_params(entidade, pagina, filtros, watermark))
+        await conn.commit()
+
+
+# === Sincronização de uma entidade ===
+
+def _prepare_schema(modules):
+    # Uma vez, antes das tarefas: as entidades não disputam schema_migrations nem chamados_unificados
+    conn = connect_db()
+    try:
+        prepare_schema(conn, modules)
+    finally:
+        conn.close()
+
+
+async def sync_entity(module, client, pool, limit_pages=None, full=False, resume=False):
+    """Equivalente assíncrono do main() de um script (sem carga em massa)."""
+    entidade = module.ENTIDADE
+    spec = module.SPEC
+    incremental = hasattr(module, "WATERMARK_FIELD")
+    metrics = RunMetrics(entidade)
+    # Mesmas chaves de sync_checkpoint do runner com threads; o motor assíncrono não carrega janelas
+    state_key = window_state_key(entidade, None)
+    logging.info("=== Iniciando sincronização com API Acelerato (motor assíncrono) ===")
+
+    conn = await asyncio.to_thread(connect_db)
+    sink = None
+    try:
+        hashes = await asyncio.to_thread(RowHashIndex, conn, spec.fact_table, module.PRIMARY_KEY)
+        sink = open_sink(spec, module.PARQUET_PARTITION)
+        dimensions = DimensionWriter(spec)
+
+        tracker = WatermarkTracker(module.WATERMARK_FIELD) if incremental else None
+        watermark = await asyncio.to_thread(get_watermark, conn, entidade) if incremental and not full else None
+        checkpoint = await asyncio.to_thread(get_checkpoint, conn, state_key) if incremental and resume else None
+        start_page = 1
+        if checkpoint:
+            start_page = checkpoint["pagina"] + 1
+            filtros = checkpoint["filtros"]
+            tracker.value = checkpoint["watermark"]
+            logging.info(f"Retomando carga interrompida a partir da página {start_page}.")
+        elif watermark:
+            filtros = {module.FILTRO_ALTERACAO: since_param(watermark)}
+            logging.info(f"Sincronização incremental: alterações desde {filtros[module.FILTRO_ALTERACAO]}.")
+        else:
+            filtros = {}
+            logging.info("Sincronização completa.")
+
+        async def fetch_page(page):
+            url, params = module.page_request(page, filtros)
+            with metrics.phase("fetch"):
+                response = await client.get(url, params=params, metrics=metrics)
+            if response.status_code != 200:
+                logging.error(f"Erro ao buscar página {page}: {response.status_code} - {response.text}")
+                return None
+            try:
+                with metrics.phase("decode"):
+                    records = module.DECODER.decode(response.content)
+            except Exception as e:
+                logging.error(f"Erro ao decodificar JSON da página {page}: {e}")
+                return None
+            if not records:
+                logging.info(f"Nenhum registro encontrado na página {page}. Encerrando.")
+            return records
+
+        last_allowed = limit_pages and start_page + limit_pages - 1
+        concurrency = getattr(module, "FETCH_WORKERS", None) or API_FETCH_WORKERS
+        total = 0
+        touched = set()
+        last_page = 0
+        # Como no motor com threads, linhas não gravadas deixam a execução incompleta
+        first_failed = None
+
+        def failures():
+            return hashes.failed + dimensions.failed
+
+        try:
+            pages = aiter_pages(fetch_page, page=start_page, limit_pages=last_allowed,
+                                concurrency=concurrency, key=module.PRIMARY_KEY)
+            since = filtros.get(module.FILTRO_ALTERACAO) if incremental else None
+            # As próximas páginas continuam sendo buscadas enquanto a atual é gravada
+            async with aclosing(pages):
+                async for current_page, records in pages:
+                    logging.info(f"Página {current_page} processada com {len(records)} registros.")
+                    # Como no runner, a primeira página confere se a API aplicou o filtro de alteração
+                    if since and current_page == start_page and records_before(records, module.WATERMARK_FIELD, since):
+                        logging.error(f"A API parece ignorar o filtro {module.FILTRO_ALTERACAO}: a página {current_page} "
+                                      f"trouxe registros alterados antes de {since}, e a carga relê todo o histórico.")
+                    metrics.count("paginas")
+                    with metrics.phase("transform"):
+                        rows = spec.extract_many(records)
+                    if sink is not None:
+                        with metrics.phase("parquet"):
+                            sink.write(rows)
+                    with metrics.phase("transform"):
+                        rows = hashes.changed_rows(rows)
+                    with metrics.phase("write"):
+                        for link, dimension_rows in dimensions.pending(rows):
+                            failed = []
+                            dimensions.written += await bulk_upsert_async(
+                                pool, link.dimension.table, link.columns, dimension_rows, key=link.dimension.key,
+                                failed=failed)
+                            dimensions.forget(link, failed)
+                        facts = spec.fact_rows(rows)
+                        failed = []
+                        written = await bulk_upsert_async(pool, spec.fact_table, spec.write_columns, facts,
+                                                          key=module.PRIMARY_KEY, metrics=metrics, failed=failed)
+                        hashes.confirm(facts, failed=failed)
+                    metrics.count("linhas_gravadas", written)
+                    logging.info(f"{written} de {len(records)} registros inseridos/atualizados no banco.")
+                    touched.update(row[module.TICKET_INDEX] for row in rows)
+                    total += len(records)
+                    last_page = current_page
+                    if first_failed is None and failures():
+                        first_failed = current_page
+                    if tracker is not None:
+                        tracker.update(records)
+                        # O checkpoint para antes da primeira página com linhas não gravadas
+                        if first_failed is None:
+                            await save_checkpoint_async(pool, state_key, current_page, filtros, tracker.value)
+            concluida = not (last_allowed and last_page >= last_allowed) and not failures()
+        except FetchError as err:
+            logging.error(f"Sincronização interrompida ({err}); marca d'água mantida. Use --resume para continuar.")
+            concluida = False
+        else:
+            if failures():
+                logging.error(f"{failures()} linhas não gravadas; marca d'água mantida. Use --resume para continuar.")
+            elif not concluida:
+                logging.warning(f"Limite de {limit_pages} páginas atingido; marca d'água mantida. Use --resume para continuar.")
+            elif tracker is not None:
+                if tracker.value:
+                    await asyncio.to_thread(save_watermark, conn, entidade, max(tracker.value, watermark or tracker.value))
+                await asyncio.to_thread(clear_checkpoint, conn, state_key)
+
+        with metrics.phase("unified"):
+            await asyncio.to_thread(refresh_unified, conn, touched)
+    finally:
+        # Em um erro de banco, de transformação ou no cancelamento da tarefa, o destino Parquet
+        # e a conexão também são fechados; o checkpoint já está na última página gravada
+        if sink is not None:
+            with metrics.phase("parquet"):
+                sink.close()
+        conn.close()
+
+    logging.info(hashes.summary())
+    if dimensions.links:
+        logging.info(dimensions.summary())
+    if not total:
+        logging.warning("Nenhum registro encontrado para sincronizar.")
+    logging.info("=== Sincronização concluída ===")
+    return {
+        "entidade": entidade,
+        "registros": total,
+        "inseridos": hashes.inserted,
+        "atualizados": hashes.updated,
+        "inalterados": hashes.unchanged,
+        "falhas": failures(),
+        "concluida": concluida,
+        "telemetria": metrics.snapshot(),
+    }
+
+
+async def _run_entity(module, limit_pages, client, pool, full, resume):
+    _current_entity.set(module.ENTIDADE)
+    start = time.perf_counter()
+    try:
+        stats = await sync_entity(module, client, pool, limit_pages, full, resume)
+    except Exception as err:
+        logging.exception(f"Falha na sincronização de {module.ENTIDADE}: {err}")
+        stats = {"entidade": module.ENTIDADE, "registros": 0, "concluida": False, "erro": str(err)}
+    stats["segundos"] = time.perf_counter() - start
+    return stats
+
+
+async def run_async(jobs, full=False, resume=False, pool_size=None):
+    """Sincroniza as entidades de `jobs` ([(módulo, limite de páginas)]) no mesmo event loop."""
+    _require_async_deps()
+    log_filter = _EntityLogFilter()
+    handlers = logging.getLogger().handlers
+    for handler in handlers:
+        handler.addFilter(log_filter)
+    try:
+        await asyncio.to_thread(_prepare_schema, [module for module, _ in jobs])
+        pool = await create_async_pool(max(len(jobs), pool_size or DB_POOL_SIZE))
+        try:
+            async with AsyncAceleratoClient() as client:
+                # Cada entidade é uma tarefa; cópias do contexto isolam o nome usado nos logs
+                results = await asyncio.gather(*(
+                    _run_entity(module, limit_pages, client, pool, full, resume) for module, limit_pages in jobs
+                ))
+                logging.info(client.summary())
+        finally:
+            pool.close()
+            await pool.wait_closed()
+    finally:
+        for handler in handlers:
+            handler.removeFilter(log_filter)
+    return results
+
+
+def run(jobs, full=False, resume=False, pool_size=None):
+    """Ponto de entrada síncrono do motor assíncrono; retorna as estatísticas de cada entidade."""
+    return asyncio.run(run_async(jobs, full=full, resume=resume, pool_size=pool_size))
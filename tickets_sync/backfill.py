@@ -0,0 +1,207 @@
+import os
+import sys
+import time
+import logging
+import importlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+from tickets_sync.config import setup_logging
+from tickets_sync.db import connect_db
+from tickets_sync.pagination import FetchError
+from tickets_sync.schema import prepare_schema
+from tickets_sync.state import get_watermark, parse_datetime, save_watermark
+from tickets_sync.unified import rebuild_unified
+
+# Os scripts de cada entidade ficam na raiz do repositório (também nos processos filhos)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# === Backfill por janelas de datas ===
+# A paginação por número de página não pode ser dividida com segurança: as páginas se
+# deslocam quando novos registros chegam durante uma carga longa. O backfill divide o
+# histórico em janelas de data sem sobreposição (semanais por padrão) e cada janela é
+# paginada do início ao fim por um processo do pool, ou por uma execução isolada do
+# script com --window-start/--window-end, em outra máquina se preciso. Cada registro
+# cai em uma única janela, então o resultado não depende da ordem em que elas terminam.
+
+WINDOW_DAYS = 7
+# Formato dos filtros de data da API
+API_DATE_FORMAT = "%d/%m/%Y"
+
+LOG_FORMAT = '%(asctime)s [%(levelname)s] [%(processName)s %(threadName)s] %(message)s'
+
+
+def parse_day(value):
+    """Data a partir de dd/mm/aaaa ou aaaa-mm-dd."""
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"Data inválida: {value!r} (use dd/mm/aaaa ou aaaa-mm-dd)")
+    return parsed.date()
+
+
+def date_windows(start, end, days=WINDOW_DAYS):
+    """Janelas (início, fim), com os dois dias inclusivos e sem sobreposição, cobrindo de start a end."""
+    start, end = parse_day(start), parse_day(end)
+    if days < 1:
+        raise ValueError("A janela precisa ter pelo menos 1 dia.")
+    windows = []
+    while start <= end:
+        last = min(end, start + timedelta(days=days - 1))
+        windows.append((start, last))
+        start = last + timedelta(days=1)
+    return windows
+
+
+def parse_window(start, end, default_start):
+    """Janela única de --window-start/--window-end (sem nenhum dos dois, None)."""
+    if not (start or end):
+        return None
+    window = (parse_day(start or default_start), parse_day(end) if end else date.today())
+    if window[0] > window[1]:
+        raise ValueError(f"Janela vazia: {window_label(window)}")
+    return window
+
+
+def window_label(window):
+    return f"{window[0]:%Y-%m-%d}..{window[1]:%Y-%m-%d}"
+
+
+def window_state_key(entidade, window):
+    # Cada janela tem seu próprio checkpoint em sync_checkpoint, para o --resume por janela
+    return f"{entidade}:{window_label(window)}" if window else entidade
+
+
+def window_filters(params, window):
+    """Filtros da API para a janela; `params` são os nomes dos filtros de data mínima e máxima."""
+    start_param, end_param = params
+    return {start_param: window[0].strftime(API_DATE_FORMAT), end_param: window[1].strftime(API_DATE_FORMAT)}
+
+
+class WindowFilterError(FetchError):
+    """A API devolveu registros fora da janela pedida: o endpoint ignorou os filtros de data."""
+
+    def __init__(self, page, message):
+        Exception.__init__(self, message)
+        self.page = page
+
+
+def _record_value(record, path):
+    # Lê o caminho do SPEC em um dicionário ou registro tipado (ambos expõem .get)
+    for step in path:
+        if isinstance(step, int):
+            record = record[step] if isinstance(record, list) and len(record) > step else None
+        else:
+            record = record.get(step) if record is not None else None
+    return record
+
+
+def check_window(pages, module, window):
+    """Repassa as páginas de (página, registros), conferindo a coluna da janela de cada registro.
+
+    Se um endpoint ignorar os filtros de data, cada janela paginaria todo o histórico
+    posterior, regravando as mesmas linhas em todos os processos. A primeira página com
+    registros fora da janela interrompe a carga (WindowFilterError, antes de gravá-la),
+    e a janela fica incompleta. Registros sem data não são conferidos.
+    """
+    path = next(f.path for f in module.SPEC.fields if f.column == module.COLUNA_JANELA)
+    for page, records in pages:
+        outside = 0
+        for record in records:
+            value = parse_datetime(_record_value(record, path))
+            if value is not None and not window[0] <= value.date() <= window[1]:
+                outside += 1
+        if outside:
+            raise WindowFilterError(
+                page, f"{outside} registros da página {page} fora da janela {window_label(window)} em "
+                      f"{module.COLUNA_JANELA}; o endpoint ignorou os filtros {', '.join(module.FILTROS_JANELA)}"
+            )
+        yield page, records
+
+
+def window_where(column, window):
+    """Cláusula (SQL, parâmetros) que restringe a tabela às linhas da janela."""
+    return f"{column} >= %s AND {column} < %s", (window[0], window[1] + timedelta(days=1))
+
+
+def run_window(module_name, window, limit_pages, resume, bulk, log_file):
+    """Carrega uma janela de uma entidade; executada em um processo do pool."""
+    module = importlib.import_module(module_name)
+    setup_logging(log_file, LOG_FORMAT)
+    threading.current_thread().name = window_state_key(module.ENTIDADE, window)
+    start = time.perf_counter()
+    try:
+        stats = module.main(
+            limit_pages=limit_pages or module.LIMITE_DE_PAGINAS,
+            full=True,
+            resume=resume,
+            bulk=bulk,
+            window=window,
+            unified=False,
+            migrate=False,
+        )
+    except Exception as err:
+        logging.exception(f"Falha na janela {window_label(window)} de {module.ENTIDADE}: {err}")
+        stats = {"entidade": module.ENTIDADE, "janela": window_label(window), "registros": 0,
+                 "concluida": False, "erro": str(err)}
+    stats["segundos"] = time.perf_counter() - start
+    return stats
+
+
+def advance_watermark(conn, module):
+    # Com todas as janelas até hoje concluídas, as execuções incrementais partem do maior valor gravado
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT MAX({module.WATERMARK_FIELD}) FROM {module.SPEC.fact_table}")
+    (value,) = cursor.fetchone()
+    cursor.close()
+    current = get_watermark(conn, module.ENTIDADE)
+    if value and (current is None or value > current):
+        save_watermark(conn, module.ENTIDADE, value)
+
+
+def backfill(modules, start=None, end=None, days=WINDOW_DAYS, workers=None, limit_pages=None,
+             resume=False, bulk=False, log_file="logs/backfill.log"):
+    """Carrega o histórico das entidades em janelas de datas, distribuídas por um pool de processos.
+
+    Sem `start`, cada entidade começa no início do seu histórico (INICIO_DO_HISTORICO);
+    sem `end`, vai até hoje. Retorna as estatísticas de cada janela, na ordem das janelas.
+    """
+    setup_logging(log_file, LOG_FORMAT)
+    end = parse_day(end) if end else date.today()
+    windows = {m: date_windows(start or m.INICIO_DO_HISTORICO, end, days) for m in modules}
+    # Intercala as entidades janela a janela, para que todas avancem juntas pelo histórico
+    jobs = sorted(
+        ((m, w) for m in modules for w in windows[m]),
+        key=lambda job: (job[1][0], modules.index(job[0])),
+    )
+    workers = workers or os.cpu_count() or 1
+    logging.info(
+        f"=== Backfill: {', '.join(m.ENTIDADE for m in modules)} em {len(jobs)} janelas "
+        f"de {days} dias, {workers} processos ==="
+    )
+
+    # Migrações e tabela de estado uma única vez, antes dos processos; as janelas rodam com migrate=False
+    # (chamados_unificados é reconstruída no final, depois de todas as janelas)
+    conn = connect_db()
+    try:
+        prepare_schema(conn, modules, unified=False)
+    finally:
+        conn.close()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_window, m.__name__, w, limit_pages, resume, bulk, log_file) for m, w in jobs]
+        done = {job: future.result() for job, future in zip(jobs, futures)}
+    results = [done[(m, w)] for m in modules for w in windows[m]]
+
+    # Marca d'água e tabela unificada ficam com o coordenador, uma vez, depois de todas as janelas
+    conn = connect_db()
+    try:
+        for module in modules:
+            if end >= date.today() and all(done[(module, w)].get("concluida") for w in windows[module]):
+                advance_watermark(conn, module)
+        rebuild_unified(conn)
+    finally:
+        conn.close()
+    return results
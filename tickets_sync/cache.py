@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+from tickets_sync.config import HTTP_CACHE_DIR, HTTP_CACHE_MAX_MB, HTTP_CACHE_TTL
+
+# === Cache local das respostas da API ===
+# Cada resposta 200 com validadores (ETag/Last-Modified) é guardada em disco,
+# indexada pelo endpoint e pelos parâmetros da consulta. Nas execuções seguintes:
+#   - dentro de HTTP_CACHE_TTL segundos, a página é lida do disco, sem requisição;
+#   - depois disso, a requisição vai com If-None-Match/If-Modified-Since e um
+#     304 reaproveita o corpo guardado, sem transferir o JSON de novo.
+# O tamanho total é limitado por HTTP_CACHE_MAX_MB, descartando as entradas
+# usadas há mais tempo (LRU; o mtime do arquivo do corpo marca o último uso).
+
+BODY_SUFFIX = ".body"
+META_SUFFIX = ".json"
+
+
+def cache_key(url, params=None):
+    items = sorted((str(k), str(v)) for k, v in (params or {}).items())
+    return hashlib.blake2b(json.dumps([url, items]).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class CacheEntry:
+    def __init__(self, key, meta):
+        self.key = key
+        self.etag = meta.get("etag")
+        self.last_modified = meta.get("last_modified")
+        self.stored_at = meta.get("stored_at", 0)
+        self.headers = meta.get("headers", {})
+
+    def is_fresh(self, ttl):
+        return ttl > 0 and time.time() - self.stored_at < ttl
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Cache em disco das páginas da API; pode ser compartilhado entre threads."""
+
+    def __init__(self, directory, ttl=0, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evicted = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # chave -> [tamanho do corpo, último uso]
+        self._index = {}
+        for name in os.listdir(directory):
+            if name.endswith(BODY_SUFFIX):
+                stat = os.stat(os.path.join(directory, name))
+                self._index[name[:-len(BODY_SUFFIX)]] = [stat.st_size, stat.st_mtime]
+        self.size = sum(size for size, _ in self._index.values())
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key + suffix)
+
+    def lookup(self, url, params=None):
+        """Entrada guardada para a consulta, ou None."""
+        key = cache_key(url, params)
+        if key not in self._index:
+            return None
+        try:
+            with open(self._path(key, META_SUFFIX), encoding="utf-8") as f:
+                return CacheEntry(key, json.load(f))
+        except (OSError, ValueError):
+            return None
+
+    def read(self, entry, outcome):
+        """Corpo guardado de `entry`, contabilizado como `outcome` ("hit" ou "revalidated"); None se sumiu do disco."""
+        path = self._path(entry.key, BODY_SUFFIX)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        with self._lock:
+            if outcome == "hit":
+                self.hits += 1
+            else:
+                self.revalidated += 1
+            self.bytes_saved += len(content)
+            if entry.key in self._index:
+                self._index[entry.key][1] = time.time()
+        return content
+
+    def revalidate(self, entry, headers):
+        # 304: o corpo guardado continua válido; renova a data e os validadores
+        meta = {
+            "etag": headers.get("ETag") or entry.etag,
+            "last_modified": headers.get("Last-Modified") or entry.last_modified,
+            "stored_at": time.time(),
+            "headers": entry.headers,
+        }
+        self._write(self._path(entry.key, META_SUFFIX), json.dumps(meta).encode("utf-8"))
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def store(self, url, params, headers, content):
+        """Guarda uma resposta 200; sem validadores, só vale a pena com TTL."""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not (etag or last_modified or self.ttl > 0):
+            return
+        key = cache_key(url, params)
+        meta = {
+            "url": url,
+            "params": {str(k): str(v) for k, v in (params or {}).items()},
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": time.time(),
+            "headers": {"Content-Type": headers.get("Content-Type", "application/json")},
+        }
+        try:
+            self._write(self._path(key, BODY_SUFFIX), content)
+            self._write(self._path(key, META_SUFFIX), json.dumps(meta).encode("utf-8"))
+        except OSError as err:
+            logging.warning(f"Não foi possível gravar a resposta no cache: {err}")
+            return
+        with self._lock:
+            previous = self._index.get(key)
+            self.size += len(content) - (previous[0] if previous else 0)
+            self._index[key] = [len(content), time.time()]
+            if self.size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Remove as entradas usadas há mais tempo até ficar em 90% do limite (chamado com o lock)
+        for key, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self.size <= self.max_bytes * 0.9:
+                break
+            for suffix in (BODY_SUFFIX, META_SUFFIX):
+                try:
+                    os.remove(self._path(key, suffix))
+                except OSError:
+                    pass
+            del self._index[key]
+            self.size -= size
+            self.evicted += 1
+
+    @staticmethod
+    def _write(path, data):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def summary(self):
+        total = self.hits + self.revalidated + self.misses
+        ratio = (self.hits + self.revalidated) / total * 100 if total else 0
+        return (
+            f"cache HTTP: {self.hits} hits locais, {self.revalidated} revalidados (304), "
+            f"{self.misses} misses ({ratio:.0f}% de acerto), {self.bytes_saved / 1024:.1f} KiB lidos do cache, "
+            f"{len(self._index)} entradas ({self.size / 1024 / 1024:.1f} MiB), {self.evicted} descartadas"
+        )
+
+
+def open_cache():
+    """Cache configurado no .env (HTTP_CACHE_DIR), ou None se desativado."""
+    if not HTTP_CACHE_DIR:
+        return None
+    return ResponseCache(HTTP_CACHE_DIR, ttl=HTTP_CACHE_TTL, max_bytes=int(HTTP_CACHE_MAX_MB * 1024 * 1024))
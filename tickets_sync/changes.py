@@ -0,0 +1,77 @@
+import hashlib
+import logging
+import threading
+
+# === Detecção de alterações por hash de linha ===
+# Cada tabela guarda o hash do conteúdo gravado; linhas cujo hash não mudou
+# não são reenviadas ao banco. O hash de uma linha só entra no índice depois que
+# a gravação é confirmada (confirm), para que uma linha que falhou seja reenviada.
+HASH_COLUMN = "rowHash"
+
+
+def row_hash(row):
+    return hashlib.blake2b(repr(row).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class RowHashIndex:
+    """Índice em memória chave -> hash, carregado uma vez por execução."""
+
+    def __init__(self, conn, table, key, where=None):
+        self.table = table
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.failed = 0
+        # confirm() também é chamado pelas threads do PartitionedWriter
+        self._lock = threading.Lock()
+
+        # `where` (SQL, parâmetros) limita o índice a uma parte da tabela, ex.: uma janela do backfill
+        clause, params = where or ("", ())
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {key}, {HASH_COLUMN} FROM {table}" + (f" WHERE {clause}" if clause else ""), params)
+        self.hashes = {str(k): h for k, h in cursor}
+        cursor.close()
+        logging.info(f"{len(self.hashes)} hashes carregados de {table}.")
+
+    def changed_rows(self, rows, key_index=0):
+        """Retorna apenas as linhas novas ou alteradas, com o hash anexado ao final."""
+        changed = []
+        unchanged = 0
+        for row in rows:
+            digest = row_hash(row)
+            if self.hashes.get(str(row[key_index])) == digest:
+                unchanged += 1
+                continue
+            changed.append(row + (digest,))
+        with self._lock:
+            self.unchanged += unchanged
+        return changed
+
+    def confirm(self, rows, key_index=0, failed=()):
+        """Registra os hashes das linhas gravadas (hash na última coluna), exceto as chaves em `failed`."""
+        failed = {str(key) for key in failed}
+        with self._lock:
+            for row in rows:
+                key = str(row[key_index])
+                if key in failed:
+                    self.failed += 1
+                    continue
+                previous = self.hashes.get(key)
+                # A mesma versão pode ter sido enviada duas vezes antes da primeira confirmação
+                if previous == row[-1]:
+                    self.unchanged += 1
+                    continue
+                if previous is None:
+                    self.inserted += 1
+                else:
+                    self.updated += 1
+                self.hashes[key] = row[-1]
+
+    def summary(self):
+        text = (
+            f"{self.table}: {self.inserted} inseridos, {self.updated} atualizados, "
+            f"{self.unchanged} sem alteração."
+        )
+        if self.failed:
+            text += f" {self.failed} com erro na gravação (serão reenviados na próxima execução)."
+        return text
@@ -0,0 +1,253 @@
+import os
+import sys
+import time
+import argparse
+import logging
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from tickets_sync import aio
+from tickets_sync.backfill import WINDOW_DAYS, backfill as run_backfill
+from tickets_sync.client import get_client
+from tickets_sync.config import DB_POOL_SIZE, DB_WRITE_WORKERS, SYNC_ENGINE, setup_logging
+from tickets_sync.db import create_pool
+from tickets_sync.reconcile import RECONCILE_WINDOW_DAYS, reconcile as run_reconcile
+from tickets_sync.refresh import targeted
+from tickets_sync.schema import prepare_schema
+from tickets_sync.telemetry import write_run_report
+
+# Os scripts de cada entidade ficam na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# === Entidades disponíveis (nome -> módulo do script) ===
+ENTITIES = {
+    "chamados": "chamados.chamados",
+    "apontamentos": "Apontamentos.apontamentos",
+    "feedbacks": "Feedbacks.feedbacks",
+}
+
+LOG_FORMAT = '%(asctime)s [%(levelname)s] [%(threadName)s] %(message)s'
+
+
+def run_entity(name, module, pool, limit_pages, full, resume, bulk=False, **options):
+    threading.current_thread().name = name
+    start = time.perf_counter()
+    try:
+        stats = module.main(
+            limit_pages=limit_pages or module.LIMITE_DE_PAGINAS,
+            full=full,
+            resume=resume,
+            bulk=bulk,
+            conn=pool.get_connection(),
+            pool=pool,
+            migrate=False,
+            **options,
+        )
+    except Exception as err:
+        logging.exception(f"Falha na sincronização de {name}: {err}")
+        stats = {"entidade": name, "registros": 0, "concluida": False, "erro": str(err)}
+    stats["segundos"] = time.perf_counter() - start
+    return stats
+
+
+def run_targeted(executor, entities, modules, pool, args):
+    """Sincroniza chamados primeiro; as demais entidades buscam só os tickets que ele alterou."""
+    changed = set()
+    first = executor.submit(run_entity, "chamados", modules["chamados"], pool, args.limit_pages, False, args.resume, args.bulk,
+                            changed=changed, writers=args.db_writers)
+    results = {"chamados": first.result()}
+    options = {"writers": args.db_writers}
+    # Com a lista de alterados incompleta ou grande demais, as dependentes seguem pela paginação normal
+    if not results["chamados"].get("concluida"):
+        logging.warning("Sincronização de chamados incompleta; as demais entidades seguem pela paginação normal.")
+    elif not targeted(changed):
+        logging.info(f"{len(changed)} chamados alterados, acima de REFRESH_MAX_TICKETS; as demais entidades seguem pela paginação normal.")
+    else:
+        options["tickets"] = changed
+        logging.info(f"Atualização dirigida: {len(changed)} chamados alterados.")
+    dependents = [e for e in entities if e != "chamados"]
+    futures = [executor.submit(run_entity, e, modules[e], pool, args.limit_pages, False, args.resume, args.bulk, **options) for e in dependents]
+    results.update(zip(dependents, (f.result() for f in futures)))
+    return [results[e] for e in entities]
+
+
+def sync(args):
+    entities = [e.strip() for e in args.entities.split(",") if e.strip()]
+    unknown = [e for e in entities if e not in ENTITIES]
+    if unknown:
+        raise SystemExit(f"Entidades desconhecidas: {', '.join(unknown)} (opções: {', '.join(ENTITIES)})")
+
+    engine = args.engine or SYNC_ENGINE
+    if engine == "async" and args.bulk:
+        raise SystemExit("A carga em massa (--bulk) não é suportada pelo motor assíncrono; use --engine threads.")
+    if engine == "async" and args.db_writers:
+        raise SystemExit("A gravação em paralelo (--db-writers) não é suportada pelo motor assíncrono; use --engine threads.")
+    if args.targeted:
+        if engine == "async":
+            raise SystemExit("A atualização dirigida (--targeted) não é suportada pelo motor assíncrono; use --engine threads.")
+        if args.full or "chamados" not in entities:
+            raise SystemExit("A atualização dirigida (--targeted) parte dos chamados alterados: inclua chamados e não use --full.")
+
+    setup_logging(args.log_file, LOG_FORMAT)
+    logging.info(f"=== Sincronização unificada: {', '.join(entities)} (motor: {engine}) ===")
+    # Os módulos são importados antes de abrir as threads
+    modules = {e: importlib.import_module(ENTITIES[e]) for e in entities}
+
+    start = time.perf_counter()
+    if engine == "async":
+        # Todas as entidades no mesmo event loop, com o pool do aiomysql e uma sessão aiohttp
+        jobs = [(modules[e], args.limit_pages or modules[e].LIMITE_DE_PAGINAS) for e in entities]
+        results = aio.run(jobs, full=args.full, resume=args.resume, pool_size=args.pool_size)
+    else:
+        # Cada entidade usa uma conexão do pool, mais uma por thread da gravação em paralelo
+        writers = args.db_writers or DB_WRITE_WORKERS
+        per_entity = 1 + (writers if writers > 1 and not args.bulk else 0)
+        pool = create_pool(size=max(len(entities) * per_entity, args.pool_size or DB_POOL_SIZE), local_infile=args.bulk)
+        # Migrações e chamados_unificados uma única vez, antes das threads (que rodam com migrate=False)
+        conn = pool.get_connection()
+        try:
+            prepare_schema(conn, modules.values())
+        finally:
+            conn.close()
+        # Cada entidade roda em sua própria thread, compartilhando o pool do MySQL e a sessão HTTP
+        with ThreadPoolExecutor(max_workers=len(entities)) as executor:
+            if args.targeted:
+                results = run_targeted(executor, entities, modules, pool, args)
+            else:
+                futures = [executor.submit(run_entity, e, modules[e], pool, args.limit_pages, args.full, args.resume, args.bulk,
+                                           writers=args.db_writers) for e in entities]
+                results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - start
+
+    print(f"{'entidade':<14}{'registros':>10}{'inseridos':>11}{'atualizados':>13}{'inalterados':>13}{'tempo':>10}  status")
+    for r in results:
+        status = "ok" if r.get("concluida") else ("erro: " + r["erro"] if "erro" in r else "incompleta")
+        print(
+            f"{r['entidade']:<14}{r['registros']:>10}{r.get('inseridos', 0):>11}{r.get('atualizados', 0):>13}"
+            f"{r.get('inalterados', 0):>13}{r['segundos']:>9.1f}s  {status}"
+        )
+    print(f"Tempo total: {elapsed:.1f}s (soma das entidades: {sum(r['segundos'] for r in results):.1f}s)")
+    if engine != "async":
+        print(get_client().summary())
+    report = write_run_report(results, name="sync")
+    if report:
+        print(f"Relatório: {report}")
+    logging.info(f"=== Sincronização unificada concluída em {elapsed:.1f}s ===")
+    return 0 if all(r.get("concluida") for r in results) else 1
+
+
+def backfill(args):
+    entities = [e.strip() for e in args.entities.split(",") if e.strip()]
+    unknown = [e for e in entities if e not in ENTITIES]
+    if unknown:
+        raise SystemExit(f"Entidades desconhecidas: {', '.join(unknown)} (opções: {', '.join(ENTITIES)})")
+    modules = [importlib.import_module(ENTITIES[e]) for e in entities]
+    # Só as entidades com filtro de data na API podem ser divididas em janelas
+    unsupported = [m.ENTIDADE for m in modules if not hasattr(m, "FILTROS_JANELA")]
+    if unsupported:
+        raise SystemExit(f"Backfill por janelas não suportado para: {', '.join(unsupported)}")
+
+    start = time.perf_counter()
+    results = run_backfill(
+        modules, start=args.window_start, end=args.window_end, days=args.window_days, workers=args.workers,
+        limit_pages=args.limit_pages, resume=args.resume, bulk=args.bulk, log_file=args.log_file,
+    )
+    elapsed = time.perf_counter() - start
+
+    print(f"{'entidade':<14}{'janelas':>9}{'registros':>11}{'inseridos':>11}{'atualizados':>13}{'tempo':>10}  status")
+    for module in modules:
+        windows = [r for r in results if r["entidade"] == module.ENTIDADE]
+        failed = [r for r in windows if not r.get("concluida")]
+        status = "ok" if not failed else f"{len(failed)} janelas incompletas"
+        print(
+            f"{module.ENTIDADE:<14}{len(windows):>9}{sum(r['registros'] for r in windows):>11}"
+            f"{sum(r.get('inseridos', 0) for r in windows):>11}{sum(r.get('atualizados', 0) for r in windows):>13}"
+            f"{sum(r['segundos'] for r in windows):>9.1f}s  {status}"
+        )
+        for r in failed:
+            print(f"  {r['janela']}: " + ("erro: " + r["erro"] if "erro" in r else "incompleta (use --resume)"))
+    print(f"Tempo total: {elapsed:.1f}s (soma das janelas: {sum(r['segundos'] for r in results):.1f}s)")
+    # Uma amostra por janela: o textfile do Prometheus fica com as execuções regulares
+    report = write_run_report(results, name="backfill", textfile="")
+    if report:
+        print(f"Relatório: {report}")
+    return 0 if all(r.get("concluida") for r in results) else 1
+
+
+def reconcile(args):
+    entities = [e.strip() for e in args.entities.split(",") if e.strip()]
+    unknown = [e for e in entities if e not in ENTITIES]
+    if unknown:
+        raise SystemExit(f"Entidades desconhecidas: {', '.join(unknown)} (opções: {', '.join(ENTITIES)})")
+    modules = [importlib.import_module(ENTITIES[e]) for e in entities]
+
+    setup_logging(args.log_file)
+    start = time.perf_counter()
+    results = run_reconcile(modules, start=args.window_start, end=args.window_end, days=args.window_days,
+                            delete=not args.mark, force=args.force)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'entidade':<14}{'janelas':>9}{'no banco':>11}{'na API':>11}{'órfãos':>9}{'removidos':>11}{'tempo':>10}  status")
+    for module in modules:
+        windows = [r for r in results if r["entidade"] == module.ENTIDADE]
+        failed = [r for r in windows if not r.get("concluida")]
+        status = "ok" if not failed else f"{len(failed)} janelas sem remoção"
+        print(
+            f"{module.ENTIDADE:<14}{len(windows):>9}{sum(r['no_banco'] for r in windows):>11}"
+            f"{sum(r['registros'] for r in windows):>11}{sum(r['orfaos'] for r in windows):>9}"
+            f"{sum(r['removidos'] for r in windows):>11}{sum(r['segundos'] for r in windows):>9.1f}s  {status}"
+        )
+        for r in failed:
+            print(f"  {r['janela']}: ver o log")
+    print(f"Tempo total: {elapsed:.1f}s")
+    report = write_run_report(results, name="reconcile", textfile="")
+    if report:
+        print(f"Relatório: {report}")
+    return 0 if all(r.get("concluida") for r in results) else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m tickets_sync", description="Sincronização Acelerato -> MySQL")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sync_parser = commands.add_parser("sync", help="sincroniza as entidades em paralelo")
+    sync_parser.add_argument("--entities", default=",".join(ENTITIES), help="lista separada por vírgulas (padrão: todas)")
+    sync_parser.add_argument("--limit-pages", type=int, help="limite de páginas por entidade (padrão: o de cada script)")
+    sync_parser.add_argument("--full", action="store_true", help="ignora as marcas d'água e refaz a carga completa")
+    sync_parser.add_argument("--resume", action="store_true", help="continua cargas interrompidas a partir do checkpoint")
+    sync_parser.add_argument("--bulk", action="store_true", help="carga em massa via LOAD DATA LOCAL INFILE e staging (backfills)")
+    sync_parser.add_argument("--targeted", action="store_true", help="apontamentos e feedbacks só dos chamados alterados nesta execução")
+    sync_parser.add_argument("--db-writers", type=int, help="conexões de gravação por entidade, particionadas pela chave (padrão: DB_WRITE_WORKERS)")
+    sync_parser.add_argument("--engine", choices=["threads", "async"], help="motor da sincronização (padrão: SYNC_ENGINE)")
+    sync_parser.add_argument("--pool-size", type=int, help="conexões no pool do MySQL (padrão: DB_POOL_SIZE)")
+    sync_parser.add_argument("--log-file", default="logs/sync.log")
+    sync_parser.set_defaults(func=sync)
+
+    backfill_parser = commands.add_parser("backfill", help="recarrega o histórico em janelas de datas, em processos paralelos")
+    backfill_parser.add_argument("--entities", default="chamados,apontamentos", help="lista separada por vírgulas (padrão: chamados,apontamentos)")
+    backfill_parser.add_argument("--window-start", help="primeiro dia (dd/mm/aaaa; padrão: início do histórico de cada entidade)")
+    backfill_parser.add_argument("--window-end", help="último dia, inclusivo (dd/mm/aaaa; padrão: hoje)")
+    backfill_parser.add_argument("--window-days", type=int, default=WINDOW_DAYS, help=f"dias por janela (padrão: {WINDOW_DAYS})")
+    backfill_parser.add_argument("--workers", type=int, help="processos em paralelo (padrão: núcleos da máquina)")
+    backfill_parser.add_argument("--limit-pages", type=int, help="limite de páginas por janela (padrão: o de cada script)")
+    backfill_parser.add_argument("--resume", action="store_true", help="continua as janelas interrompidas a partir do checkpoint")
+    backfill_parser.add_argument("--bulk", action="store_true", help="carga em massa via LOAD DATA LOCAL INFILE e staging")
+    backfill_parser.add_argument("--log-file", default="logs/backfill.log")
+    backfill_parser.set_defaults(func=backfill)
+
+    reconcile_parser = commands.add_parser("reconcile", help="remove os registros que sumiram da API, janela a janela")
+    reconcile_parser.add_argument("--entities", default=",".join(ENTITIES), help="lista separada por vírgulas (padrão: todas)")
+    reconcile_parser.add_argument("--window-start", help="primeiro dia (dd/mm/aaaa; padrão: início do histórico de cada entidade)")
+    reconcile_parser.add_argument("--window-end", help="último dia, inclusivo (dd/mm/aaaa; padrão: hoje)")
+    reconcile_parser.add_argument("--window-days", type=int, default=RECONCILE_WINDOW_DAYS, help=f"dias por janela (padrão: {RECONCILE_WINDOW_DAYS})")
+    reconcile_parser.add_argument("--mark", action="store_true", help="só registra os órfãos em sync_tombstones, sem remover")
+    reconcile_parser.add_argument("--force", action="store_true", help="remove mesmo acima de RECONCILE_MAX_ORPHAN_RATIO")
+    reconcile_parser.add_argument("--log-file", default="logs/reconcile.log")
+    reconcile_parser.set_defaults(func=reconcile)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
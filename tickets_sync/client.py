@@ -0,0 +1,247 @@
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from tickets_sync.cache import open_cache
+
+from tickets_sync.config import (
+    API_EMAIL, API_TOKEN, API_POOL_SIZE, API_TIMEOUT,
+    API_MAX_RETRIES, API_BACKOFF_BASE, API_BACKOFF_MAX, API_RATE_LIMIT, API_RATE_BURST,
+)
+from tickets_sync.telemetry import NO_METRICS, Histogram
+
+# === Cliente HTTP da API Acelerato ===
+DEFAULT_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+# Respostas que indicam limite de requisições ou falha temporária do servidor
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Limitador de taxa compartilhado entre as threads: `rate` requisições/s com rajada `burst`."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Consome um token se houver; senão, retorna a espera (s) até o próximo."""
+        if not self.rate:
+            return 0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+def retry_after_seconds(response, cap=None):
+    # Retry-After pode vir em segundos ou como data HTTP; a espera fica limitada a API_BACKOFF_MAX,
+    # para que um valor absurdo (ou uma data distante) não prenda a sincronização por horas
+    cap = API_BACKOFF_MAX if cap is None else cap
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return min(cap, max(0.0, float(value)))
+    except ValueError:
+        pass
+    try:
+        return min(cap, max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=None, cap=None):
+    # Backoff exponencial com jitter completo
+    base = API_BACKOFF_BASE if base is None else base
+    cap = API_BACKOFF_MAX if cap is None else cap
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class ClientStats:
+    """Contadores de requisições, bytes e latência de um cliente da API (síncrono ou assíncrono)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.bytes_received = 0
+        self.latency = Histogram()
+        # Cache em disco das respostas (HTTP_CACHE_DIR), ou None
+        self.cache = open_cache()
+
+    def _count(self, metrics, wire_bytes=0, retry=False, elapsed=None):
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += wire_bytes
+            if retry:
+                self.retries += 1
+            if elapsed is not None:
+                self.latency.observe(elapsed)
+        # Métricas da entidade que fez a requisição (a sessão é compartilhada pela CLI)
+        metrics.count("requisicoes")
+        metrics.count("bytes_recebidos", wire_bytes)
+        if retry:
+            metrics.count("requisicoes_repetidas")
+        if elapsed is not None:
+            metrics.observe("http_segundos", elapsed)
+
+    def summary(self):
+        p95 = self.latency.percentile(95)
+        return (
+            f"{self.requests} requisições à API ({self.retries} repetidas), "
+            f"{self.bytes_received / 1024:.1f} KiB recebidos"
+            + (f", latência p95 <= {p95}s" if p95 is not None else "")
+            + (f"; {self.cache.summary()}." if self.cache is not None else ".")
+        )
+
+
+class AceleratoClient(ClientStats):
+    """Sessão HTTP reutilizável: pool de conexões keep-alive, gzip e autenticação configurados uma vez.
+
+    Pode ser compartilhada entre as threads da paginação concorrente. Respostas
+    429/5xx e falhas de rede são repetidas com backoff exponencial (respeitando
+    `Retry-After`), e todas as requisições passam pelo limitador de taxa.
+    """
+
+    def __init__(self, email=None, token=None, pool_size=None, timeout=None,
+                 max_retries=None, rate_limit=None, rate_burst=None):
+        super().__init__()
+        self.timeout = timeout or API_TIMEOUT
+        self.max_retries = API_MAX_RETRIES if max_retries is None else max_retries
+        self.limiter = TokenBucket(
+            API_RATE_LIMIT if rate_limit is None else rate_limit,
+            API_RATE_BURST if rate_burst is None else rate_burst,
+        )
+        self.session = requests.Session()
+        self.session.auth = (email or API_EMAIL, token or API_TOKEN)
+        self.session.headers.update(DEFAULT_HEADERS)
+
+        pool_size = pool_size or API_POOL_SIZE
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url, params=None, metrics=NO_METRICS, revalidate=False):
+        # Com `revalidate`, uma entrada dentro do TTL não é servida sem consultar a API (só um 304 a reaproveita)
+        cache = self.cache
+        entry = cache.lookup(url, params) if cache is not None else None
+        if entry is not None and not revalidate and entry.is_fresh(cache.ttl):
+            content = cache.read(entry, "hit")
+            if content is not None:
+                metrics.count("cache_hits")
+                logging.info(f"GET {urlparse(url).path} {params or ''} -> cache local ({len(content)} bytes)")
+                return _cached_response(url, entry, content)
+
+        # Com uma entrada guardada, a requisição é condicional (If-None-Match/If-Modified-Since)
+        response = self._request(url, params, metrics, entry.conditional_headers() if entry else None)
+        if cache is None:
+            return response
+        if response.status_code == 304 and entry is not None:
+            content = cache.read(entry, "revalidated")
+            if content is not None:
+                cache.revalidate(entry, response.headers)
+                metrics.count("cache_revalidados")
+                return _cached_response(url, entry, content)
+            # O corpo guardado sumiu: repete sem validadores
+            response = self._request(url, params, metrics)
+        if response.status_code == 200:
+            cache.miss()
+            metrics.count("cache_misses")
+            cache.store(url, params, response.headers, response.content)
+        return response
+
+    def _request(self, url, params=None, metrics=NO_METRICS, headers=None):
+        path = urlparse(url).path
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            self.limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as err:
+                self._count(metrics, retry=not last_attempt)
+                if last_attempt:
+                    raise
+                delay = backoff_delay(attempt)
+                logging.warning(f"GET {path} {params or ''} falhou ({err}); nova tentativa em {delay:.1f}s.")
+                time.sleep(delay)
+                continue
+            elapsed = time.perf_counter() - start
+
+            # Bytes efetivamente trafegados (comprimidos, quando a API usa gzip)
+            wire_bytes = response.raw.tell() if response.raw is not None else 0
+            wire_bytes = wire_bytes or len(response.content)
+            retry = response.status_code in RETRY_STATUS and not last_attempt
+            self._count(metrics, wire_bytes, retry=retry, elapsed=elapsed)
+
+            encoding = response.headers.get("Content-Encoding", "identity")
+            logging.info(
+                f"GET {path} {params or ''} -> {response.status_code} "
+                f"em {elapsed:.2f}s ({wire_bytes} bytes, {encoding})"
+            )
+            if not retry:
+                return response
+
+            delay = retry_after_seconds(response)
+            if delay is None:
+                delay = backoff_delay(attempt)
+            logging.warning(
+                f"GET {path} {params or ''} -> {response.status_code}; "
+                f"tentativa {attempt + 1}/{self.max_retries} em {delay:.1f}s."
+            )
+            time.sleep(delay)
+
+    def close(self):
+        self.session.close()
+
+
+def _cached_response(url, entry, content):
+    # Resposta montada a partir do cache, com a mesma interface da resposta do requests
+    response = requests.Response()
+    response.status_code = 200
+    response._content = content
+    response.headers = CaseInsensitiveDict(entry.headers)
+    response.url = url
+    response.encoding = "utf-8"
+    return response
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Cliente compartilhado pelo processo (criado na primeira chamada)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AceleratoClient()
+        return _client
@@ -0,0 +1,85 @@
+import os
+import logging
+import tempfile
+from dotenv import load_dotenv
+
+# === Configuração compartilhada ===
+# Carregada na importação, antes que qualquer módulo leia as variáveis do .env
+load_dotenv()
+
+# --- API Acelerato ---
+API_EMAIL = os.getenv("API_EMAIL")
+API_TOKEN = os.getenv("API_TOKEN")
+API_URL_TICKETS = os.getenv("API_URL_TICKETS")
+API_URL_APONTAMENTOS = os.getenv("API_URL_APONTAMENTOS")
+API_URL_FEEDBACKS = os.getenv("API_URL_FEEDBACKS")
+# Tempo máximo (s) de espera por uma resposta da API
+API_TIMEOUT = float(os.getenv("API_TIMEOUT", "60"))
+# Conexões mantidas abertas (keep-alive) por host no pool HTTP
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", "10"))
+# Quantidade de páginas buscadas em paralelo; 1 mantém o comportamento sequencial
+API_FETCH_WORKERS = int(os.getenv("API_FETCH_WORKERS", "4"))
+# Novas tentativas por requisição em caso de 429/5xx ou falha de rede
+API_MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "5"))
+# Espera base e máxima (s) do backoff exponencial
+API_BACKOFF_BASE = float(os.getenv("API_BACKOFF_BASE", "1"))
+API_BACKOFF_MAX = float(os.getenv("API_BACKOFF_MAX", "60"))
+# Limite de requisições por segundo (0 = sem limite) e rajada permitida
+API_RATE_LIMIT = float(os.getenv("API_RATE_LIMIT", "0"))
+API_RATE_BURST = int(os.getenv("API_RATE_BURST", "5"))
+# Novas tentativas de uma página que continuou falhando após os retries da requisição
+API_PAGE_RETRIES = int(os.getenv("API_PAGE_RETRIES", "2"))
+# Decodificador JSON das páginas: auto (mais rápido instalado), msgspec, orjson ou json
+JSON_DECODER = os.getenv("JSON_DECODER", "auto")
+# Cache em disco das respostas da API (vazio desativa), validade sem revalidação (s) e tamanho máximo
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", "")
+HTTP_CACHE_TTL = float(os.getenv("HTTP_CACHE_TTL", "0"))
+HTTP_CACHE_MAX_MB = float(os.getenv("HTTP_CACHE_MAX_MB", "256"))
+
+# --- Banco de dados ---
+DB_CONFIG = {
+    'host': os.getenv("DB_HOST"),
+    'user': os.getenv("DB_USER"),
+    'password': os.getenv("DB_PASSWORD"),
+    'database': os.getenv("DB_NAME")
+}
+# Tamanho padrão dos lotes de INSERT multi-linha
+DB_BATCH_SIZE = int(os.getenv("DB_BATCH_SIZE", "500"))
+# Conexões no pool compartilhado pelas entidades na CLI unificada
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+# Diretório dos arquivos TSV da carga em massa (--bulk); é o único que o LOAD DATA LOCAL INFILE pode ler
+DB_STAGING_DIR = os.getenv("DB_STAGING_DIR") or os.path.join(tempfile.gettempdir(), "tickets_sync")
+# Threads de gravação por entidade, cada uma com sua conexão, particionadas pela chave primária (1 = uma só conexão)
+DB_WRITE_WORKERS = int(os.getenv("DB_WRITE_WORKERS", "1"))
+
+# --- Sincronização ---
+# Quantidade máxima de páginas já baixadas aguardando gravação no banco
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))
+# Janela de sobreposição aplicada sobre a última marca d'água
+SYNC_OVERLAP_DAYS = int(os.getenv("SYNC_OVERLAP_DAYS", "1"))
+# Motor da sincronização: threads (padrão) ou async (asyncio + aiohttp + aiomysql, ver tickets_sync/aio.py)
+SYNC_ENGINE = os.getenv("SYNC_ENGINE", "threads")
+# Máximo de chamados alterados buscados um a um na atualização dirigida (sync --targeted);
+# acima disso, apontamentos e feedbacks seguem pela paginação normal
+REFRESH_MAX_TICKETS = int(os.getenv("REFRESH_MAX_TICKETS", "200"))
+# Fração máxima das chaves de uma janela que a reconciliação remove sem --force
+RECONCILE_MAX_ORPHAN_RATIO = float(os.getenv("RECONCILE_MAX_ORPHAN_RATIO", "0.2"))
+
+# --- Exportação colunar (Parquet) ---
+# Diretório de saída dos arquivos Parquet; vazio desativa a exportação
+PARQUET_DIR = os.getenv("PARQUET_DIR", "")
+# Registros acumulados em memória antes de mesclar nas partições
+PARQUET_FLUSH_ROWS = int(os.getenv("PARQUET_FLUSH_ROWS", "50000"))
+
+# --- Telemetria ---
+# Diretório dos relatórios JSON de cada execução; vazio desativa
+RUN_REPORT_DIR = os.getenv("RUN_REPORT_DIR", "logs/reports")
+# Arquivo .prom para o textfile collector do node_exporter (opcional; vazio desativa)
+PROMETHEUS_TEXTFILE = os.getenv("PROMETHEUS_TEXTFILE", "")
+
+# === Logs ===
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(message)s'
+
+
+def setup_logging(filename, log_format=LOG_FORMAT):
+    logging.basicConfig(filename=filename, level=logging.INFO, format=log_format)
@@ -0,0 +1,127 @@
+import os
+import time
+import sqlite3
+import logging
+import mysql.connector
+from mysql.connector import pooling
+
+from tickets_sync.config import DB_BATCH_SIZE, DB_CONFIG, DB_POOL_SIZE, DB_STAGING_DIR
+
+
+# === Conexão ===
+def _db_config(local_infile=False):
+    if not local_infile:
+        return DB_CONFIG
+    # LOAD DATA LOCAL INFILE liberado apenas para os arquivos do diretório de staging
+    os.makedirs(DB_STAGING_DIR, exist_ok=True)
+    return dict(DB_CONFIG, allow_local_infile_in_path=DB_STAGING_DIR)
+
+
+def connect_db(local_infile=False):
+    try:
+        conn = mysql.connector.connect(**_db_config(local_infile))
+        return conn
+    except mysql.connector.Error as err:
+        logging.error(f"Erro ao conectar ao banco: {err}")
+        raise
+
+
+def create_pool(size=None, name="tickets_sync", local_infile=False):
+    # Conexões devolvidas com conn.close() voltam para o pool
+    try:
+        return pooling.MySQLConnectionPool(pool_name=name, pool_size=size or DB_POOL_SIZE, **_db_config(local_infile))
+    except mysql.connector.Error as err:
+        logging.error(f"Erro ao criar pool de conexões: {err}")
+        raise
+
+
+# === Escrita em lote ===
+DB_ERRORS = {
+    "mysql": mysql.connector.Error,
+    "sqlite": sqlite3.Error,
+}
+
+
+def build_upsert_sql(table, columns, key, rows=1, dialect="mysql"):
+    placeholder = "?" if dialect == "sqlite" else "%s"
+    row_sql = "(" + ", ".join([placeholder] * len(columns)) + ")"
+    # `key` pode ser uma coluna ou uma tupla de colunas (chave composta)
+    keys = (key,) if isinstance(key, str) else tuple(key)
+    updates = [c for c in columns if c not in keys]
+
+    if dialect == "sqlite":
+        on_conflict = f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in updates)
+    else:
+        on_conflict = "ON DUPLICATE KEY UPDATE " + ", ".join(f"{c} = VALUES({c})" for c in updates)
+
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)})\n"
+        f"VALUES {', '.join([row_sql] * rows)}\n"
+        f"{on_conflict}"
+    )
+
+
+def build_merge_sql(table, staging, columns, key):
+    # Mescla a tabela de staging no destino em um único comando
+    updates = ", ".join(f"{c} = VALUES({c})" for c in columns if c != key)
+    cols = ", ".join(columns)
+    return f"INSERT INTO {table} ({cols})\nSELECT {cols} FROM {staging}\nON DUPLICATE KEY UPDATE {updates}"
+
+
+def _insert_rows_one_by_one(conn, cursor, table, columns, key, batch, dialect, failed):
+    # Fallback: reprocessa o lote linha a linha para isolar os registros inválidos
+    sql = build_upsert_sql(table, columns, key, dialect=dialect)
+    key_index = columns.index(key)
+    written = 0
+    for row in batch:
+        try:
+            cursor.execute(sql, row)
+            written += 1
+        except DB_ERRORS[dialect] as err:
+            logging.error(f"Erro ao inserir {key}={row[key_index]} em {table}: {err}")
+            failed.append(row[key_index])
+    conn.commit()
+    return written
+
+
+def bulk_upsert(conn, table, columns, rows, key, batch_size=None, dialect="mysql", metrics=None, failed=None):
+    """Insere/atualiza `rows` (tuplas na ordem de `columns`) em lotes multi-linha.
+
+    Cada lote é confirmado separadamente; se um lote falhar, apenas ele é
+    reprocessado linha a linha. Retorna a quantidade de linhas gravadas.
+    Com `metrics`, registra o tempo de cada commit; com a lista `failed`,
+    acrescenta nela a chave de cada linha que não pôde ser gravada.
+    """
+    failed = [] if failed is None else failed
+    batch_size = batch_size or DB_BATCH_SIZE
+    columns = list(columns)
+    rows = list(rows)
+    statements = {}
+    written = 0
+
+    cursor = conn.cursor()
+    try:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            if len(batch) not in statements:
+                statements[len(batch)] = build_upsert_sql(table, columns, key, rows=len(batch), dialect=dialect)
+            params = [value for row in batch for value in row]
+
+            try:
+                cursor.execute(statements[len(batch)], params)
+                start_commit = time.perf_counter()
+                conn.commit()
+                if metrics is not None:
+                    metrics.observe("db_commit_segundos", time.perf_counter() - start_commit)
+                written += len(batch)
+            except DB_ERRORS[dialect] as err:
+                conn.rollback()
+                logging.warning(
+                    f"Falha no lote {start // batch_size + 1} de {table} ({len(batch)} linhas): {err}. "
+                    f"Reprocessando linha a linha."
+                )
+                written += _insert_rows_one_by_one(conn, cursor, table, columns, key, batch, dialect, failed)
+    finally:
+        cursor.close()
+
+    return written
@@ -0,0 +1,168 @@
+import json
+import logging
+from typing import Any, List, Optional, Union
+
+from tickets_sync.config import JSON_DECODER
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# === Decodificação das respostas da API ===
+# As páginas podem ter milhares de registros (o endpoint de feedbacks devolve o
+# conjunto completo de uma vez). O decodificador é escolhido por JSON_DECODER:
+#   msgspec: decodifica direto em registros tipados (Struct) gerados a partir do
+#            SPEC, só com os campos gravados; o restante do JSON é pulado;
+#   orjson:  dicionários, com o parser em C do orjson;
+#   json:    dicionários, com a biblioteca padrão.
+# "auto" (padrão) usa o mais rápido instalado. Registros tipados expõem .get()
+# como os dicionários, e o SPEC os lê pelo extrator de atributos. Uma página que
+# não cabe nos registros tipados (ex.: texto onde o SPEC lê um objeto) segue pelos
+# dicionários, com o mesmo resultado dos demais decodificadores.
+
+BACKENDS = ("msgspec", "orjson", "json")
+
+
+def available_backends():
+    installed = {"msgspec": msgspec is not None, "orjson": orjson is not None, "json": True}
+    return [name for name in BACKENDS if installed[name]]
+
+
+def resolve_backend(name=None):
+    name = (name or JSON_DECODER or "auto").lower()
+    if name == "auto":
+        return available_backends()[0]
+    if name not in BACKENDS:
+        raise ValueError(f"JSON_DECODER inválido: {name} (opções: auto, {', '.join(BACKENDS)})")
+    if name not in available_backends():
+        fallback = available_backends()[0]
+        logging.warning(f"Decodificador {name} não instalado; usando {fallback}.")
+        return fallback
+    return name
+
+
+def loads(content, backend=None):
+    """Decodifica JSON (bytes ou str) em objetos Python com o backend escolhido."""
+    backend = resolve_backend(backend)
+    if backend == "msgspec":
+        return msgspec.json.decode(content)
+    if backend == "orjson":
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+# === Registros tipados (msgspec) ===
+
+if msgspec is not None:
+    class Record(msgspec.Struct, gc=False):
+        """Base dos registros tipados; sem ciclos, então ficam fora do coletor de lixo."""
+
+        def get(self, name, default=None):
+            # Compatível com dict.get para a deduplicação e a marca d'água
+            return getattr(self, name, default)
+
+
+def _path_tree(paths):
+    # {chave: None (valor) | (é lista, subárvore)} a partir dos caminhos do SPEC
+    tree = {}
+    for path in paths:
+        node = tree
+        steps = list(path)
+        while len(steps) > 1:
+            step = steps.pop(0)
+            is_list = isinstance(steps[0], int) and len(steps) > 1
+            if is_list:
+                steps.pop(0)
+            current = node.get(step)
+            if current is None and step in node:
+                raise ValueError(f"'{step}' é lido como valor e como objeto")
+            node = node.setdefault(step, (is_list, {}))[1]
+        if isinstance(node.get(steps[0]), tuple):
+            raise ValueError(f"'{steps[0]}' é lido como valor e como objeto")
+        node[steps[0]] = None
+    return tree
+
+
+def _define_struct(name, tree):
+    fields = []
+    for key, node in tree.items():
+        if node is None:
+            annotation = Any
+        else:
+            is_list, children = node
+            struct = _define_struct(f"{name}_{key}", children)
+            annotation = Optional[List[Optional[struct]]] if is_list else Optional[struct]
+        fields.append((key, annotation, None))
+    return msgspec.defstruct(name, fields, bases=(Record,))
+
+
+def record_type(spec):
+    """Struct com apenas os campos lidos pelo SPEC (inclusive os aninhados)."""
+    name = "".join(part.capitalize() for part in spec.table.split("_"))
+    return _define_struct(name, _path_tree(f.path for f in spec.fields))
+
+
+# === Decodificador de páginas ===
+
+class PageDecoder:
+    """Converte o corpo de uma página da API na lista de registros da entidade.
+
+    A resposta pode ser a lista de registros ou um objeto com a lista em
+    `envelope` (null vale uma página vazia). Sem `envelope_required`, um objeto
+    sem essa chave é uma página vazia; caso contrário, é um formato inesperado
+    (ValueError).
+    """
+
+    def __init__(self, spec, envelope="data", envelope_required=True, backend=None):
+        self.spec = spec
+        self.envelope = envelope
+        self.envelope_required = envelope_required
+        self.backend = resolve_backend(backend)
+        self._typed = None
+        self._fallback_logged = False
+        if self.backend == "msgspec":
+            try:
+                self._typed = self._typed_decoder()
+            except (TypeError, ValueError) as err:
+                logging.warning(f"Registros tipados indisponíveis para {spec.table} ({err}); usando dicionários.")
+
+    def _typed_decoder(self):
+        record = record_type(self.spec)
+        # Como nos dicionários, {"data": null} é uma página vazia
+        if self.envelope_required:
+            envelope_field = (self.envelope, Optional[List[record]])
+        else:
+            envelope_field = (self.envelope, Optional[List[record]], None)
+        page = msgspec.defstruct(f"{record.__name__}Pagina", [envelope_field])
+        return msgspec.json.Decoder(Union[List[record], page])
+
+    def decode(self, content):
+        if self._typed is not None:
+            try:
+                data = self._typed.decode(content)
+            except msgspec.ValidationError as err:
+                # Valores fora do formato tipado não interrompem a sincronização: a página segue
+                # pelos dicionários, que toleram os mesmos dados que os demais decodificadores
+                if not self._fallback_logged:
+                    logging.warning(f"Página de {self.spec.table} fora do formato tipado ({err}); usando dicionários.")
+                    self._fallback_logged = True
+                return self._decode_dicts(content)
+            return data if isinstance(data, list) else getattr(data, self.envelope) or []
+        return self._decode_dicts(content)
+
+    def _decode_dicts(self, content):
+        data = loads(content, self.backend)
+        if isinstance(data, list):
+            return data
+        if isinstance(data, dict):
+            if self.envelope in data:
+                return data[self.envelope] or []
+            if not self.envelope_required:
+                return []
+        raise ValueError("Formato de resposta inesperado")
@@ -0,0 +1,130 @@
+from operator import itemgetter
+
+from tickets_sync.db import bulk_upsert
+from tickets_sync.telemetry import NO_METRICS
+
+# === Tabelas de dimensão ===
+# Nomes e descrições que se repetem em cada linha (organização, agente, status do
+# kanban, categoria...) ficam em tabelas pequenas, indexadas pela chave que a API
+# já envia. A tabela de fatos guarda só essas chaves, e a view com o nome original
+# da entidade junta tudo de volta (ver RecordSpec.create_view_sql).
+
+
+class Dimension:
+    """Tabela de dimensão: chave da API e atributos descritivos."""
+
+    def __init__(self, table, key, attributes):
+        self.table = table
+        self.key = key
+        # Coluna -> tipo SQL
+        self.attributes = dict(attributes)
+
+    @property
+    def create_table_sql(self):
+        lines = [f"    {self.key} INT PRIMARY KEY"]
+        lines += [f"    {column} {sql_type}" for column, sql_type in self.attributes.items()]
+        return f"\nCREATE TABLE IF NOT EXISTS {self.table} (\n" + ",\n".join(lines) + "\n);\n"
+
+    def link(self, key, **attributes):
+        """Liga a dimensão a um SPEC: `key` é a coluna da chave e `attributes` mapeia atributo -> coluna."""
+        return DimensionLink(self, key, attributes)
+
+
+class DimensionLink:
+    """Colunas de um SPEC que são gravadas em uma dimensão em vez da tabela de fatos."""
+
+    def __init__(self, dimension, key, attributes):
+        unknown = set(attributes) - set(dimension.attributes)
+        if unknown:
+            raise ValueError(f"Atributos desconhecidos em {dimension.table}: {', '.join(sorted(unknown))}")
+        self.dimension = dimension
+        self.key = key
+        self.attributes = attributes
+        # Colunas gravadas na dimensão: a chave e só os atributos que a entidade conhece
+        self.columns = (dimension.key,) + tuple(attributes)
+        self.row = None
+
+    def bind(self, columns):
+        # Extrai (chave, atributos...) direto das linhas do SPEC
+        self.row = itemgetter(columns.index(self.key), *(columns.index(c) for c in self.attributes.values()))
+        return self
+
+    def backfill_sql(self, table):
+        # Uma linha por chave a partir das linhas já gravadas na tabela desnormalizada
+        values = ", ".join(f"MAX({c})" for c in self.attributes.values())
+        updates = ", ".join(f"{a} = VALUES({a})" for a in self.attributes)
+        return (
+            f"INSERT INTO {self.dimension.table} ({', '.join(self.columns)})\n"
+            f"SELECT {self.key}, {values} FROM {table} WHERE {self.key} IS NOT NULL GROUP BY {self.key}\n"
+            f"ON DUPLICATE KEY UPDATE {updates}"
+        )
+
+
+class DimensionWriter:
+    """Grava as dimensões de uma entidade, cada linha no máximo uma vez por execução.
+
+    O cache em memória guarda os atributos já gravados de cada chave; só chaves
+    novas ou com atributos alterados seguem para o banco. Chaves cuja gravação
+    falhou saem do cache (forget) e são contadas em `failed`.
+    """
+
+    def __init__(self, spec):
+        self.links = spec.dimensions
+        self.cache = [{} for _ in self.links]
+        self.written = 0
+        self.failed = 0
+
+    def pending(self, rows):
+        """Linhas de dimensão ainda não gravadas: lista de (ligação, linhas ordenadas pela chave)."""
+        batches = []
+        for link, cache in zip(self.links, self.cache):
+            new = {}
+            for values in map(link.row, rows):
+                key = values[0]
+                if key is not None and cache.get(key) != values:
+                    cache[key] = new[key] = values
+            if new:
+                # Mesma ordem de bloqueio entre entidades que gravam a mesma dimensão em paralelo
+                batches.append((link, sorted(new.values(), key=itemgetter(0))))
+        return batches
+
+    def forget(self, link, failed):
+        """Retira do cache as chaves não gravadas, para que sejam reenviadas."""
+        cache = self.cache[self.links.index(link)]
+        for key in failed:
+            cache.pop(key, None)
+        self.failed += len(failed)
+
+    def write(self, conn, rows, metrics=NO_METRICS):
+        for link, dimension_rows in self.pending(rows):
+            failed = []
+            self.written += bulk_upsert(conn, link.dimension.table, link.columns, dimension_rows,
+                                        key=link.dimension.key, metrics=metrics, failed=failed)
+            self.forget(link, failed)
+
+    def summary(self):
+        tables = ", ".join(link.dimension.table for link in self.links)
+        text = f"Dimensões ({tables}): {self.written} linhas gravadas, {sum(map(len, self.cache))} chaves em cache."
+        if self.failed:
+            text += f" {self.failed} com erro na gravação."
+        return text
+
+
+# === Dimensões compartilhadas pelas entidades ===
+ORGANIZACOES = Dimension("organizacoes", "organizacaoKey", {"nome": "VARCHAR(255)", "ativo": "BOOLEAN"})
+AGENTES = Dimension("agentes", "usuarioKey", {
+    "nome": "VARCHAR(255)",
+    "nomeAbreviado": "VARCHAR(255)",
+    "email": "VARCHAR(255)",
+    "ultimoAcessoEm": "DATETIME",
+})
+KANBAN_STATUS = Dimension("kanban_status", "kanbanStatusKey", {
+    "descricao": "VARCHAR(100)",
+    "inicio": "BOOLEAN",
+    "fim": "BOOLEAN",
+    "fila": "BOOLEAN",
+})
+EQUIPES = Dimension("equipes", "equipeKey", {"nome": "VARCHAR(150)"})
+CATEGORIAS = Dimension("categorias", "categoriaKey", {"descricao": "VARCHAR(150)"})
+TIPOS_DE_TICKET = Dimension("tipos_de_ticket", "tipoDeTicketKey", {"descricao": "VARCHAR(150)"})
+TIPOS_DE_PRIORIDADE = Dimension("tipos_de_prioridade", "tipoDePrioridadeKey", {"descricao": "VARCHAR(150)"})
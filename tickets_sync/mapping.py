@@ -0,0 +1,184 @@
+from operator import itemgetter
+
+from tickets_sync.changes import HASH_COLUMN
+from tickets_sync.db import build_upsert_sql
+from tickets_sync.state import parse_datetime
+
+# === Mapeamento declarativo JSON -> colunas ===
+# Cada entidade descreve suas colunas como (coluna, tipo SQL, caminho no JSON).
+# A especificação é compilada uma única vez em uma função que devolve a tupla de
+# valores na ordem das colunas, e também gera o CREATE TABLE e o INSERT.
+
+_EMPTY = {}
+
+
+class _NullRecord:
+    # Equivalente de _EMPTY para registros tipados: todo atributo lido vale None
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        return None
+
+
+_NULL_RECORD = _NullRecord()
+
+
+# === Conversões aplicadas na carga ===
+
+def as_datetime(value):
+    return parse_datetime(value)
+
+
+def as_date(value):
+    parsed = parse_datetime(value)
+    return parsed.date() if parsed else None
+
+
+def as_minutes(value):
+    """Converte uma duração "HH:MM" em minutos inteiros."""
+    if not value:
+        return None
+    hours, _, minutes = str(value).partition(":")
+    try:
+        return int(hours) * 60 + int(minutes or 0)
+    except ValueError:
+        return None
+
+
+class Field:
+    """Coluna da tabela e o caminho do valor no registro da API.
+
+    O caminho é uma sequência de chaves; inteiros indexam listas (ex.:
+    ("perguntas", 0, "nota") lê a nota da primeira pergunta, se houver).
+    Sem caminho, a coluna é lida da chave de mesmo nome. `convert` recebe o
+    valor lido e devolve o valor gravado (ex.: as_minutes para "01:30").
+    """
+
+    def __init__(self, column, sql_type, path=None, primary_key=False, convert=None):
+        self.column = column
+        self.sql_type = sql_type
+        self.path = tuple(path) if path else (column,)
+        self.primary_key = primary_key
+        self.convert = convert
+
+
+class RecordSpec:
+    """Colunas de uma entidade, extraídas dos registros da API.
+
+    Com `dimensions` (ver tickets_sync/dimensions.py), os atributos descritivos são
+    gravados nas tabelas de dimensão e `fact_table` guarda só as chaves; `table`
+    passa a ser a view que junta tudo com as mesmas colunas de antes.
+    """
+
+    def __init__(self, table, fields, hash_column=HASH_COLUMN, fact_table=None, dimensions=()):
+        self.table = table
+        self.fields = list(fields)
+        self.hash_column = hash_column
+        self.columns = tuple(f.column for f in self.fields)
+        self.primary_key = next(f.column for f in self.fields if f.primary_key)
+        self.fact_table = fact_table or table
+        self.dimensions = [link.bind(self.columns) for link in dimensions]
+        moved = {c for link in self.dimensions for c in link.attributes.values()}
+        self.fact_columns = tuple(c for c in self.columns if c not in moved)
+        positions = [self.columns.index(c) for c in self.fact_columns] + ([len(self.columns)] if hash_column else [])
+        self._fact_row = itemgetter(*positions) if moved else None
+        self.extract = self._compile()
+        # Mesma extração para registros tipados (atributos em vez de chaves), ver tickets_sync/decoding.py
+        self.extract_record = self._compile(attrs=True)
+
+    @property
+    def create_table_sql(self):
+        lines = [
+            f"    {f.column} {f.sql_type}{' PRIMARY KEY' if f.primary_key else ''}"
+            for f in self.fields
+        ]
+        if self.hash_column:
+            lines.append(f"    {self.hash_column} CHAR(32)")
+        return f"\nCREATE TABLE IF NOT EXISTS {self.table} (\n" + ",\n".join(lines) + "\n);\n"
+
+    @property
+    def create_view_sql(self):
+        # View com o nome e as colunas da tabela desnormalizada, para o BI e SQL/bases_unify.sql
+        sources = {}
+        joins = []
+        for i, link in enumerate(self.dimensions):
+            for attribute, column in link.attributes.items():
+                sources[column] = f"d{i}.{attribute}"
+            joins.append(f"LEFT JOIN {link.dimension.table} AS d{i} ON d{i}.{link.dimension.key} = f.{link.key}")
+        select = [f"{sources[c]} AS {c}" if c in sources else f"f.{c}" for c in self.columns]
+        if self.hash_column:
+            select.append(f"f.{self.hash_column}")
+        return (
+            f"CREATE OR REPLACE VIEW {self.table} AS\nSELECT\n    " + ",\n    ".join(select)
+            + f"\nFROM {self.fact_table} AS f\n" + "\n".join(joins)
+        )
+
+    @property
+    def write_columns(self):
+        # Colunas da tabela de fatos, na ordem das linhas de fact_rows()
+        return self.fact_columns + ((self.hash_column,) if self.hash_column else ())
+
+    @property
+    def insert_sql(self):
+        return build_upsert_sql(self.fact_table, self.write_columns, self.primary_key)
+
+    def fact_rows(self, rows):
+        """Linhas (com o hash no final) sem os atributos gravados nas dimensões."""
+        if self._fact_row is None:
+            return rows
+        return list(map(self._fact_row, rows))
+
+    def extract_many(self, records):
+        if not isinstance(records, list):
+            records = list(records)
+        if records and not isinstance(records[0], dict):
+            return list(map(self.extract_record, records))
+        return list(map(self.extract, records))
+
+    def _compile(self, attrs=False):
+        # Gera o código de uma função que lê cada objeto aninhado uma única vez
+        body = ["def extract(t):"] if attrs else ["def extract(t):", "    get = t.get"]
+        parents = {}
+
+        namespace = {"_EMPTY": _NULL_RECORD if attrs else _EMPTY}
+        values = []
+        for i, f in enumerate(self.fields):
+            value = self._accessor(f.path, parents, body, attrs)
+            if f.convert is not None:
+                namespace[f"_c{i}"] = f.convert
+                value = f"_c{i}({value})"
+            values.append(value)
+        body.append("    return (" + ", ".join(values) + ",)")
+        exec("\n".join(body), namespace)
+        return namespace["extract"]
+
+    @staticmethod
+    def _accessor(path, parents, body, attrs=False):
+        # Resolve (com cache) o objeto que contém o último passo do caminho
+        def read(holder, step):
+            if attrs:
+                return f"{holder}.{step}"
+            return f"get({step!r})" if holder == "t" else f"{holder}.get({step!r})"
+
+        holder = "t"
+        prefix = ()
+        i = 0
+        while i < len(path) - 1:
+            step = path[i]
+            index = path[i + 1] if isinstance(path[i + 1], int) and i + 1 < len(path) - 1 else None
+            consumed = (step, index) if index is not None else (step,)
+            prefix = prefix + consumed
+            if prefix not in parents:
+                name = f"_p{len(parents)}"
+                if index is None:
+                    body.append(f"    {name} = {read(holder, step)} or _EMPTY")
+                else:
+                    body.append(f"    {name} = {read(holder, step)}")
+                    body.append(
+                        f"    {name} = ({name}[{index}] or _EMPTY) "
+                        f"if isinstance({name}, list) and len({name}) > {index} else _EMPTY"
+                    )
+                parents[prefix] = name
+            holder = parents[prefix]
+            i += len(consumed)
+        return read(holder, path[-1])
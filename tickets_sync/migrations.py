@@ -0,0 +1,200 @@
+import logging
+
+from tickets_sync.db import DB_ERRORS
+
+# === Migrações de esquema versionadas ===
+# Cada entidade declara uma lista ordenada de Migration; as versões aplicadas
+# ficam em schema_migrations e só as pendentes rodam. A versão 1 cria a tabela
+# já no formato atual do SPEC, por isso os passos seguintes são idempotentes:
+# levam ao mesmo formato as tabelas criadas por versões anteriores dos scripts.
+# Com dialect="sqlite" as mesmas migrações rodam num banco SQLite (testes), exceto
+# split_dimensions, que depende de RENAME TABLE e CREATE OR REPLACE VIEW do MySQL.
+
+CREATE_MIGRATIONS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    entidade VARCHAR(50),
+    versao INT,
+    descricao VARCHAR(255),
+    aplicadaEm DATETIME,
+    PRIMARY KEY (entidade, versao)
+);
+"""
+
+
+class Migration:
+    """Versão do esquema: passos SQL (texto) ou funções que recebem o cursor e o dialeto."""
+
+    def __init__(self, version, description, *steps):
+        self.version = version
+        self.description = description
+        self.steps = steps
+
+    def apply(self, cursor, dialect="mysql"):
+        for step in self.steps:
+            if callable(step):
+                step(cursor, dialect)
+            else:
+                cursor.execute(step)
+
+
+def _column_type(cursor, table, column, dialect="mysql"):
+    if dialect == "sqlite":
+        # PRAGMA devolve (cid, nome, tipo declarado, notnull, default, pk)
+        cursor.execute(f"PRAGMA table_info({table})")
+        types = {row[1]: row[2].lower() for row in cursor.fetchall()}
+        return types.get(column)
+    cursor.execute(
+        "SELECT DATA_TYPE FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+        (table, column),
+    )
+    row = cursor.fetchone()
+    return row[0].lower() if row else None
+
+
+def _has_index(cursor, table, name, dialect="mysql"):
+    if dialect == "sqlite":
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND name = ?",
+                       (table, name))
+        return cursor.fetchone()[0] > 0
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s",
+        (table, name),
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def _table_type(cursor, table, dialect="mysql"):
+    # "base table", "view" ou None se não existir
+    if dialect == "sqlite":
+        cursor.execute("SELECT type FROM sqlite_master WHERE type IN ('table', 'view') AND name = ?", (table,))
+        row = cursor.fetchone()
+        return {"table": "base table", "view": "view"}[row[0]] if row else None
+    cursor.execute(
+        "SELECT TABLE_TYPE FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (table,),
+    )
+    row = cursor.fetchone()
+    return row[0].lower() if row else None
+
+
+def create_table(spec):
+    def step(cursor, dialect="mysql"):
+        cursor.execute(spec.create_table_sql)
+    return step
+
+
+def add_column(table, column, sql_type, backfill=None):
+    # backfill: expressão SQL que preenche a coluna nas linhas já gravadas
+    def step(cursor, dialect="mysql"):
+        if _column_type(cursor, table, column, dialect) is None:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}")
+            logging.info(f"Coluna {column} adicionada à tabela {table}.")
+        if backfill:
+            cursor.execute(f"UPDATE {table} SET {column} = {backfill} WHERE {column} IS NULL")
+    return step
+
+
+def add_index(table, name, columns):
+    def step(cursor, dialect="mysql"):
+        if not _has_index(cursor, table, name, dialect):
+            cursor.execute(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})")
+            logging.info(f"Índice {name} criado em {table}({', '.join(columns)}).")
+    return step
+
+
+def convert_to_temporal(table, column, sql_type):
+    """Converte uma coluna texto em DATE/DATETIME, normalizando antes os valores gravados."""
+    length = 10 if sql_type == "DATE" else 19
+    pattern = "%d/%m/%Y" if sql_type == "DATE" else "%d/%m/%Y %H:%i:%s"
+
+    def step(cursor, dialect="mysql"):
+        if _column_type(cursor, table, column, dialect) == sql_type.lower():
+            return
+        cursor.execute(f"UPDATE {table} SET {column} = NULL WHERE {column} = ''")
+        # ISO 8601 ("2025-10-30T14:05:19.000-03:00"): descarta fração e fuso
+        cursor.execute(
+            f"UPDATE {table} SET {column} = REPLACE(SUBSTR({column}, 1, {length}), 'T', ' ') "
+            f"WHERE {column} LIKE '____-__-__%'"
+        )
+        # Formato brasileiro ("30/10/2025" ou "30/10/2025 14:05:19")
+        if dialect == "sqlite":
+            # Sem STR_TO_DATE: remonta o texto ISO que o SQLite compara como data
+            iso = f"SUBSTR({column}, 7, 4) || '-' || SUBSTR({column}, 4, 2) || '-' || SUBSTR({column}, 1, 2)"
+            if sql_type != "DATE":
+                iso = f"RTRIM({iso} || ' ' || SUBSTR({column}, 12, 8))"
+            cursor.execute(f"UPDATE {table} SET {column} = {iso} WHERE {column} LIKE '__/__/____%'")
+        else:
+            cursor.execute(
+                f"UPDATE {table} SET {column} = STR_TO_DATE(LEFT({column}, {length}), '{pattern}') "
+                f"WHERE {column} LIKE '__/__/____%'"
+            )
+        if dialect == "sqlite":
+            # Sem MODIFY COLUMN: copia para uma coluna nova com o tipo declarado
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column}_novo {sql_type}")
+            cursor.execute(f"UPDATE {table} SET {column}_novo = {column}")
+            cursor.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+            cursor.execute(f"ALTER TABLE {table} RENAME COLUMN {column}_novo TO {column}")
+        else:
+            cursor.execute(f"ALTER TABLE {table} MODIFY COLUMN {column} {sql_type}")
+        logging.info(f"Coluna {table}.{column} convertida para {sql_type}.")
+    return step
+
+
+def split_dimensions(spec):
+    """Separa os atributos descritivos da entidade nas tabelas de dimensão do SPEC.
+
+    As dimensões são preenchidas a partir das linhas já gravadas, a tabela é renomeada
+    para `spec.fact_table` e perde as colunas movidas, e o nome antigo vira uma view
+    com as mesmas colunas de antes.
+    """
+    def step(cursor, dialect="mysql"):
+        for link in spec.dimensions:
+            cursor.execute(link.dimension.create_table_sql)
+        if _table_type(cursor, spec.table, dialect) == "base table":
+            for link in spec.dimensions:
+                cursor.execute(link.backfill_sql(spec.table))
+            cursor.execute(f"RENAME TABLE {spec.table} TO {spec.fact_table}")
+            logging.info(f"Tabela {spec.table} renomeada para {spec.fact_table}.")
+        moved = [c for c in spec.columns if c not in spec.fact_columns and _column_type(cursor, spec.fact_table, c, dialect)]
+        if moved:
+            cursor.execute(f"ALTER TABLE {spec.fact_table} " + ", ".join(f"DROP COLUMN {c}" for c in moved))
+            logging.info(f"{len(moved)} colunas movidas de {spec.fact_table} para as dimensões.")
+        cursor.execute(spec.create_view_sql)
+    return step
+
+
+def applied_versions(conn, entidade, dialect="mysql"):
+    placeholder = "?" if dialect == "sqlite" else "%s"
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT versao FROM schema_migrations WHERE entidade = {placeholder}", (entidade,))
+    versions = {row[0] for row in cursor}
+    cursor.close()
+    return versions
+
+
+def migrate(conn, entidade, migrations, dialect="mysql"):
+    """Aplica em ordem as migrações ainda não registradas para a entidade."""
+    placeholder = "?" if dialect == "sqlite" else "%s"
+    cursor = conn.cursor(buffered=True) if dialect == "mysql" else conn.cursor()
+    try:
+        cursor.execute(CREATE_MIGRATIONS_TABLE_SQL)
+        conn.commit()
+        done = applied_versions(conn, entidade, dialect)
+        for migration in sorted(migrations, key=lambda m: m.version):
+            if migration.version in done:
+                continue
+            logging.info(f"Aplicando migração {entidade} v{migration.version}: {migration.description}")
+            migration.apply(cursor, dialect)
+            cursor.execute(
+                "INSERT INTO schema_migrations (entidade, versao, descricao, aplicadaEm) "
+                f"VALUES ({placeholder}, {placeholder}, {placeholder}, CURRENT_TIMESTAMP)",
+                (entidade, migration.version, migration.description),
+            )
+            conn.commit()
+    except DB_ERRORS[dialect]:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
@@ -0,0 +1,118 @@
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from tickets_sync.config import API_FETCH_WORKERS, API_PAGE_RETRIES
+
+# === Paginação concorrente ===
+
+
+class FetchError(Exception):
+    """Uma página não pôde ser obtida; a sincronização ficou incompleta."""
+
+    def __init__(self, page):
+        super().__init__(f"falha ao buscar a página {page}")
+        self.page = page
+
+
+def page_fingerprint(keys):
+    # Impressão digital barata do conjunto de chaves da página (independe da ordem)
+    return len(keys), hash(frozenset(keys))
+
+
+class PageDeduplicator:
+    """Remove registros já vistos em páginas anteriores e detecta páginas repetidas.
+
+    Alguns endpoints ignoram os parâmetros de paginação e devolvem o mesmo
+    conjunto a cada página; sem esta verificação, o mesmo lote seria baixado e
+    gravado até `limit_pages` vezes.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.seen_keys = set()
+        self.fingerprints = {}
+        self.duplicates = 0
+
+    def filter(self, page, items):
+        """Retorna os registros inéditos da página, ou None se a página repete dados já vistos."""
+        keys = [item.get(self.key) for item in items if item.get(self.key) is not None]
+        fingerprint = page_fingerprint(keys)
+        if fingerprint in self.fingerprints:
+            logging.warning(f"Página {page} repete a página {self.fingerprints[fingerprint]}. Encerrando paginação.")
+            return None
+        self.fingerprints[fingerprint] = page
+
+        fresh = []
+        for item in items:
+            item_key = item.get(self.key)
+            if item_key is None:
+                fresh.append(item)
+            elif item_key not in self.seen_keys:
+                self.seen_keys.add(item_key)
+                fresh.append(item)
+
+        removed = len(items) - len(fresh)
+        if removed:
+            self.duplicates += removed
+            logging.info(f"Página {page}: {removed} registros repetidos descartados.")
+        if not fresh:
+            logging.warning(f"Página {page} não trouxe registros novos. Encerrando paginação.")
+            return None
+        return fresh
+
+
+def iter_pages(fetch_page, page=1, limit_pages=None, workers=None, key=None, page_retries=None):
+    """Gera (página, registros) em ordem, buscando até `workers` páginas em paralelo.
+
+    `fetch_page(n)` deve retornar a lista de registros da página `n`, uma lista
+    vazia ao fim dos dados, ou None em caso de erro. A busca para na primeira
+    página vazia. Uma página com erro é solicitada de novo até `page_retries`
+    vezes, sem interromper as demais; se continuar falhando, `FetchError` é
+    lançado depois que as anteriores foram entregues. Páginas posteriores já
+    solicitadas são descartadas.
+
+    Com `key`, registros cuja chave já apareceu são descartados e a busca para
+    na primeira página que repete um conjunto de chaves já visto.
+    """
+    workers = max(1, workers or API_FETCH_WORKERS)
+    page_retries = API_PAGE_RETRIES if page_retries is None else page_retries
+    attempts = {}
+    dedup = PageDeduplicator(key) if key else None
+    next_page = page
+    pending = deque()
+    executor = ThreadPoolExecutor(max_workers=workers)
+
+    def schedule():
+        # Mantém uma janela deslizante de `workers` páginas em andamento
+        nonlocal next_page
+        while len(pending) < workers and (not limit_pages or next_page <= limit_pages):
+            pending.append((next_page, executor.submit(fetch_page, next_page)))
+            next_page += 1
+
+    try:
+        schedule()
+        while pending:
+            current_page, future = pending.popleft()
+            try:
+                items = future.result()
+            except Exception as err:
+                logging.error(f"Erro ao buscar página {current_page}: {err}")
+                items = None
+            if items is None:
+                attempts[current_page] = attempts.get(current_page, 0) + 1
+                if attempts[current_page] > page_retries:
+                    raise FetchError(current_page)
+                logging.warning(f"Repetindo página {current_page} (tentativa {attempts[current_page]}/{page_retries}).")
+                pending.appendleft((current_page, executor.submit(fetch_page, current_page)))
+                continue
+            if not items:
+                break
+            if dedup is not None:
+                items = dedup.filter(current_page, items)
+                if items is None:
+                    break
+            schedule()
+            yield current_page, items
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
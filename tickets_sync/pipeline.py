@@ -0,0 +1,58 @@
+import queue
+import threading
+
+from tickets_sync.config import PIPELINE_QUEUE_SIZE
+
+# === Pipeline de busca e carga ===
+
+_DONE = object()
+
+
+def prefetch(iterable, maxsize=None):
+    """Consome `iterable` em uma thread produtora e repassa os itens por uma fila limitada.
+
+    Permite que a busca na API continue enquanto o chamador grava a página
+    anterior no banco; a fila cheia bloqueia a produção (backpressure), de modo
+    que a memória fica limitada a poucas páginas. Exceções da produtora são
+    relançadas no consumidor.
+    """
+    buffer = queue.Queue(maxsize=maxsize or PIPELINE_QUEUE_SIZE)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    break
+        except BaseException as exc:
+            put((_DONE, exc))
+            return
+        finally:
+            close = getattr(iterator, "close", None)
+            if close:
+                close()
+        put((_DONE, None))
+
+    producer = threading.Thread(target=produce, name="prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                break
+            yield item
+    finally:
+        stop.set()
+        producer.join()
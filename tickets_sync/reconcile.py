@@ -0,0 +1,291 @@
+import time
+import bisect
+import logging
+from array import array
+from datetime import date, datetime
+from functools import partial
+
+import mysql.connector
+
+from tickets_sync.backfill import date_windows, parse_day, window_filters, window_label, window_where
+from tickets_sync.client import get_client
+from tickets_sync.config import DB_BATCH_SIZE, RECONCILE_MAX_ORPHAN_RATIO
+from tickets_sync.db import DB_ERRORS, build_upsert_sql, connect_db
+from tickets_sync.pagination import FetchError, iter_pages, page_fingerprint
+from tickets_sync.unified import refresh_unified
+
+# === Reconciliação de registros removidos na API ===
+# As cargas só fazem upsert: chamados, apontamentos e avaliações removidos na API
+# ficariam no banco para sempre. A reconciliação compara, janela a janela, as chaves
+# gravadas (uma varredura pelo índice da coluna da janela) com as chaves que a API
+# devolve para a mesma janela. As que sumiram são registradas em sync_tombstones e
+# removidas em lotes, sem recarregar as tabelas. As chaves do banco são lidas antes
+# das da API, então um registro criado durante a reconciliação nunca é tomado por
+# removido.
+#
+# As chaves da API vêm de uma paginação própria, e não de fetch_tickets: a carga
+# descarta páginas repetidas e para em silêncio na primeira página sem registros
+# novos, e uma lista curta tomada por completa removeria registros que continuam na
+# API. Aqui, uma página que repete chaves já recebidas invalida a janela, e as
+# páginas não são servidas pelo cache local sem consultar a API.
+
+RECONCILE_WINDOW_DAYS = 30
+
+# Registro das chaves removidas (ou só marcadas, com --mark) pela reconciliação
+CREATE_TOMBSTONES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS sync_tombstones (
+    entidade VARCHAR(50),
+    chave VARCHAR(100),
+    ticketKey INT,
+    removidoEm DATETIME,
+    PRIMARY KEY (entidade, chave)
+);
+"""
+TOMBSTONE_COLUMNS = ("entidade", "chave", "ticketKey", "removidoEm")
+
+
+class KeySet:
+    """Conjunto compacto de chaves: inteiros em um array ordenado (8 bytes por chave), textos em um set."""
+
+    def __init__(self, integer):
+        self.integer = integer
+        self._keys = array("q") if integer else set()
+        self._sorted = True
+
+    def add(self, key):
+        if key is None:
+            return
+        if self.integer:
+            self._keys.append(int(key))
+            self._sorted = False
+        else:
+            self._keys.add(str(key))
+
+    def _sort(self):
+        # Ordena (e descarta repetidas) uma vez, na primeira consulta depois das inserções
+        if not self._sorted:
+            self._keys = array("q", sorted(set(self._keys)))
+            self._sorted = True
+
+    def __contains__(self, key):
+        if not self.integer:
+            return str(key) in self._keys
+        self._sort()
+        key = int(key)
+        i = bisect.bisect_left(self._keys, key)
+        return i < len(self._keys) and self._keys[i] == key
+
+    def __iter__(self):
+        self._sort()
+        return iter(self._keys)
+
+    def __len__(self):
+        if self.integer:
+            self._sort()
+        return len(self._keys)
+
+
+def ensure_tombstones_table(conn):
+    try:
+        cursor = conn.cursor()
+        cursor.execute(CREATE_TOMBSTONES_TABLE_SQL)
+        conn.commit()
+        cursor.close()
+    except mysql.connector.Error as err:
+        logging.error(f"Erro ao criar tabela sync_tombstones: {err}")
+        raise
+
+
+def _integer_key(spec):
+    field = next(f for f in spec.fields if f.primary_key)
+    return field.sql_type.upper().startswith("INT")
+
+
+def _placeholders(count, dialect):
+    return ", ".join(["?" if dialect == "sqlite" else "%s"] * count)
+
+
+def stored_keys(conn, module, window=None, dialect="mysql"):
+    """Chaves gravadas na janela, em uma única varredura pelo índice da coluna da janela."""
+    spec = module.SPEC
+    keys = KeySet(_integer_key(spec))
+    clause, params = window_where(module.COLUNA_JANELA, window) if window else ("", ())
+    if dialect == "sqlite":
+        clause = clause.replace("%s", "?")
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {spec.primary_key} FROM {spec.fact_table}" + (f" WHERE {clause}" if clause else ""), params)
+    for (key,) in cursor:
+        keys.add(key)
+    cursor.close()
+    return keys
+
+
+def fetch_keys(module, page, filtros=None):
+    """Chaves da página `page` (lista vazia ao fim dos dados), ou None em caso de erro."""
+    url, params = module.page_request(page, filtros)
+    # Uma página servida pelo cache dentro do TTL ainda traria as chaves já removidas;
+    # com `revalidate` a API sempre é consultada, e só um 304 reaproveita o corpo guardado
+    response = get_client().get(url, params=params, revalidate=True)
+    if response.status_code != 200:
+        logging.error(f"Erro ao buscar página {page} de {module.ENTIDADE}: {response.status_code} - {response.text}")
+        return None
+    try:
+        records = module.DECODER.decode(response.content)
+    except Exception as err:
+        logging.error(f"Erro ao decodificar JSON da página {page} de {module.ENTIDADE}: {err}")
+        return None
+    return [record.get(module.PRIMARY_KEY) for record in records]
+
+
+def api_keys(module, window=None, limit_pages=None):
+    """Chaves que a API devolve para a janela; None se não há garantia de que vieram todas.
+
+    A paginação vai até a primeira página vazia. Uma página cujas chaves já foram
+    todas recebidas (repetida ou deslocada) invalida a janela, como uma falha de
+    busca ou o limite de páginas. A única exceção são os endpoints que declaram
+    PAGINACAO_IGNORADA (feedbacks): neles, a página 2 idêntica à 1 confirma que a
+    primeira já trouxe o conjunto completo.
+    """
+    keys = KeySet(_integer_key(module.SPEC))
+    limit_pages = limit_pages or module.LIMITE_DE_PAGINAS
+    # Os feedbacks não têm filtro de data: o endpoint devolve sempre o conjunto completo
+    filtros = window_filters(module.FILTROS_JANELA, window) if window else None
+    pages = iter_pages(partial(fetch_keys, module, filtros=filtros), limit_pages=limit_pages,
+                       workers=getattr(module, "FETCH_WORKERS", None))
+    ignores_paging = getattr(module, "PAGINACAO_IGNORADA", False)
+    first = None
+    last_page = 0
+    try:
+        for last_page, page_keys in pages:
+            page_keys = [key for key in page_keys if key is not None]
+            if last_page == 1:
+                first = page_fingerprint(page_keys)
+            elif all(key in keys for key in page_keys):
+                if ignores_paging and last_page == 2 and page_fingerprint(page_keys) == first:
+                    return keys
+                logging.error(
+                    f"Página {last_page} de {module.ENTIDADE} só repete chaves já recebidas; "
+                    f"a lista da API pode estar incompleta e nada será removido."
+                )
+                return None
+            for key in page_keys:
+                keys.add(key)
+    except FetchError as err:
+        logging.error(f"Reconciliação de {module.ENTIDADE} interrompida ({err}).")
+        return None
+    finally:
+        pages.close()
+    if last_page >= limit_pages:
+        logging.error(f"Limite de {limit_pages} páginas atingido na reconciliação de {module.ENTIDADE}; use janelas menores.")
+        return None
+    return keys
+
+
+def orphan_keys(stored, received):
+    """Chaves gravadas no banco que a API não devolveu."""
+    return [key for key in stored if key not in received]
+
+
+def remove_orphans(conn, module, keys, delete=True, batch_size=None, dialect="mysql"):
+    """Registra as chaves em sync_tombstones e, com `delete`, remove as linhas.
+
+    Retorna (linhas marcadas/removidas, tickets afetados).
+    """
+    spec = module.SPEC
+    ticket_column = module.COLUMNS[module.TICKET_INDEX]
+    batch_size = batch_size or DB_BATCH_SIZE
+    removed_at = datetime.now().replace(microsecond=0)
+    tickets = set()
+    count = 0
+    cursor = conn.cursor()
+    try:
+        for start in range(0, len(keys), batch_size):
+            batch = keys[start:start + batch_size]
+            placeholders = _placeholders(len(batch), dialect)
+            cursor.execute(
+                f"SELECT {spec.primary_key}, {ticket_column} FROM {spec.fact_table} WHERE {spec.primary_key} IN ({placeholders})",
+                batch,
+            )
+            found = cursor.fetchall()
+            if not found:
+                continue
+            # Marca e remoção do lote na mesma transação
+            tombstones = [(module.ENTIDADE, str(key), ticket, removed_at) for key, ticket in found]
+            cursor.execute(build_upsert_sql("sync_tombstones", TOMBSTONE_COLUMNS, ("entidade", "chave"),
+                                            rows=len(tombstones), dialect=dialect),
+                           [value for row in tombstones for value in row])
+            if delete:
+                cursor.execute(f"DELETE FROM {spec.fact_table} WHERE {spec.primary_key} IN ({placeholders})", batch)
+            conn.commit()
+            count += len(found)
+            tickets.update(ticket for _, ticket in found)
+    except DB_ERRORS[dialect] as err:
+        conn.rollback()
+        logging.error(f"Erro ao remover registros de {spec.fact_table}: {err}")
+        raise
+    finally:
+        cursor.close()
+    return count, tickets
+
+
+def reconcile_window(conn, module, window=None, delete=True, force=False, max_ratio=None, dialect="mysql"):
+    """Compara as chaves do banco e da API em uma janela e remove (ou marca) as que sumiram da API."""
+    max_ratio = RECONCILE_MAX_ORPHAN_RATIO if max_ratio is None else max_ratio
+    label = window_label(window) if window else "completa"
+    start = time.perf_counter()
+    stats = {"entidade": module.ENTIDADE, "janela": label, "registros": 0, "no_banco": 0, "orfaos": 0,
+             "removidos": 0, "concluida": False}
+
+    conn.ping(reconnect=True, attempts=3, delay=2)
+    stored = stored_keys(conn, module, window, dialect)
+    received = api_keys(module, window)
+    stats["no_banco"] = len(stored)
+    if received is not None:
+        stats["registros"] = len(received)
+        orphans = orphan_keys(stored, received)
+        stats["orfaos"] = len(orphans)
+        # Muitos órfãos de uma vez costumam indicar um filtro errado ou uma resposta parcial da API
+        if orphans and len(orphans) > max_ratio * len(stored) and not force:
+            logging.error(
+                f"{module.ENTIDADE} {label}: {len(orphans)} de {len(stored)} chaves sumiram da API, "
+                f"acima de RECONCILE_MAX_ORPHAN_RATIO ({max_ratio:.0%}); nada foi removido. Use --force para confirmar."
+            )
+        else:
+            conn.ping(reconnect=True, attempts=3, delay=2)
+            count, tickets = remove_orphans(conn, module, orphans, delete, dialect=dialect) if orphans else (0, set())
+            if delete:
+                stats["removidos"] = count
+                # Chamados removidos saem de chamados_unificados; os demais têm os totais recalculados
+                if tickets:
+                    refresh_unified(conn, tickets)
+            stats["concluida"] = True
+            logging.info(
+                f"{module.ENTIDADE} {label}: {len(stored)} no banco, {len(received)} na API, {len(orphans)} órfãos "
+                + ("removidos." if delete else "marcados em sync_tombstones.")
+            )
+    stats["segundos"] = time.perf_counter() - start
+    return stats
+
+
+def reconcile(modules, start=None, end=None, days=RECONCILE_WINDOW_DAYS, delete=True, force=False):
+    """Reconcilia as entidades janela a janela; retorna as estatísticas de cada janela.
+
+    Chamados e apontamentos são divididos em janelas de datas (como no backfill); os
+    feedbacks, sem filtro de data na API, são comparados de uma vez.
+    """
+    end = parse_day(end) if end else date.today()
+    results = []
+    conn = connect_db()
+    try:
+        ensure_tombstones_table(conn)
+        for module in modules:
+            module.ensure_table_exists(conn)
+            if hasattr(module, "FILTROS_JANELA"):
+                windows = date_windows(start or module.INICIO_DO_HISTORICO, end, days)
+            else:
+                windows = [None]
+            logging.info(f"=== Reconciliação de {module.ENTIDADE}: {len(windows)} janelas ===")
+            results += [reconcile_window(conn, module, window, delete, force) for window in windows]
+    finally:
+        conn.close()
+    return results
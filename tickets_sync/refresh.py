@@ -0,0 +1,108 @@
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from tickets_sync.config import API_FETCH_WORKERS, REFRESH_MAX_TICKETS
+from tickets_sync.pagination import FetchError, PageDeduplicator, iter_pages
+
+# === Atualização dirigida pelos chamados alterados ===
+# A sincronização de chamados informa os tickets cujas linhas mudaram (stats["alterados"]).
+# Na atualização dirigida (`python -m tickets_sync sync --targeted`), apontamentos e
+# feedbacks buscam só esses tickets, com o filtro por ticket da API (FILTRO_TICKET em
+# cada script), em vez de repaginar todo o período: em uma execução de hora em hora,
+# dezenas de requisições em vez de centenas de páginas.
+
+# Registros de vários tickets acumulados antes de cada gravação no banco
+REFRESH_BATCH_SIZE = 500
+
+
+class TicketFetchError(FetchError):
+    """Tickets que não puderam ser obtidos na atualização dirigida."""
+
+    def __init__(self, message, tickets=()):
+        Exception.__init__(self, message)
+        self.page = None
+        self.tickets = list(tickets)
+
+
+def targeted(ticket_keys, limit=None):
+    """Se vale buscar os tickets um a um; acima do limite, a paginação normal faz menos requisições."""
+    limit = REFRESH_MAX_TICKETS if limit is None else limit
+    return ticket_keys is not None and len(ticket_keys) <= limit
+
+
+def iter_ticket_records(fetch_page, ticket_keys, param, ticket_field, key=None, page_size=None, pages_per_ticket=None,
+                        workers=None, batch_size=REFRESH_BATCH_SIZE):
+    """Gera (lote, registros) com os registros dos tickets de `ticket_keys`, buscando até `workers` tickets em paralelo.
+
+    `fetch_page(page, filtros)` é o mesmo da paginação normal. Cada ticket é paginado
+    com o filtro `param` até a primeira página vazia, ou com menos de `page_size`
+    registros (no máximo `pages_per_ticket` páginas), e os
+    registros de vários tickets são agrupados em lotes de até `batch_size`, para que a
+    gravação continue em lotes. Se algum ticket falhar, os demais são entregues e
+    TicketFetchError é lançado no final. Um registro de outro ticket (`ticket_field`)
+    indica que o endpoint ignorou o filtro, e a atualização é interrompida.
+    """
+    workers = max(1, workers or API_FETCH_WORKERS)
+    queued = deque(sorted(set(ticket_keys)))
+    pending = deque()
+    failed = []
+    batch = []
+    number = 0
+    executor = ThreadPoolExecutor(max_workers=workers)
+
+    def fetch_ticket(ticket):
+        fetch = partial(fetch_page, filtros={param: ticket})
+        dedup = PageDeduplicator(key) if key else None
+        records = []
+        page = 1
+        while not pages_per_ticket or page <= pages_per_ticket:
+            # Uma página por vez, com as novas tentativas de iter_pages; sem pedir a página vazia do fim
+            items = [item for _, page_items in iter_pages(fetch, page=page, limit_pages=page, workers=1) for item in page_items]
+            if items and dedup is not None:
+                items = dedup.filter(page, items) or []
+            records.extend(items)
+            if not items or (page_size and len(items) < page_size):
+                break
+            page += 1
+        return records
+
+    def schedule():
+        # Mantém até `workers` tickets em andamento
+        while len(pending) < workers and queued:
+            ticket = queued.popleft()
+            pending.append((ticket, executor.submit(fetch_ticket, ticket)))
+
+    try:
+        schedule()
+        while pending:
+            ticket, future = pending.popleft()
+            try:
+                records = future.result()
+            except FetchError as err:
+                logging.error(f"Ticket {ticket}: {err}.")
+                failed.append(ticket)
+                records = []
+            if any(str(record.get(ticket_field)) != str(ticket) for record in records):
+                raise TicketFetchError(f"o endpoint ignorou o filtro {param}; use a sincronização regular")
+            schedule()
+            batch.extend(records)
+            if len(batch) >= batch_size:
+                number += 1
+                yield number, batch
+                batch = []
+        if batch:
+            yield number + 1, batch
+        if failed:
+            raise TicketFetchError(f"falha ao buscar {len(failed)} tickets", failed)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def ticket_where(column, ticket_keys):
+    """Cláusula (SQL, parâmetros) que restringe a tabela às linhas dos tickets."""
+    keys = sorted(set(ticket_keys))
+    if not keys:
+        return "1 = 0", ()
+    return f"{column} IN ({', '.join(['%s'] * len(keys))})", tuple(keys)
@@ -0,0 +1,232 @@
+import logging
+
+from tickets_sync import aio
+from tickets_sync.backfill import check_window, window_filters, window_label, window_state_key, window_where
+from tickets_sync.changes import RowHashIndex
+from tickets_sync.client import get_client
+from tickets_sync.config import DB_WRITE_WORKERS, SYNC_ENGINE
+from tickets_sync.db import connect_db
+from tickets_sync.dimensions import DimensionWriter
+from tickets_sync.pagination import FetchError
+from tickets_sync.pipeline import prefetch
+from tickets_sync.refresh import ticket_where
+from tickets_sync.schema import prepare_schema
+from tickets_sync.sinks import open_sink
+from tickets_sync.staging import StagingLoader
+from tickets_sync.state import (
+    WatermarkTracker, check_since, clear_checkpoint, get_checkpoint, get_watermark,
+    save_checkpoint, save_watermark, since_param,
+)
+from tickets_sync.telemetry import RunMetrics
+from tickets_sync.unified import refresh_unified
+from tickets_sync.writers import PartitionedWriter
+
+# === Sincronização de uma entidade (motor com threads) ===
+# Orquestração comum aos três scripts: marca d'água, checkpoint, busca com prefetch,
+# gravação direta, em massa (--bulk) ou em paralelo (PartitionedWriter), destino
+# Parquet e tabela unificada. Cada script define só o mapeamento, a busca e a
+# gravação de uma página; o main() de cada um apenas chama sync_entity().
+#
+# O runner lê de cada script: ENTIDADE, SPEC, PRIMARY_KEY, TICKET_INDEX,
+# PARQUET_PARTITION, ensure_table_exists(), fetch_tickets() e insert_tickets().
+# WATERMARK_FIELD e FILTRO_ALTERACAO ativam a sincronização incremental e os
+# checkpoints; FILTROS_JANELA e COLUNA_JANELA, a carga por janelas de datas; e
+# fetch_for_tickets(), a atualização dirigida.
+
+RESUME_HINT = "; marca d'água mantida. Use --resume para continuar."
+
+
+def sync_entity(module, limit_pages=None, full=False, resume=False, bulk=False, conn=None, engine=None, window=None,
+                unified=True, tickets=None, changed=None, writers=None, pool=None, migrate=True):
+    """Sincroniza a entidade de `module`; retorna as estatísticas da execução.
+
+    `window` restringe a carga a uma janela de datas (backfill), `tickets` aos
+    registros desses chamados (atualização dirigida) e `changed` recebe os tickets
+    cujas linhas mudaram. Sem `conn`, abre uma conexão própria; com `pool`, as
+    conexões da gravação em paralelo também vêm dele. Com `migrate=False`, as
+    migrações já foram aplicadas por quem coordena a execução (ex.: o backfill).
+    """
+    # Com o motor assíncrono (SYNC_ENGINE=async), apenas delega para tickets_sync/aio.py; a carga em massa,
+    # as janelas do backfill, a atualização dirigida e as conexões recebidas da CLI seguem pelo caminho com threads
+    if (engine or SYNC_ENGINE) == "async" and not bulk and conn is None and window is None and tickets is None:
+        return aio.run([(module, limit_pages)], full=full, resume=resume)[0]
+    entidade = module.ENTIDADE
+    spec = module.SPEC
+    # Os feedbacks não têm filtro de alteração na API: sempre o conjunto completo, sem marca d'água nem checkpoint
+    incremental = hasattr(module, "WATERMARK_FIELD")
+    targeted = tickets is not None
+    logging.info("=== Iniciando sincronização com API Acelerato ===")
+    # Na CLI unificada a conexão vem do pool compartilhado
+    if conn is None:
+        conn = connect_db(local_infile=bulk)
+    # Processos e threads paralelos não aplicam migrações: quem os coordena chama prepare_schema() uma vez antes
+    if migrate:
+        prepare_schema(conn, [module], unified=unified)
+    # Na carga de uma janela ou de alguns tickets, só os hashes dessas linhas ficam em memória
+    if targeted:
+        where = ticket_where(module.COLUMNS[module.TICKET_INDEX], tickets)
+    else:
+        where = window and window_where(module.COLUNA_JANELA, window)
+    hashes = RowHashIndex(conn, spec.fact_table, module.PRIMARY_KEY, where=where)
+    dimensions = DimensionWriter(spec)
+    sink = open_sink(spec, module.PARQUET_PARTITION)
+    loader = StagingLoader(conn, spec, confirm=hashes.confirm) if bulk else None
+    metrics = RunMetrics(entidade)
+
+    tracker = WatermarkTracker(module.WATERMARK_FIELD) if incremental else None
+    # Uma janela não usa nem avança a marca d'água; isso fica com o coordenador do backfill.
+    # A atualização dirigida também não: registros de chamados sem alteração ficam para a execução regular
+    checkpoints = incremental and not targeted
+    watermark = get_watermark(conn, entidade) if checkpoints and not (full or window) else None
+    state_key = window_state_key(entidade, window)
+    checkpoint = get_checkpoint(conn, state_key) if checkpoints and resume else None
+    start_page = 1
+    filtros = {}
+    if targeted:
+        logging.info(f"Atualização dirigida: {entidade} de {len(tickets)} chamados alterados.")
+    elif checkpoint:
+        # Retoma a mesma consulta da carga interrompida, a partir da página seguinte à última gravada
+        start_page = checkpoint["pagina"] + 1
+        filtros = checkpoint["filtros"]
+        tracker.value = checkpoint["watermark"]
+        logging.info(f"Retomando carga interrompida a partir da página {start_page}.")
+    elif window:
+        filtros = window_filters(module.FILTROS_JANELA, window)
+        logging.info(f"Carga da janela {window_label(window)}.")
+    elif watermark:
+        filtros = {module.FILTRO_ALTERACAO: since_param(watermark)}
+        logging.info(f"Sincronização incremental: alterações desde {filtros[module.FILTRO_ALTERACAO]}.")
+    else:
+        logging.info("Sincronização completa.")
+
+    # Com DB_WRITE_WORKERS (ou --db-writers) acima de 1, a gravação é dividida entre conexões próprias;
+    # o checkpoint passa a ser a última página confirmada por todas elas
+    workers = writers or DB_WRITE_WORKERS
+    writer = None
+    if loader is None and workers > 1:
+        writer = PartitionedWriter(spec.fact_table, spec.write_columns, module.PRIMARY_KEY, workers=workers,
+                                   committed=start_page - 1, connect=pool and pool.get_connection, metrics=metrics,
+                                   confirm=hashes.confirm)
+
+    # Linhas que falharam na gravação (fatos ou dimensões) deixam a execução incompleta:
+    # a marca d'água não avança e o checkpoint fica na última página gravada por inteiro
+    first_failed = None
+
+    def failures():
+        return hashes.failed + dimensions.failed
+
+    def save_progress(page):
+        if first_failed is not None:
+            page = min(page, first_failed - 1)
+        if checkpoints and page:
+            save_checkpoint(conn, state_key, page, filtros, tracker.value)
+
+    # limit_pages conta as páginas desta execução, inclusive ao retomar
+    # (a atualização dirigida não tem limite de páginas: são no máximo REFRESH_MAX_TICKETS tickets)
+    last_allowed = None if targeted else limit_pages and start_page + limit_pages - 1
+    total = 0
+    touched = set()
+    last_page = 0
+    if targeted:
+        pages = module.fetch_for_tickets(tickets, metrics=metrics)
+    else:
+        pages = module.fetch_tickets(page=start_page, limit_pages=last_allowed, filtros=filtros, metrics=metrics)
+        if window:
+            # Registros fora da janela indicam que a API ignorou os filtros de data
+            pages = check_window(pages, module, window)
+        elif incremental and filtros.get(module.FILTRO_ALTERACAO):
+            # Idem para o filtro de alteração da carga incremental (inclusive ao retomar)
+            pages = check_since(pages, module.WATERMARK_FIELD, module.FILTRO_ALTERACAO, filtros[module.FILTRO_ALTERACAO])
+    finished = False
+    try:
+        try:
+            # Busca e gravação se sobrepõem: cada página é gravada assim que chega pela fila
+            for current_page, records in prefetch(pages):
+                conn.ping(reconnect=True, attempts=3, delay=2)
+                written_rows = module.insert_tickets(conn, records, hashes, sink, loader, metrics, dimensions=dimensions,
+                                                     writer=writer, page=current_page)
+                touched.update(row[module.TICKET_INDEX] for row in written_rows)
+                if tracker is not None:
+                    tracker.update(records)
+                total += len(records)
+                last_page = current_page
+                if first_failed is None and failures():
+                    first_failed = current_page
+                # Na carga em massa nada é gravado antes da mesclagem, então o checkpoint vem depois dela
+                if loader is None:
+                    save_progress(writer.committed if writer else current_page)
+            if writer is not None:
+                with metrics.phase("write"):
+                    metrics.count("linhas_gravadas", writer.close())
+                save_progress(writer.committed)
+            if loader is not None:
+                with metrics.phase("write"):
+                    metrics.count("linhas_gravadas", loader.merge())
+                # Com falhas na mesclagem, o checkpoint fica onde estava: a carga inteira é refeita
+                if not failures():
+                    save_progress(last_page)
+            concluida = not (last_allowed and last_page >= last_allowed) and not failures()
+        except FetchError as err:
+            if loader is not None:
+                loader.discard()
+            # As páginas já enviadas às threads são gravadas antes de encerrar, e o checkpoint acompanha
+            if writer is not None:
+                metrics.count("linhas_gravadas", writer.close())
+                save_progress(writer.committed)
+            logging.error(f"Sincronização interrompida ({err})" + (RESUME_HINT if checkpoints else "."))
+            concluida = False
+        else:
+            # Só avança a marca d'água se todas as páginas foram lidas e gravadas
+            if failures():
+                logging.error(f"{failures()} linhas não gravadas" + (RESUME_HINT if checkpoints else "."))
+            elif not concluida:
+                logging.warning(f"Limite de {limit_pages} páginas atingido" + (RESUME_HINT if checkpoints else "."))
+            elif checkpoints:
+                if tracker.value and not window:
+                    save_watermark(conn, entidade, max(tracker.value, watermark or tracker.value))
+                clear_checkpoint(conn, state_key)
+        finished = True
+
+        # Recalcula na tabela unificada só os chamados cujas linhas mudaram nesta execução
+        # (no backfill com processos, o coordenador reconstrói a tabela uma vez no final)
+        if unified:
+            with metrics.phase("unified"):
+                refresh_unified(conn, touched)
+        # Tickets alterados, para a atualização dirigida de apontamentos e feedbacks (tickets_sync/refresh.py)
+        if changed is not None:
+            changed.update(touched)
+    finally:
+        # Em um erro de banco (ou qualquer outro fora da API), as threads de gravação terminam, o checkpoint
+        # fica na última página confirmada por todas elas, e o destino Parquet e as conexões são fechados
+        if not finished:
+            if loader is not None and not loader.file.closed:
+                loader.discard()
+            if writer is not None:
+                writer.close(raise_errors=False)
+                try:
+                    save_progress(writer.committed)
+                except Exception as err:
+                    logging.error(f"Não foi possível salvar o checkpoint de {entidade}: {err}")
+        if sink is not None:
+            with metrics.phase("parquet"):
+                sink.close()
+        conn.close()
+
+    logging.info(hashes.summary())
+    if dimensions.links:
+        logging.info(dimensions.summary())
+    logging.info(get_client().summary())
+    if not total:
+        logging.warning("Nenhum registro encontrado para sincronizar.")
+    logging.info("=== Sincronização concluída ===")
+    return {
+        "entidade": entidade,
+        "janela": window_label(window) if window else None,
+        "registros": total,
+        "inseridos": hashes.inserted,
+        "atualizados": hashes.updated,
+        "inalterados": hashes.unchanged,
+        "falhas": failures(),
+        "concluida": concluida,
+        "telemetria": metrics.snapshot(),
+    }
@@ -0,0 +1,20 @@
+from tickets_sync.state import ensure_state_table
+from tickets_sync.unified import prepare_unified
+
+# === Preparação do esquema ===
+# Migrações, tabela de estado e chamados_unificados são aplicadas uma única vez por
+# quem coordena a execução (CLI, backfill, motor assíncrono ou o script isolado),
+# antes de abrir threads, processos ou tarefas. As entidades em paralelo rodam com
+# migrate=False e não disputam schema_migrations, as dimensões nem a reconstrução
+# da tabela unificada.
+
+
+def prepare_schema(conn, modules, unified=True):
+    """Aplica as migrações de `modules`, cria a tabela de estado e prepara chamados_unificados."""
+    for module in modules:
+        module.ensure_table_exists(conn)
+    # Os feedbacks não têm marca d'água nem checkpoint
+    if any(hasattr(module, "WATERMARK_FIELD") for module in modules):
+        ensure_state_table(conn)
+    if unified:
+        prepare_unified(conn)
@@ -0,0 +1,232 @@
+import os
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+
+from tickets_sync.config import PARQUET_DIR, PARQUET_FLUSH_ROWS
+from tickets_sync.state import parse_datetime
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+try:
+    import fcntl
+except ImportError:
+    # Sem fcntl (Windows) a mesclagem não é travada entre processos
+    fcntl = None
+
+# === Exportação colunar (Parquet) para o BI ===
+# Cada entidade é gravada em <PARQUET_DIR>/<tabela>/mes=AAAA-MM/dados.parquet
+# (particionamento no estilo Hive, lido com filtro de partição por DuckDB,
+# Spark ou pyarrow.dataset). A gravação é incremental: apenas as partições
+# tocadas na execução são reescritas, mesclando pela chave primária. Se a coluna
+# de partição de um registro muda (ex.: dataDeAvaliacao dos feedbacks, nula até a
+# avaliação), a linha antiga é removida da partição anterior, para que cada chave
+# fique em uma única partição.
+
+PARTITION_FILE = "dados.parquet"
+NO_DATE_PARTITION = "sem_data"
+
+
+def _to_int(value):
+    return int(value)
+
+
+def _to_float(value):
+    return float(value)
+
+
+def _to_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "sim")
+    return bool(value)
+
+
+def _arrow_column(sql_type):
+    # Tipo Arrow e conversão de valor a partir do tipo SQL declarado no SPEC
+    sql_type = sql_type.upper()
+    if sql_type.startswith("INT"):
+        return pa.int64(), _to_int
+    if sql_type.startswith(("DECIMAL", "DOUBLE", "FLOAT")):
+        return pa.float64(), _to_float
+    if sql_type.startswith("BOOLEAN"):
+        return pa.bool_(), _to_bool
+    if sql_type.startswith(("DATETIME", "DATE")):
+        return pa.timestamp("us"), parse_datetime
+    return pa.string(), str
+
+
+class ParquetSink:
+    """Destino colunar opcional, alimentado pelas mesmas tuplas gravadas no MySQL."""
+
+    def __init__(self, spec, partition_column, base_dir=None, flush_rows=None):
+        if pa is None:
+            raise RuntimeError("A exportação Parquet requer o pacote pyarrow (pip install pyarrow).")
+        self.spec = spec
+        self.base_dir = os.path.join(base_dir or PARQUET_DIR, spec.table)
+        self.flush_rows = flush_rows or PARQUET_FLUSH_ROWS
+        self.partition_index = spec.columns.index(partition_column)
+        self.key_index = spec.columns.index(spec.primary_key)
+
+        columns = [_arrow_column(f.sql_type) for f in spec.fields]
+        self.schema = pa.schema([(f.column, t) for f, (t, _) in zip(spec.fields, columns)])
+        self.converters = [conv for _, conv in columns]
+
+        self.buffer = defaultdict(list)
+        self.buffered = 0
+        self.written = 0
+        self.moved = 0
+        self.partitions = set()
+
+    def partition_of(self, row):
+        date = parse_datetime(row[self.partition_index])
+        return date.strftime("%Y-%m") if date else NO_DATE_PARTITION
+
+    def write(self, rows):
+        for row in rows:
+            self.buffer[self.partition_of(row)].append(row)
+        self.buffered += len(rows)
+        if self.buffered >= self.flush_rows:
+            self.flush()
+
+    def _convert(self, value, converter):
+        if value is None or value == "":
+            return None
+        try:
+            return converter(value)
+        except (TypeError, ValueError):
+            return None
+
+    def _to_table(self, rows):
+        columns = []
+        for i, converter in enumerate(self.converters):
+            columns.append([self._convert(row[i], converter) for row in rows])
+        return pa.Table.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, self.schema)],
+            schema=self.schema,
+        )
+
+    def _conform(self, table):
+        # Arquivos gravados com um SPEC anterior: colunas novas ficam nulas e
+        # colunas cujo tipo mudou (ex.: datas em texto) são reconvertidas
+        if table.schema.equals(self.schema):
+            return table
+        arrays = []
+        for i, field in enumerate(self.schema):
+            if field.name not in table.column_names:
+                arrays.append(pa.nulls(table.num_rows, field.type))
+                continue
+            column = table[field.name]
+            if column.type != field.type:
+                column = pa.array(
+                    [self._convert(v, self.converters[i]) for v in column.to_pylist()], type=field.type
+                )
+            arrays.append(column)
+        return pa.Table.from_arrays(arrays, schema=self.schema)
+
+    def _directory(self, partition):
+        return os.path.join(self.base_dir, f"mes={partition}")
+
+    def _replace(self, path, table):
+        # Grava em arquivo temporário e troca atomicamente, para que leitores nunca vejam arquivo parcial
+        tmp_path = path + ".tmp"
+        pq.write_table(table.sort_by(self.spec.primary_key), tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+
+    def _merge_partition(self, partition, rows):
+        directory = self._directory(partition)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, PARTITION_FILE)
+        incoming = self._to_table(rows)
+
+        with _partition_lock(directory):
+            if os.path.exists(path):
+                existing = self._conform(pq.read_table(path))
+                keep = pc.invert(pc.is_in(existing[self.spec.primary_key], value_set=incoming[self.spec.primary_key]))
+                incoming = pa.concat_tables([existing.filter(keep), incoming])
+            self._replace(path, incoming)
+
+    def _stored_partitions(self):
+        if not os.path.isdir(self.base_dir):
+            return []
+        return sorted(
+            name[len("mes="):] for name in os.listdir(self.base_dir)
+            if name.startswith("mes=") and os.path.exists(os.path.join(self.base_dir, name, PARTITION_FILE))
+        )
+
+    def _evict(self, partition, keys):
+        """Remove de `partition` as chaves que agora pertencem a outra partição; retorna quantas saíram."""
+        directory = self._directory(partition)
+        path = os.path.join(directory, PARTITION_FILE)
+        with _partition_lock(directory):
+            # Só a coluna da chave é lida; o arquivo inteiro apenas se alguma chave mudou de partição
+            stored = pq.read_table(path, columns=[self.spec.primary_key])[self.spec.primary_key]
+            moved = pc.is_in(stored, value_set=keys)
+            if not pc.any(moved).as_py():
+                return 0
+            existing = self._conform(pq.read_table(path))
+            self._replace(path, existing.filter(pc.invert(pc.is_in(existing[self.spec.primary_key], value_set=keys))))
+            return pc.sum(moved.cast(pa.int64())).as_py()
+
+    def flush(self):
+        # A última ocorrência de cada chave prevalece, inclusive entre partições do mesmo lote
+        latest = {}
+        for partition, rows in self.buffer.items():
+            for row in rows:
+                latest[row[self.key_index]] = (partition, row)
+        grouped = defaultdict(list)
+        for partition, row in latest.values():
+            grouped[partition].append(row)
+
+        for partition, rows in grouped.items():
+            self._merge_partition(partition, rows)
+            self.partitions.add(partition)
+
+        # Depois da mesclagem, remove as chaves do lote das demais partições: se o processo cair
+        # entre as duas etapas, a linha fica duplicada até a próxima execução, mas nunca se perde
+        if latest:
+            key_type = self.schema.field(self.key_index).type
+            keys = pa.array([self._convert(k, self.converters[self.key_index]) for k in latest], type=key_type)
+            targets = pa.array([partition for partition, _ in latest.values()], type=pa.string())
+            for partition in self._stored_partitions():
+                elsewhere = keys.filter(pc.not_equal(targets, partition))
+                if len(elsewhere):
+                    self.moved += self._evict(partition, elsewhere)
+
+        self.written += self.buffered
+        self.buffer.clear()
+        self.buffered = 0
+
+    def close(self):
+        self.flush()
+        logging.info(
+            f"Parquet {self.spec.table}: {self.written} registros mesclados em "
+            f"{len(self.partitions)} partições de {self.base_dir}"
+            + (f" ({self.moved} mudaram de partição)." if self.moved else ".")
+        )
+
+
+@contextmanager
+def _partition_lock(directory):
+    # Os processos do backfill por janelas podem mesclar a mesma partição ao mesmo tempo;
+    # a trava serializa leitura, mesclagem e troca do arquivo (".lock" é ignorado pelos leitores)
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def open_sink(spec, partition_column):
+    """Retorna o destino Parquet da entidade, ou None se PARQUET_DIR não estiver configurado."""
+    if not PARQUET_DIR:
+        return None
+    return ParquetSink(spec, partition_column)
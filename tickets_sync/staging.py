@@ -0,0 +1,138 @@
+import os
+import re
+import time
+import logging
+import tempfile
+from datetime import date, datetime
+
+import mysql.connector
+
+from tickets_sync.config import DB_STAGING_DIR
+from tickets_sync.db import build_merge_sql, bulk_upsert
+
+# === Carga em massa via staging ===
+# As linhas achatadas são gravadas em um arquivo TSV à medida que as páginas
+# chegam; no final, LOAD DATA LOCAL INFILE carrega o arquivo em uma tabela
+# temporária e um único INSERT ... SELECT mescla tudo no destino. Leitores
+# veem a tabela antes ou depois da mesclagem, nunca no meio da carga.
+
+NULL = "\\N"
+_ESCAPES = {"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"}
+_UNESCAPES = {"t": "\t", "n": "\n", "r": "\r", "\\": "\\"}
+_ESCAPE_RE = re.compile(r"[\\\t\n\r]")
+_UNESCAPE_RE = re.compile(r"\\(.)")
+
+LOAD_SQL = (
+    "LOAD DATA LOCAL INFILE %s REPLACE INTO TABLE {staging} CHARACTER SET utf8mb4 "
+    "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({columns})"
+)
+
+
+class PartialLoadError(Exception):
+    """LOAD DATA não carregou todas as linhas do arquivo intactas."""
+
+
+def tsv_value(value):
+    if value is None:
+        return NULL
+    if value is True or value is False:
+        return "1" if value else "0"
+    if isinstance(value, datetime):
+        return value.isoformat(" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    return _ESCAPE_RE.sub(lambda m: _ESCAPES[m.group(0)], str(value))
+
+
+def parse_tsv_value(text):
+    if text == NULL:
+        return None
+    return _UNESCAPE_RE.sub(lambda m: _UNESCAPES.get(m.group(1), m.group(1)), text)
+
+
+class StagingLoader:
+    """Acumula as linhas de uma entidade em TSV e as mescla no destino de uma só vez.
+
+    Depois da mesclagem, as linhas gravadas são passadas a `confirm(linhas, failed=chaves)`;
+    as chaves que não puderam ser gravadas ficam em `failed`.
+    """
+
+    def __init__(self, conn, spec, directory=None, confirm=None):
+        self.conn = conn
+        self.confirm = confirm
+        self.failed = []
+        self.table = spec.fact_table
+        self.key = spec.primary_key
+        self.columns = list(spec.write_columns)
+        self.staging = f"{spec.table}_staging"
+        self.staged = 0
+
+        directory = directory or DB_STAGING_DIR
+        os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(prefix=f"{self.table}_", suffix=".tsv", dir=directory)
+        self.file = os.fdopen(fd, "w", encoding="utf-8", newline="\n")
+
+    def write(self, rows):
+        self.file.writelines("\t".join(map(tsv_value, row)) + "\n" for row in rows)
+        self.staged += len(rows)
+
+    def _read_back(self):
+        with open(self.path, encoding="utf-8", newline="\n") as f:
+            for line in f:
+                yield tuple(parse_tsv_value(v) for v in line.rstrip("\n").split("\t"))
+
+    def merge(self):
+        """Carrega o TSV na tabela de staging e mescla no destino. Retorna as linhas mescladas."""
+        self.file.close()
+        if not self.staged:
+            self._remove()
+            return 0
+
+        start = time.perf_counter()
+        merged = None
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {self.staging}")
+            cursor.execute(f"CREATE TEMPORARY TABLE {self.staging} LIKE {self.table}")
+            cursor.execute(LOAD_SQL.format(staging=self.staging, columns=", ".join(self.columns)), (self.path,))
+            loaded = cursor.rowcount
+            # LOAD DATA não falha com uma linha malformada ou um valor truncado: carrega o que consegue
+            # e só emite avisos. Nesse caso nada é mesclado e o arquivo segue pelo INSERT em lotes, que
+            # isola as linhas inválidas em `failed` em vez de confirmar os hashes de linhas que não entraram
+            if loaded < self.staged or cursor.warning_count:
+                raise PartialLoadError(
+                    f"{loaded} de {self.staged} linhas carregadas, {cursor.warning_count} avisos"
+                )
+            cursor.execute(build_merge_sql(self.table, self.staging, self.columns, self.key))
+            self.conn.commit()
+            logging.info(
+                f"Carga em massa de {self.table}: {self.staged} linhas em staging, {loaded} carregadas "
+                f"e mescladas em {time.perf_counter() - start:.1f}s."
+            )
+            merged = self.staged
+        except (mysql.connector.Error, PartialLoadError) as err:
+            # Ex.: local_infile desativado no servidor; o mesmo arquivo segue pelo INSERT em lotes
+            self.conn.rollback()
+            logging.warning(f"Falha na carga em massa de {self.table}: {err}. Usando INSERT em lotes.")
+            merged = bulk_upsert(self.conn, self.table, self.columns, self._read_back(), key=self.key,
+                                 failed=self.failed)
+        finally:
+            try:
+                cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {self.staging}")
+            except mysql.connector.Error:
+                pass
+            cursor.close()
+            # Só depois de uma mesclagem bem-sucedida, o arquivo é relido para confirmar os hashes
+            if self.confirm is not None and merged is not None:
+                self.confirm(self._read_back(), key_index=self.columns.index(self.key), failed=self.failed)
+            self._remove()
+        return merged
+
+    def discard(self):
+        self.file.close()
+        self._remove()
+        logging.warning(f"Carga em massa de {self.table} descartada ({self.staged} linhas em staging).")
+
+    def _remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,188 @@
+import json
+import logging
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+from tickets_sync.config import SYNC_OVERLAP_DAYS
+
+# === Estado de sincronização (marca d'água por entidade) ===
+
+CREATE_STATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    entidade VARCHAR(50) PRIMARY KEY,
+    watermark DATETIME,
+    atualizadoEm DATETIME
+);
+"""
+
+# Última página gravada de uma carga em andamento, para retomada com --resume
+CREATE_CHECKPOINT_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS sync_checkpoint (
+    entidade VARCHAR(50) PRIMARY KEY,
+    pagina INT,
+    filtros VARCHAR(500),
+    watermark DATETIME,
+    atualizadoEm DATETIME
+);
+"""
+
+# Formatos de data observados nas respostas da API Acelerato
+DATE_FORMATS = (
+    "%Y-%m-%dT%H:%M:%S.%f",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M:%S",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%Y-%m-%d",
+    "%d/%m/%Y",
+)
+
+
+def parse_datetime(value):
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    text = str(value).strip()
+    # Caminho rápido para ISO 8601, o formato usual da API
+    try:
+        return datetime.fromisoformat(text).replace(tzinfo=None)
+    except ValueError:
+        pass
+    # Descarta fuso horário (ex.: "2025-10-30T14:05:19.000-03:00" ou "...Z")
+    if "T" in text:
+        text = text.split("+")[0].rstrip("Z")
+        if text.count("-") > 2:
+            text = text.rsplit("-", 1)[0]
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def ensure_state_table(conn):
+    try:
+        cursor = conn.cursor()
+        cursor.execute(CREATE_STATE_TABLE_SQL)
+        cursor.execute(CREATE_CHECKPOINT_TABLE_SQL)
+        conn.commit()
+        cursor.close()
+    except mysql.connector.Error as err:
+        logging.error(f"Erro ao criar tabela sync_state: {err}")
+        raise
+
+
+def get_watermark(conn, entidade):
+    cursor = conn.cursor()
+    cursor.execute("SELECT watermark FROM sync_state WHERE entidade = %s", (entidade,))
+    row = cursor.fetchone()
+    cursor.close()
+    return row[0] if row else None
+
+
+def save_watermark(conn, entidade, watermark):
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO sync_state (entidade, watermark, atualizadoEm) VALUES (%s, %s, NOW()) "
+        "ON DUPLICATE KEY UPDATE watermark = VALUES(watermark), atualizadoEm = VALUES(atualizadoEm)",
+        (entidade, watermark),
+    )
+    conn.commit()
+    cursor.close()
+    logging.info(f"Marca d'água de {entidade} atualizada para {watermark}.")
+
+
+def get_checkpoint(conn, entidade):
+    cursor = conn.cursor()
+    cursor.execute("SELECT pagina, filtros, watermark FROM sync_checkpoint WHERE entidade = %s", (entidade,))
+    row = cursor.fetchone()
+    cursor.close()
+    if not row:
+        return None
+    return {"pagina": row[0], "filtros": json.loads(row[1] or "{}"), "watermark": row[2]}
+
+
+SAVE_CHECKPOINT_SQL = (
+    "INSERT INTO sync_checkpoint (entidade, pagina, filtros, watermark, atualizadoEm) "
+    "VALUES (%s, %s, %s, %s, NOW()) "
+    "ON DUPLICATE KEY UPDATE pagina = VALUES(pagina), filtros = VALUES(filtros), "
+    "watermark = VALUES(watermark), atualizadoEm = VALUES(atualizadoEm)"
+)
+
+
+def checkpoint_params(entidade, pagina, filtros, watermark=None):
+    return (entidade, pagina, json.dumps(filtros, sort_keys=True), watermark)
+
+
+def save_checkpoint(conn, entidade, pagina, filtros, watermark=None):
+    # Chamado depois que a página foi confirmada no banco
+    cursor = conn.cursor()
+    cursor.execute(SAVE_CHECKPOINT_SQL, checkpoint_params(entidade, pagina, filtros, watermark))
+    conn.commit()
+    cursor.close()
+
+
+def clear_checkpoint(conn, entidade):
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM sync_checkpoint WHERE entidade = %s", (entidade,))
+    conn.commit()
+    cursor.close()
+
+
+def since_param(watermark, overlap_days=None):
+    """Data mínima (dd/mm/aaaa) a enviar para a API, já com a janela de sobreposição."""
+    if watermark is None:
+        return None
+    # A sobreposição evita perder alterações gravadas na API durante a execução anterior
+    overlap = SYNC_OVERLAP_DAYS if overlap_days is None else overlap_days
+    return (watermark - timedelta(days=overlap)).strftime("%d/%m/%Y")
+
+
+def records_before(records, field, since):
+    """Quantos registros têm `field` anterior à data `since` (dd/mm/aaaa) enviada no filtro."""
+    limit = parse_datetime(since)
+    older = 0
+    for record in records:
+        value = parse_datetime(record.get(field))
+        if value is not None and value < limit:
+            older += 1
+    return older
+
+
+def check_since(pages, field, filtro, since):
+    """Repassa as páginas de (página, registros), conferindo a primeira contra o filtro de alteração.
+
+    Os nomes dos filtros (FILTRO_ALTERACAO em cada script) não constam de uma
+    especificação da API; se ela ignorar o parâmetro, toda execução "incremental"
+    relê o histórico inteiro. Registros alterados antes de `since` na primeira
+    página indicam isso, e o erro fica no log sem interromper a carga, que
+    continua correta, só mais longa.
+    """
+    first = True
+    for page, records in pages:
+        if first:
+            first = False
+            older = records_before(records, field, since)
+            if older:
+                logging.error(
+                    f"{older} de {len(records)} registros da página {page} com {field} anterior a {since}: "
+                    f"a API parece ignorar o filtro {filtro}, e a carga incremental relê todo o histórico."
+                )
+        yield page, records
+
+
+class WatermarkTracker:
+    """Acompanha o maior valor de um campo de data entre os registros carregados."""
+
+    def __init__(self, field):
+        self.field = field
+        self.value = None
+
+    def update(self, records):
+        for record in records:
+            parsed = parse_datetime(record.get(self.field))
+            if parsed and (self.value is None or parsed > self.value):
+                self.value = parsed
@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import socket
+import logging
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+
+from tickets_sync.config import PROMETHEUS_TEXTFILE, RUN_REPORT_DIR
+
+# === Telemetria da sincronização ===
+# Cada execução de entidade acumula em um RunMetrics o tempo por fase (busca,
+# decodificação, transformação e gravação), contadores e histogramas de latência.
+# No final, write_run_report grava um relatório JSON e, opcionalmente, as
+# métricas no formato textfile do Prometheus (node_exporter).
+
+# Limites (s) dos histogramas de latência HTTP e de commit no banco
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+PHASES = ("fetch", "decode", "transform", "write")
+
+
+class Histogram:
+    """Histograma cumulativo no estilo Prometheus, com soma, contagem e percentis aproximados."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def percentile(self, p):
+        # Limite superior do bucket que contém o percentil
+        if not self.count:
+            return None
+        target = p / 100 * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        cumulative = []
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            cumulative.append(["+Inf" if bound == float("inf") else bound, seen])
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": cumulative,
+        }
+
+
+class RunMetrics:
+    """Métricas de uma execução de entidade; seguro para uso pelas threads da paginação."""
+
+    def __init__(self, entidade):
+        self.entidade = entidade
+        self.started = time.time()
+        self.phases = {name: 0.0 for name in PHASES}
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, value):
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram()
+            self.histograms[name].observe(value)
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = time.time() - self.started
+            written = self.counters.get("linhas_gravadas", 0)
+            write_time = self.phases.get("write", 0.0)
+            return {
+                "entidade": self.entidade,
+                "inicio": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+                "duracao_s": round(elapsed, 3),
+                # A busca roda em várias threads: o tempo de fetch/decode é somado entre elas
+                "fases_s": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+                "contadores": dict(self.counters),
+                "linhas_por_s": round(written / write_time, 1) if write_time else None,
+                "histogramas": {name: h.snapshot() for name, h in self.histograms.items()},
+            }
+
+
+class _NoMetrics:
+    # Usado quando as funções dos scripts são chamadas sem uma execução instrumentada
+    @contextmanager
+    def phase(self, name):
+        yield
+
+    def add_time(self, name, seconds):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def observe(self, name, value):
+        pass
+
+
+NO_METRICS = _NoMetrics()
+
+
+# === Relatório da execução ===
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(results):
+    """Métricas da última execução no formato de exposição texto do Prometheus."""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            rendered = ",".join(f'{k}="{_label(v)}"' for k, v in labels.items())
+            lines.append(f"{name}{{{rendered}}} {value}" if rendered else f"{name} {value}")
+
+    runs = [(r, r.get("telemetria") or {}) for r in results]
+    metric("tickets_sync_last_run_timestamp_seconds", "gauge", "Fim da última execução (epoch).",
+           [({"entidade": r["entidade"]}, round(time.time(), 3)) for r, _ in runs])
+    metric("tickets_sync_last_run_success", "gauge", "1 se a última execução foi concluída.",
+           [({"entidade": r["entidade"]}, int(bool(r.get("concluida")))) for r, _ in runs])
+    metric("tickets_sync_last_run_duration_seconds", "gauge", "Duração da última execução.",
+           [({"entidade": r["entidade"]}, t.get("duracao_s", 0)) for r, t in runs])
+    metric("tickets_sync_last_run_phase_seconds", "gauge", "Tempo acumulado por fase na última execução.",
+           [({"entidade": r["entidade"], "fase": f}, s) for r, t in runs for f, s in t.get("fases_s", {}).items()])
+    metric("tickets_sync_last_run_records", "gauge", "Registros recebidos da API na última execução.",
+           [({"entidade": r["entidade"]}, r.get("registros", 0)) for r, _ in runs])
+    metric("tickets_sync_last_run_rows_per_second", "gauge", "Linhas gravadas por segundo de escrita.",
+           [({"entidade": r["entidade"]}, t.get("linhas_por_s") or 0) for r, t in runs])
+    counters = sorted({name for _, t in runs for name in t.get("contadores", {})})
+    for name in counters:
+        metric(f"tickets_sync_last_run_{name}", "gauge", f"Contador {name} da última execução.",
+               [({"entidade": r["entidade"]}, t["contadores"].get(name, 0)) for r, t in runs])
+    hist_names = sorted({name for _, t in runs for name in t.get("histogramas", {})})
+    for name in hist_names:
+        full = f"tickets_sync_last_run_{name}"
+        lines.append(f"# HELP {full} Histograma {name} da última execução.")
+        lines.append(f"# TYPE {full} histogram")
+        for r, t in runs:
+            h = t.get("histogramas", {}).get(name)
+            if not h:
+                continue
+            entidade = _label(r["entidade"])
+            for bound, n in h["buckets"]:
+                lines.append(f'{full}_bucket{{entidade="{entidade}",le="{bound}"}} {n}')
+            lines.append(f'{full}_sum{{entidade="{entidade}"}} {h["sum"]}')
+            lines.append(f'{full}_count{{entidade="{entidade}"}} {h["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+def write_run_report(results, name=None, report_dir=None, textfile=None):
+    """Grava o relatório JSON da execução e, se configurado, o textfile do Prometheus."""
+    report_dir = RUN_REPORT_DIR if report_dir is None else report_dir
+    textfile = PROMETHEUS_TEXTFILE if textfile is None else textfile
+    name = name or "_".join(r["entidade"] for r in results)
+    report = {
+        "host": socket.gethostname(),
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "concluida": all(r.get("concluida") for r in results),
+        "entidades": results,
+    }
+    path = None
+    try:
+        if report_dir:
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            path = os.path.join(report_dir, f"{name}_{stamp}.json")
+            _write_atomic(path, json.dumps(report, ensure_ascii=False, indent=2, default=str))
+            logging.info(f"Relatório da execução gravado em {path}.")
+        if textfile:
+            _write_atomic(textfile, prometheus_text(results))
+    except OSError as err:
+        # A telemetria nunca derruba a sincronização
+        logging.error(f"Erro ao gravar o relatório da execução: {err}")
+    return path
@@ -0,0 +1,148 @@
+import logging
+
+import mysql.connector
+
+from tickets_sync.migrations import Migration, convert_to_temporal, migrate
+
+# === Tabela unificada para o BI (chamados + apontamentos + feedbacks) ===
+# Versão materializada de SQL/bases_unify.sql: uma linha por chamado ativo, com o
+# total de minutos e a quantidade de apontamentos já agregados e o feedback do
+# ticket. É criada (e reconstruída, se vazia) uma vez antes das entidades, por
+# prepare_unified; depois, cada entidade atualiza apenas os tickets que tocou.
+
+UNIFIED_TABLE = "chamados_unificados"
+REFRESH_BATCH_SIZE = 1000
+
+CREATE_UNIFIED_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS chamados_unificados (
+    ticketKey INT PRIMARY KEY,
+    titulo VARCHAR(255),
+    kanbanStatusdescricao VARCHAR(100),
+    agenteNome VARCHAR(150),
+    organizacaonome VARCHAR(150),
+    dataDeCriacao DATETIME,
+    dataDaUltimaAlteracao DATETIME,
+    avaliacaoMedia DECIMAL(5,2),
+    nota DECIMAL(5,2),
+    pergunta TEXT,
+    comentarios TEXT,
+    usuarioAvaliacaoNome VARCHAR(255),
+    dataDeAvaliacao DATETIME,
+    minutosApontados INT,
+    qtdApontamentos INT,
+    atualizadoEm DATETIME,
+    INDEX idx_chamados_unificados_dataDeCriacao (dataDeCriacao)
+);
+"""
+
+UNIFIED_MIGRATIONS = [
+    Migration(1, "cria a tabela chamados_unificados", CREATE_UNIFIED_TABLE_SQL),
+    Migration(2, "data da avaliação em DATETIME",
+              convert_to_temporal(UNIFIED_TABLE, "dataDeAvaliacao", "DATETIME")),
+]
+
+UNIFIED_SELECT_SQL = """
+SELECT
+    c.ticketKey, c.titulo, c.kanbanStatusdescricao, c.agenteNome, c.organizacaonome,
+    c.dataDeCriacao, c.dataDaUltimaAlteracao,
+    f.avaliacaoMedia, f.nota, f.pergunta, f.comentarios, f.usuarioAvaliacaoNome, f.dataDeAvaliacao,
+    COALESCE(a.minutos, 0), COALESCE(a.quantidade, 0), NOW()
+FROM chamados AS c
+LEFT JOIN (
+    SELECT ticketKey, SUM(minutos) AS minutos, COUNT(DISTINCT apontamentoKey) AS quantidade
+    FROM apontamentos
+    {apontamentos_filter}
+    GROUP BY ticketKey
+) AS a ON a.ticketKey = c.ticketKey
+LEFT JOIN feedbacks AS f ON f.ticketId = c.ticketKey
+WHERE c.arquivado = 0 AND c.lixeira = 0 {chamados_filter}
+"""
+
+
+def ensure_unified_table(conn):
+    try:
+        migrate(conn, UNIFIED_TABLE, UNIFIED_MIGRATIONS)
+    except mysql.connector.Error as err:
+        logging.error(f"Erro ao criar tabela {UNIFIED_TABLE}: {err}")
+        raise
+
+
+def _is_empty(cursor):
+    cursor.execute(f"SELECT 1 FROM {UNIFIED_TABLE} LIMIT 1")
+    return cursor.fetchone() is None
+
+
+def _rebuild(conn, cursor):
+    cursor.execute(f"DELETE FROM {UNIFIED_TABLE}")
+    cursor.execute(
+        f"INSERT INTO {UNIFIED_TABLE} "
+        + UNIFIED_SELECT_SQL.format(apontamentos_filter="", chamados_filter="")
+    )
+    conn.commit()
+    logging.info(f"{UNIFIED_TABLE} reconstruída com {cursor.rowcount} chamados.")
+
+
+def _refresh_batch(conn, cursor, keys):
+    placeholders = ", ".join(["%s"] * len(keys))
+    # Remove e recalcula as linhas do lote na mesma transação: tickets arquivados,
+    # enviados à lixeira ou removidos deixam de aparecer
+    cursor.execute(f"DELETE FROM {UNIFIED_TABLE} WHERE ticketKey IN ({placeholders})", keys)
+    cursor.execute(
+        f"INSERT INTO {UNIFIED_TABLE} "
+        + UNIFIED_SELECT_SQL.format(
+            apontamentos_filter=f"WHERE ticketKey IN ({placeholders})",
+            chamados_filter=f"AND c.ticketKey IN ({placeholders})",
+        ),
+        keys + keys,
+    )
+    conn.commit()
+
+
+def prepare_unified(conn):
+    """Cria chamados_unificados e, se estiver vazia, a reconstrói a partir das tabelas base.
+
+    Chamada uma vez antes das entidades (tickets_sync/schema.py), e não por entidade:
+    threads em paralelo disputariam schema_migrations e a reconstrução completa.
+    """
+    ensure_unified_table(conn)
+    cursor = conn.cursor(buffered=True)
+    try:
+        if _is_empty(cursor):
+            _rebuild(conn, cursor)
+    except mysql.connector.Error as err:
+        conn.rollback()
+        logging.error(f"Erro ao reconstruir {UNIFIED_TABLE}: {err}")
+    finally:
+        cursor.close()
+
+
+def refresh_unified(conn, ticket_keys, batch_size=REFRESH_BATCH_SIZE):
+    """Recalcula chamados_unificados para os tickets tocados (a tabela já foi criada por prepare_unified)."""
+    cursor = conn.cursor(buffered=True)
+    try:
+        # Ordenar as chaves mantém a mesma ordem de bloqueio entre entidades que rodam em paralelo
+        keys = sorted({int(k) for k in ticket_keys if k is not None})
+        for start in range(0, len(keys), batch_size):
+            _refresh_batch(conn, cursor, keys[start:start + batch_size])
+        if keys:
+            logging.info(f"{UNIFIED_TABLE} atualizada para {len(keys)} chamados.")
+    except mysql.connector.Error as err:
+        conn.rollback()
+        logging.error(f"Erro ao atualizar {UNIFIED_TABLE}: {err}")
+    finally:
+        cursor.close()
+
+
+def rebuild_unified(conn):
+    """Reconstrói chamados_unificados inteira (usado ao final do backfill por janelas)."""
+    cursor = None
+    try:
+        ensure_unified_table(conn)
+        cursor = conn.cursor(buffered=True)
+        _rebuild(conn, cursor)
+    except mysql.connector.Error as err:
+        conn.rollback()
+        logging.error(f"Erro ao reconstruir {UNIFIED_TABLE}: {err}")
+    finally:
+        if cursor is not None:
+            cursor.close()
@@ -0,0 +1,135 @@
+import zlib
+import queue
+import logging
+import threading
+
+from tickets_sync.config import DB_WRITE_WORKERS, PIPELINE_QUEUE_SIZE
+from tickets_sync.db import bulk_upsert, connect_db
+from tickets_sync.telemetry import NO_METRICS
+
+# === Gravação em paralelo, particionada pela chave primária ===
+# Uma única conexão serializa todos os lotes em um só fluxo de round trips e commits.
+# O PartitionedWriter divide as linhas de cada página entre DB_WRITE_WORKERS threads
+# pelo hash da chave primária. Cada thread tem a própria conexão e confirma seus lotes
+# de forma independente. Como uma chave sempre cai na mesma thread, duas threads nunca
+# gravam a mesma linha (sem deadlocks entre elas), e as versões de um registro são
+# gravadas na ordem em que chegaram.
+
+
+def partition(key, workers):
+    """Thread responsável pela chave (estável entre execuções, ao contrário de hash())."""
+    if isinstance(key, int):
+        return key % workers
+    return zlib.crc32(str(key).encode("utf-8")) % workers
+
+
+class PartitionedWriter:
+    """Grava linhas em `table` por `workers` threads, cada uma com sua conexão.
+
+    write() devolve o controle assim que as partições entram nas filas (limitadas a
+    PIPELINE_QUEUE_SIZE páginas por thread). `committed` é a última página com todas as
+    partições confirmadas, para o checkpoint; ela para antes da primeira página com
+    linhas não gravadas, cujas chaves ficam em `failed`. Cada partição gravada é
+    passada a `confirm(linhas, failed=chaves)`. Erros das threads são relançados no
+    próximo write() ou no close().
+    """
+
+    def __init__(self, table, columns, key, workers=None, committed=0, connect=None, dialect="mysql",
+                 metrics=NO_METRICS, confirm=None):
+        self.table = table
+        self.columns = list(columns)
+        self.key = key
+        self.key_index = self.columns.index(key)
+        self.workers = max(1, workers or DB_WRITE_WORKERS)
+        self.dialect = dialect
+        self.metrics = metrics
+        self.confirm = confirm
+        self.written = 0
+        self.failed = []
+        self._failed_page = None
+        self._page = committed
+        self._done = [committed] * self.workers
+        self._error = None
+        self.closed = False
+        self._lock = threading.Lock()
+        self._queues = [queue.Queue(maxsize=PIPELINE_QUEUE_SIZE) for _ in range(self.workers)]
+        # Na CLI, `connect` tira as conexões do pool compartilhado (close() as devolve a ele)
+        connections = [(connect or connect_db)() for _ in range(self.workers)]
+        # As threads herdam o nome da entidade nos logs da CLI
+        prefix = threading.current_thread().name
+        self._threads = [
+            threading.Thread(target=self._run, args=(i, conn), name=f"{prefix}-db{i}", daemon=True)
+            for i, conn in enumerate(connections)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def committed(self):
+        committed = min(self._done)
+        if self._failed_page is not None:
+            committed = min(committed, self._failed_page - 1)
+        return committed
+
+    def _run(self, index, conn):
+        jobs = self._queues[index]
+        try:
+            while True:
+                job = jobs.get()
+                if job is None:
+                    return
+                page, rows = job
+                # Depois de um erro, a fila continua sendo esvaziada para não travar o produtor
+                if self._error is not None:
+                    continue
+                failed = []
+                try:
+                    written = bulk_upsert(conn, self.table, self.columns, rows, key=self.key, dialect=self.dialect,
+                                          metrics=self.metrics, failed=failed) if rows else 0
+                    if self.confirm is not None and rows:
+                        self.confirm(rows, key_index=self.key_index, failed=failed)
+                except Exception as err:
+                    logging.exception(f"Erro na gravação paralela em {self.table}: {err}")
+                    with self._lock:
+                        self._error = self._error or err
+                    continue
+                with self._lock:
+                    self.written += written
+                    if failed:
+                        self.failed.extend(failed)
+                        if self._failed_page is None or page < self._failed_page:
+                            self._failed_page = page
+                self._done[index] = page
+        finally:
+            conn.close()
+
+    def _raise(self):
+        if self._error is not None:
+            raise self._error
+
+    def write(self, rows, page=None):
+        """Distribui as linhas entre as threads; `page` identifica o lote no checkpoint."""
+        self._raise()
+        self._page = self._page + 1 if page is None else page
+        parts = [[] for _ in range(self.workers)]
+        for row in rows:
+            parts[partition(row[self.key_index], self.workers)].append(row)
+        # Todas as threads recebem a página, mesmo sem linhas, para que `committed` avance
+        for jobs, part in zip(self._queues, parts):
+            jobs.put((self._page, part))
+
+    def close(self, raise_errors=True):
+        """Espera as gravações pendentes e fecha as conexões; retorna as linhas gravadas.
+
+        Pode ser chamado mais de uma vez. Com `raise_errors=False` (encerramento depois de
+        outro erro), o erro de uma thread fica só no log.
+        """
+        if not self.closed:
+            self.closed = True
+            for jobs in self._queues:
+                jobs.put(None)
+            for thread in self._threads:
+                thread.join()
+        if raise_errors:
+            self._raise()
+        return self.written